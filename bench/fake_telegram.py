@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from aiohttp import web
+
+# یک JPEG کوچک ولی معتبر برای دانلود عکس‌ها (اندازه با padding قابل تنظیم است)
+_JPEG_HEADER = bytes.fromhex("ffd8ffe000104a46494600010100000100010000")
+_JPEG_END = bytes.fromhex("ffd9")
+
+class FakeTelegram:
+    """
+    سرور جایگزین Bot API تلگرام برای بنچمارک.
+
+    متدهایی که بات استفاده می‌کند (sendMessage، editMessageText، getFile و ...)
+    پاسخ معتبر می‌گیرند و دانلود فایل‌ها از /file/bot<token>/... یک JPEG با اندازه
+    ثابت برمی‌گرداند. پیام‌های ارسالی هر چت نگه داشته می‌شوند تا بنچمارک بتواند
+    منتظر یک پیام خاص (مثلاً نتیجه صف ساخت محصول) بماند.
+    """
+
+    def __init__(self, latency: float = 0.0, file_latency: float = None, photo_size: int = 200 * 1024, jitter: float = 0.2):
+        """
+        Args:
+            latency (float): تأخیر هر فراخوانی Bot API (ثانیه)
+            file_latency (float, optional): تأخیر دانلود فایل؛ پیش‌فرض همان latency
+            photo_size (int): اندازه عکس‌های دانلودی به بایت
+            jitter (float): نوسان تصادفی تأخیر به نسبت مقدار آن
+        """
+        self.latency = latency
+        self.file_latency = latency if file_latency is None else file_latency
+        self.jitter = jitter
+        self.photo = _JPEG_HEADER + os.urandom(max(0, photo_size - len(_JPEG_HEADER) - len(_JPEG_END))) + _JPEG_END
+        self.requests = Counter()
+        self.messages = defaultdict(list)
+        self._waiters = defaultdict(list)
+        self._message_id = 0
+        self._runner = None
+        self.url = None
+
+    def reset_counters(self):
+        self.requests.clear()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """شروع سرور و برگرداندن آدرس پایه آن (پورت 0 یعنی یک پورت آزاد)."""
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self.bot_method)
+        app.router.add_get("/file/bot{token}/{path:.+}", self.file_download)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _delay(self, seconds: float):
+        if seconds:
+            await asyncio.sleep(max(0.0, seconds * (1 + random.uniform(-self.jitter, self.jitter))))
+
+    async def wait_for_message(self, chat_id: int, predicate, since: int = 0, timeout: float = 30) -> dict:
+        """
+        صبر تا ارسال پیامی به چت که predicate(متن) برایش True باشد.
+
+        پیام‌هایی که از اندیس since به بعد قبلاً رسیده‌اند هم بررسی می‌شوند.
+        """
+        for message in self.messages[chat_id][since:]:
+            if predicate(message.get("text", "")):
+                return message
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[chat_id].append((predicate, future))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._waiters[chat_id] = [waiter for waiter in self._waiters[chat_id] if waiter[1] is not future]
+
+    def _record(self, chat_id: int, message: dict):
+        self.messages[chat_id].append(message)
+        for predicate, future in self._waiters[chat_id]:
+            if not future.done() and predicate(message.get("text", "")):
+                future.set_result(message)
+
+    async def _params(self, request) -> dict:
+        if request.method == "GET":
+            return dict(request.query)
+        if request.content_type == "application/json":
+            return await request.json()
+        data = dict(await request.post())
+        # مقادیر پیچیده (مثل reply_markup) در فرم به‌صورت JSON فرستاده می‌شوند
+        for key, value in data.items():
+            if isinstance(value, str) and value[:1] in "[{":
+                try:
+                    data[key] = json.loads(value)
+                except ValueError:
+                    pass
+        return data
+
+    async def bot_method(self, request):
+        method = request.match_info["method"]
+        self.requests[method] += 1
+        params = await self._params(request)
+        await self._delay(self.latency)
+        handler = getattr(self, f"_{method}", None)
+        if handler is None:
+            return web.json_response({"ok": True, "result": True})
+        return web.json_response({"ok": True, "result": handler(params)})
+
+    async def file_download(self, request):
+        self.requests["file_download"] += 1
+        await self._delay(self.file_latency)
+        return web.Response(body=self.photo, content_type="image/jpeg")
+
+    # --- متدهای Bot API ---
+
+    @staticmethod
+    def _getMe(params: dict) -> dict:
+        return {"id": 1, "is_bot": True, "first_name": "Hoomak Bench", "username": "hoomak_bench_bot"}
+
+    def _message(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        self._message_id += 1
+        message = {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": self._getMe(params),
+            "text": params.get("text", "")
+        }
+        self._record(chat_id, message)
+        return message
+
+    def _sendMessage(self, params: dict) -> dict:
+        return self._message(params)
+
+    def _editMessageText(self, params: dict) -> dict:
+        message = self._message(params)
+        message["message_id"] = int(params.get("message_id", message["message_id"]))
+        return message
+
+    def _sendDocument(self, params: dict) -> dict:
+        message = self._message({"chat_id": params["chat_id"], "text": params.get("caption", "")})
+        message["document"] = {"file_id": f"doc-{message['message_id']}", "file_unique_id": f"doc-{message['message_id']}"}
+        return message
+
+    def _getFile(self, params: dict) -> dict:
+        file_id = params["file_id"]
+        return {
+            "file_id": file_id,
+            "file_unique_id": f"u-{file_id}",
+            "file_size": len(self.photo),
+            "file_path": f"photos/{file_id}.jpg"
+        }
@@ -0,0 +1,268 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from aiohttp import web
+
+API = "/wp-json/wc/v3"
+
+class FakeWooCommerce:
+    """
+    سرور جایگزین REST API ووکامرس/وردپرس برای بنچمارک، روی aiohttp.
+
+    فقط مسیرهایی که WooCommerceClient صدا می‌زند پیاده شده‌اند. برای هر مسیر
+    (با نام‌هایی مثل "products.list") می‌شود تأخیر و نرخ خطا تعیین کرد و تعداد
+    درخواست‌های هر مسیر شمرده می‌شود.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 route_latency: dict = None, route_error_rate: dict = None, jitter: float = 0.2,
+                 retry_after: str = "1"):
+        """
+        Args:
+            latency (float): تأخیر پیش‌فرض هر پاسخ (ثانیه)
+            error_rate (float): احتمال پاسخ 500 برای هر درخواست
+            throttle_rate (float): احتمال پاسخ 429 با هدر Retry-After
+            route_latency (dict): تأخیر جدا برای مسیرهای خاص {نام مسیر: ثانیه}
+            route_error_rate (dict): نرخ خطای جدا برای مسیرهای خاص {نام مسیر: احتمال}
+            jitter (float): نوسان تصادفی تأخیر به نسبت مقدار آن
+            retry_after (str): مقدار هدر Retry-After در پاسخ‌های 429
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.route_latency = route_latency or {}
+        self.route_error_rate = route_error_rate or {}
+        self.jitter = jitter
+        self.retry_after = retry_after
+        self.requests = Counter()
+        self.injected = Counter()
+        self.products = {}
+        self.variations = {}
+        self.terms = {}
+        self.media = set()
+        self._next_id = 1000
+        self._runner = None
+        self.url = None
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def seed(self, products: int = 50, sizes: tuple = (40, 41, 42, 43, 44), terms: int = 12):
+        """
+        پر کردن فروشگاه با محصولات متغیر و مقادیر ویژگی‌ها.
+
+        Args:
+            products (int): تعداد محصولات با SKUهای BENCH-0، BENCH-1، ...
+            sizes (tuple): سایز متغیرهای هر محصول
+            terms (int): تعداد مقدار هر ویژگی (رنگ، جنس رویه، جنس زیره، کاربرد)
+        """
+        for attribute_id, prefix in ((1, "color"), (4, "upper"), (5, "sole"), (6, "usage")):
+            self.terms[attribute_id] = [
+                {"id": self._new_id(), "name": f"{prefix}-{i}", "slug": f"{prefix}-{i}"} for i in range(terms)
+            ]
+        for i in range(products):
+            product = self._add_product({
+                "name": f"Bench product {i}", "sku": f"BENCH-{i}", "type": "variable", "regular_price": "500000"
+            })
+            for size in sizes:
+                self._add_variation(product["id"], {
+                    "regular_price": "500000",
+                    "attributes": [{"id": 3, "option": str(size)}],
+                    "manage_stock": True, "stock_quantity": 3
+                })
+
+    def _add_product(self, data: dict) -> dict:
+        product = {"cross_sell_ids": [], "stock_status": "instock", "date_modified_gmt": _now(), **data}
+        product.pop("variations", None)
+        product["id"] = self._new_id()
+        self.products[product["id"]] = product
+        self.variations[product["id"]] = []
+        return product
+
+    def _add_variation(self, product_id: int, data: dict) -> dict:
+        variation = {**data, "id": self._new_id()}
+        self.variations[product_id].append(variation)
+        return variation
+
+    def reset_counters(self):
+        self.requests.clear()
+        self.injected.clear()
+
+    # --- سرور ---
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """شروع سرور و برگرداندن آدرس پایه آن (پورت 0 یعنی یک پورت آزاد)."""
+        app = web.Application(middlewares=[self._middleware], client_max_size=64 * 1024 * 1024)
+        router = app.router
+        router.add_post(f"{API}/products/batch", self.products_batch, name="products.batch")
+        router.add_get(f"{API}/products", self.products_list, name="products.list")
+        router.add_post(f"{API}/products", self.products_create, name="products.create")
+        router.add_get(API + r"/products/{id:\d+}", self.product_get, name="products.get")
+        router.add_put(API + r"/products/{id:\d+}", self.product_update, name="products.update")
+        router.add_get(API + r"/products/{id:\d+}/variations", self.variations_list, name="variations.list")
+        router.add_post(API + r"/products/{id:\d+}/variations/batch", self.variations_batch, name="variations.batch")
+        router.add_get(API + r"/products/attributes/{id:\d+}/terms", self.terms_list, name="terms.list")
+        router.add_post(API + r"/products/attributes/{id:\d+}/terms", self.terms_create, name="terms.create")
+        router.add_post("/wp-json/wp/v2/media", self.media_upload, name="media.upload")
+        router.add_get(r"/wp-json/wp/v2/media/{id:\d+}", self.media_get, name="media.get")
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        route = request.match_info.route.name or "unknown"
+        self.requests[route] += 1
+        delay = self.route_latency.get(route, self.latency)
+        if delay:
+            await asyncio.sleep(max(0.0, delay * (1 + random.uniform(-self.jitter, self.jitter))))
+        if random.random() < self.route_error_rate.get(route, self.error_rate):
+            self.injected[f"{route}:500"] += 1
+            return web.json_response({"code": "internal_server_error", "message": "Injected error"}, status=500)
+        if random.random() < self.throttle_rate:
+            self.injected[f"{route}:429"] += 1
+            return web.json_response(
+                {"code": "too_many_requests", "message": "Injected throttle"}, status=429,
+                headers={"Retry-After": self.retry_after}
+            )
+        return await handler(request)
+
+    @staticmethod
+    def _page(items: list, request) -> web.Response:
+        per_page = int(request.query.get("per_page", 10))
+        page = int(request.query.get("page", 1))
+        total_pages = max(1, -(-len(items) // per_page))
+        fields = request.query.get("_fields")
+        chunk = items[(page - 1) * per_page:page * per_page]
+        if fields:
+            keys = fields.split(",")
+            chunk = [{key: item[key] for key in keys if key in item} for item in chunk]
+        return web.json_response(chunk, headers={"X-WP-Total": str(len(items)), "X-WP-TotalPages": str(total_pages)})
+
+    # --- محصولات ---
+
+    async def products_list(self, request):
+        items = list(self.products.values())
+        if "sku" in request.query:
+            skus = set(request.query["sku"].split(","))
+            items = [product for product in items if product.get("sku") in skus]
+        if "include" in request.query:
+            ids = {int(i) for i in request.query["include"].split(",") if i}
+            items = [product for product in items if product["id"] in ids]
+        if "modified_after" in request.query:
+            since = request.query["modified_after"]
+            items = [product for product in items if product["date_modified_gmt"] > since]
+        return self._page(items, request)
+
+    async def products_create(self, request):
+        data = await request.json()
+        if any(product.get("sku") == data.get("sku") for product in self.products.values()):
+            return web.json_response(
+                {"code": "product_invalid_sku", "message": "Invalid or duplicated SKU."}, status=400
+            )
+        return web.json_response(self._add_product(data), status=201)
+
+    async def product_get(self, request):
+        product = self.products.get(int(request.match_info["id"]))
+        if product is None:
+            return web.json_response({"code": "woocommerce_rest_product_invalid_id"}, status=404)
+        return web.json_response(product)
+
+    async def product_update(self, request):
+        product = self.products.get(int(request.match_info["id"]))
+        if product is None:
+            return web.json_response({"code": "woocommerce_rest_product_invalid_id"}, status=404)
+        product.update(await request.json(), date_modified_gmt=_now())
+        return web.json_response(product)
+
+    async def products_batch(self, request):
+        data = await request.json()
+        result = {"create": [], "update": [], "delete": []}
+        for item in data.get("create", []):
+            result["create"].append(self._add_product(item))
+        for item in data.get("update", []):
+            product = self.products.get(item.get("id"))
+            if product is None:
+                result["update"].append(_item_error(item.get("id")))
+                continue
+            product.update(item, date_modified_gmt=_now())
+            result["update"].append(product)
+        for product_id in data.get("delete", []):
+            product = self.products.pop(product_id, None)
+            result["delete"].append(product or _item_error(product_id))
+        return web.json_response(result)
+
+    # --- متغیرها ---
+
+    async def variations_list(self, request):
+        variations = self.variations.get(int(request.match_info["id"]))
+        if variations is None:
+            return web.json_response({"code": "woocommerce_rest_product_invalid_id"}, status=404)
+        return self._page(variations, request)
+
+    async def variations_batch(self, request):
+        product_id = int(request.match_info["id"])
+        if product_id not in self.variations:
+            return web.json_response({"code": "woocommerce_rest_product_invalid_id"}, status=404)
+        data = await request.json()
+        result = {"create": [], "update": [], "delete": []}
+        for item in data.get("create", []):
+            result["create"].append(self._add_variation(product_id, item))
+        by_id = {variation["id"]: variation for variation in self.variations[product_id]}
+        for item in data.get("update", []):
+            variation = by_id.get(item.get("id"))
+            if variation is None:
+                result["update"].append(_item_error(item.get("id")))
+                continue
+            variation.update(item)
+            result["update"].append(variation)
+        return web.json_response(result)
+
+    # --- ویژگی‌ها ---
+
+    async def terms_list(self, request):
+        return self._page(self.terms.setdefault(int(request.match_info["id"]), []), request)
+
+    async def terms_create(self, request):
+        data = await request.json()
+        terms = self.terms.setdefault(int(request.match_info["id"]), [])
+        if any(term["name"] == data["name"] for term in terms):
+            return web.json_response({"code": "term_exists", "message": "A term with the name provided already exists."}, status=400)
+        term = {"id": self._new_id(), "name": data["name"], "slug": data["name"]}
+        terms.append(term)
+        return web.json_response(term, status=201)
+
+    # --- مدیا ---
+
+    async def media_upload(self, request):
+        size = 0
+        async for chunk in request.content.iter_chunked(65536):
+            size += len(chunk)
+        if not size:
+            return web.json_response({"code": "rest_upload_no_data", "message": "No data supplied."}, status=400)
+        media_id = self._new_id()
+        self.media.add(media_id)
+        return web.json_response({"id": media_id, "media_details": {"filesize": size}}, status=201)
+
+    async def media_get(self, request):
+        media_id = int(request.match_info["id"])
+        if media_id not in self.media:
+            return web.json_response({"code": "rest_post_invalid_id"}, status=404)
+        return web.json_response({"id": media_id})
+
+def _item_error(item_id) -> dict:
+    return {"id": item_id, "error": {"code": "woocommerce_rest_invalid_id", "message": "Invalid ID."}}
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime())
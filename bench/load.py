@@ -0,0 +1,249 @@
+"""
+تست بار وب‌هوک: N اپراتور همزمان که ویزارد محصول را با مکث بین قدم‌ها و آپلود عکس
+طی می‌کنند و آپدیت‌هایشان به مسیر /webhook سرور main_webhook فرستاده می‌شود.
+
+بات، ووکامرس جایگزین و تلگرام جایگزین در همین پروسه اجرا می‌شوند، پس حافظه
+گزارش‌شده حافظه کل پروسه است. اجرا از ریشه پروژه:
+    python -m bench.load --users 1 10 25 50 --think-time 1.5
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+import aiohttp
+from aiohttp import web
+from bench.fake_telegram import FakeTelegram
+from bench.fake_woocommerce import FakeWooCommerce
+from bench.run import FIRST_USER_ID, configure_environment, git_revision, percentile
+from bench.scenarios import SCENARIOS, Operator, ScenarioError, update_ids
+
+def rss_mb() -> float:
+    """حافظه فعلی پروسه (RSS) به مگابایت؛ جایی که /proc نیست، بیشینه RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+class LevelStats:
+    """آمار یک سطح بار (یک مقدار N)."""
+
+    def __init__(self):
+        self.updates = 0
+        self.statuses = Counter()
+        self.reply_latencies = []
+        self.missing_replies = 0
+        self.completed = 0
+        self.errors = Counter()
+        self.max_in_progress = 0
+        self.max_outbox = 0
+
+class WebhookOperator(Operator):
+    """اپراتوری که آپدیت‌هایش را مثل تلگرام با POST به /webhook می‌فرستد و تا پاسخ بات صبر می‌کند."""
+
+    def __init__(self, telegram, user_id: int, session: aiohttp.ClientSession, url: str, secret: str,
+                 think_time: float, reply_timeout: float):
+        super().__init__(None, telegram, user_id)
+        self.session = session
+        self.url = url
+        self.secret = secret
+        self.think_time = think_time
+        self.reply_timeout = reply_timeout
+        self.stats = None
+
+    async def _process(self, payload: dict, reply: bool = True):
+        if self.think_time:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.think_time)
+        body = {"update_id": next(update_ids), **payload}
+        since = self.mark()
+        start = time.perf_counter()
+        while True:
+            async with self.session.post(
+                self.url, json=body, headers={"X-Telegram-Bot-Api-Secret-Token": self.secret}
+            ) as response:
+                status = response.status
+            self.stats.statuses[status] += 1
+            if status != 503:
+                break
+            # تلگرام آپدیت رد‌شده را کمی بعد دوباره می‌فرستد
+            await asyncio.sleep(1)
+        if status != 200:
+            raise ScenarioError(f"webhook returned {status}")
+        self.stats.updates += 1
+        if not reply:
+            return
+        try:
+            await self.telegram.wait_for_message(self.user_id, lambda _: True, since=since, timeout=self.reply_timeout)
+        except asyncio.TimeoutError as e:
+            self.stats.missing_replies += 1
+            raise ScenarioError("no reply from the bot") from e
+        self.stats.reply_latencies.append(time.perf_counter() - start)
+
+async def sample(stats: LevelStats, application, outbox):
+    """
+    نمونه‌برداری دوره‌ای از آپدیت‌های در حال اجرا یا منتظر و صف ساخت محصول در طول اجرای یک سطح.
+
+    صف آپدیت‌های Application معیار نیست: با concurrent_updates هر آپدیت فوراً از آن برداشته می‌شود.
+    """
+    while True:
+        stats.max_in_progress = max(stats.max_in_progress, application.update_processor.waiting())
+        stats.max_outbox = max(stats.max_outbox, outbox.depth())
+        await asyncio.sleep(0.05)
+
+async def run_level(users: int, operators: list, args, context: dict, application, outbox) -> dict:
+    """اجرای args.rounds بار سناریو برای هر کدام از users اپراتور اول، به‌طور همزمان."""
+    from utils.user_data import user_data
+
+    scenario = SCENARIOS[args.scenario]
+    stats = LevelStats()
+    for operator in operators:
+        operator.stats = stats
+
+    async def walk(operator: WebhookOperator):
+        for iteration in range(args.rounds):
+            try:
+                await scenario(operator, iteration, context)
+                stats.completed += 1
+            except Exception as e:
+                stats.errors[f"{type(e).__name__}: {e}"] += 1
+                await operator.send("/cancel", reply=False)
+
+    gc.collect()
+    rss_before = rss_mb()
+    sampler = asyncio.create_task(sample(stats, application, outbox))
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(walk(operator) for operator in operators[:users]))
+    finally:
+        sampler.cancel()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    rss_after = rss_mb()
+    return {
+        "users": users,
+        "duration_s": round(elapsed, 2),
+        "completed": stats.completed,
+        "errors": dict(stats.errors),
+        "updates": stats.updates,
+        "updates_per_s": round(stats.updates / elapsed, 2) if elapsed else 0,
+        "webhook_statuses": {str(status): count for status, count in sorted(stats.statuses.items())},
+        "missing_replies": stats.missing_replies,
+        "reply_p50_ms": round(percentile(stats.reply_latencies, 50) * 1000, 1),
+        "reply_p95_ms": round(percentile(stats.reply_latencies, 95) * 1000, 1),
+        "reply_p99_ms": round(percentile(stats.reply_latencies, 99) * 1000, 1),
+        "max_updates_in_progress": stats.max_in_progress,
+        "max_outbox_depth": stats.max_outbox,
+        "rss_mb": round(rss_after, 1),
+        "rss_growth_mb": round(rss_after - rss_before, 1),
+        "sessions": len(user_data.data)
+    }
+
+def print_report(levels: list):
+    print(
+        f"\n{'users':>6}{'done':>6}{'err':>5}{'upd/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'busy':>6}{'outbox':>7}{'503':>5}{'rss MB':>8}{'+MB':>7}"
+    )
+    for level in levels:
+        print(
+            f"{level['users']:>6}{level['completed']:>6}{sum(level['errors'].values()):>5}{level['updates_per_s']:>8}"
+            f"{level['reply_p50_ms']:>9}{level['reply_p95_ms']:>9}{level['reply_p99_ms']:>9}"
+            f"{level['max_updates_in_progress']:>6}{level['max_outbox_depth']:>7}"
+            f"{level['webhook_statuses'].get('503', 0):>5}{level['rss_mb']:>8}{level['rss_growth_mb']:>7}"
+        )
+        for error, count in level["errors"].items():
+            print(f"        {count} x {error}")
+
+async def main(args) -> int:
+    max_users = max(args.users)
+    woocommerce = FakeWooCommerce(latency=args.wc_latency, error_rate=args.error_rate)
+    woocommerce.seed(products=args.products)
+    telegram = FakeTelegram(latency=args.tg_latency, photo_size=args.photo_size)
+    wc_url = await woocommerce.start()
+    telegram_url = await telegram.start()
+    configure_environment(wc_url, max_users, TELEGRAM_API_URL=telegram_url, RENDER_EXTERNAL_HOSTNAME="bench.invalid")
+
+    import main_webhook
+    from utils.outbox import product_outbox
+
+    application = main_webhook.build_application()
+    runner = web.AppRunner(main_webhook.create_web_app(application), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    webhook_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/webhook"
+
+    context = {
+        "skus": [product["sku"] for product in woocommerce.products.values()],
+        "photo_size": args.photo_size,
+        "gallery_photos": args.gallery_photos,
+        "link_size": 4
+    }
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "args": vars(args)
+        },
+        "levels": []
+    }
+    session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0))
+    try:
+        operators = [
+            WebhookOperator(
+                telegram, FIRST_USER_ID + i, session, webhook_url, main_webhook.intake.secret_token,
+                args.think_time, args.reply_timeout
+            )
+            for i in range(max_users)
+        ]
+        for users in sorted(args.users):
+            print(f"running {users} users...", flush=True)
+            results["levels"].append(await run_level(users, operators, args, context, application, product_outbox))
+    finally:
+        await session.close()
+        await runner.cleanup()
+        await telegram.stop()
+        await woocommerce.stop()
+
+    print_report(results["levels"])
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nresults saved to {args.output}")
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test of the webhook entry point with simulated operators")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 10, 25], help="operator counts to run, one level each")
+    parser.add_argument("--rounds", type=int, default=1, help="wizards each operator completes per level")
+    parser.add_argument("--scenario", choices=list(SCENARIOS), default="create")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean pause between an operator's steps (s)")
+    parser.add_argument("--reply-timeout", type=float, default=60, help="seconds to wait for each bot reply")
+    parser.add_argument("--wc-latency", type=float, default=0.05, help="WooCommerce response latency (s)")
+    parser.add_argument("--tg-latency", type=float, default=0.03, help="Telegram Bot API latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of WooCommerce requests answered with 500")
+    parser.add_argument("--products", type=int, default=200, help="products seeded in the fake store")
+    parser.add_argument("--gallery-photos", type=int, default=3)
+    parser.add_argument("--photo-size", type=int, default=300 * 1024, help="bytes per photo")
+    parser.add_argument("--output", default=os.path.join("bench", "results", "load.json"))
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own logs")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if not arguments.verbose:
+        logging.disable(logging.CRITICAL)
+    sys.exit(asyncio.run(main(arguments)))
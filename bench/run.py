@@ -0,0 +1,268 @@
+"""
+بنچمارک end-to-end بات: گفتگوهای کامل (ساخت محصول، ویرایش قیمت/موجودی، لینک)
+از طریق get_conversation_handler() روی سرورهای جایگزین ووکامرس و تلگرام.
+
+اجرا از ریشه پروژه:
+    python -m bench.run --iterations 30 --wc-latency 0.05 --output bench/results/baseline.json
+    python -m bench.run --compare bench/results/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from bench.fake_telegram import FakeTelegram
+from bench.fake_woocommerce import FakeWooCommerce
+from bench.scenarios import SCENARIOS, Operator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOT_TOKEN = "123456:bench"
+FIRST_USER_ID = 700000
+
+def percentile(values: list, q: float) -> float:
+    """صدک q (بین 0 و 100) با درون‌یابی خطی."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def configure_environment(wc_url: str, users: int, **overrides):
+    """
+    تنظیم متغیرهای محیطی بات قبل از import شدن config.settings.
+
+    مسیرهای ذخیره روی دیسک خالی می‌شوند تا بنچمارک به داده‌های واقعی دست نزند.
+
+    Args:
+        wc_url (str): آدرس ووکامرس جایگزین
+        users (int): تعداد اپراتورها (آیدی‌ها از FIRST_USER_ID به بعد مجاز می‌شوند)
+        **overrides: متغیرهای محیطی اضافه
+    """
+    os.environ.update({
+        "TELEGRAM_TOKEN": BOT_TOKEN,
+        "WP_URL": wc_url,
+        "WP_CONSUMER_KEY": "ck_bench",
+        "WP_CONSUMER_SECRET": "cs_bench",
+        "WP_USERNAME": "bench",
+        "WP_PASSWORD": "bench",
+        "ALLOWED_USERS": ",".join(str(FIRST_USER_ID + i) for i in range(users)),
+        "PERSISTENCE_PATH": "",
+        "OUTBOX_PATH": "",
+        "SKU_INDEX_PATH": "",
+        "MEDIA_CACHE_PATH": "",
+        "TRACE_EXPORT_PATH": "",
+        "TRACE_OTLP_ENDPOINT": "",
+        "OUTBOX_WORKERS": str(max(2, users)),
+        # خطاهای تزریقی نباید بنچمارک را به انتظارهای طولانی retry بکشانند
+        "HTTP_BACKOFF_MAX": os.environ.get("HTTP_BACKOFF_MAX", "1"),
+        **overrides
+    })
+    if os.path.join(ROOT, "src") not in sys.path:
+        sys.path.insert(0, os.path.join(ROOT, "src"))
+
+async def build_application(telegram_url: str):
+    """ساخت Application با همان هندلرهای بات اصلی، متصل به Bot API جایگزین."""
+    from telegram.ext import Application
+    from handlers.common import error_handler
+    from handlers.conversation import get_conversation_handler
+    from utils.outbox import product_outbox
+    from utils.telegram_utils import InstrumentedRequest
+    from utils.woocommerce import wc_client
+
+    app = (
+        Application.builder().token(BOT_TOKEN).updater(None)
+        .base_url(f"{telegram_url}/bot").base_file_url(f"{telegram_url}/file/bot")
+        .request(InstrumentedRequest(connection_pool_size=256))
+        .build()
+    )
+    app.add_handler(get_conversation_handler())
+    app.add_error_handler(error_handler)
+    await app.initialize()
+    product_outbox.start(app.bot)
+    # با CATALOG_SYNC_INTERVAL، اندازه‌گیری بعد از بارگذاری کامل آینه کاتالوگ شروع می‌شود
+    wc_client.start_catalog_sync()
+    while wc_client.catalog.enabled and not wc_client.catalog.ready:
+        await asyncio.sleep(0.05)
+    return app
+
+async def shutdown_application(app):
+    from utils.http import http_pool
+    from utils.image_processing import image_processor
+    from utils.outbox import product_outbox
+    from utils.woocommerce import wc_client
+
+    await product_outbox.stop()
+    await wc_client.stop_catalog_sync()
+    await app.shutdown()
+    image_processor.shutdown()
+    await http_pool.close()
+
+async def run_scenario(name: str, app, woocommerce: FakeWooCommerce, telegram: FakeTelegram, args, context: dict) -> dict:
+    """
+    اجرای یک سناریو با args.iterations تکرار بین args.concurrency اپراتور همزمان.
+
+    Returns:
+        dict: صدک‌های زمان، تعداد خطا و میانگین درخواست‌های هر تکرار به هر مسیر
+    """
+    scenario = SCENARIOS[name]
+    operators = [Operator(app, telegram, FIRST_USER_ID + i) for i in range(args.concurrency)]
+    for operator in operators[:1]:
+        await scenario(operator, -1, context)  # گرم کردن کش‌ها و اتصال‌ها، خارج از اندازه‌گیری
+    woocommerce.reset_counters()
+    telegram.reset_counters()
+    timings = []
+    errors = Counter()
+    iterations = iter(range(args.iterations))
+
+    async def worker(operator: Operator):
+        for iteration in iterations:
+            start = time.perf_counter()
+            try:
+                await scenario(operator, iteration, context)
+            except Exception as e:
+                errors[f"{type(e).__name__}: {e}"] += 1
+                await operator.send("/cancel")
+                continue
+            timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(operator) for operator in operators))
+    elapsed = time.perf_counter() - start
+    runs = max(1, args.iterations)
+    return {
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "succeeded": len(timings),
+        "errors": dict(errors),
+        "throughput_per_s": round(len(timings) / elapsed, 2) if elapsed else 0,
+        "p50_ms": round(percentile(timings, 50) * 1000, 1),
+        "p95_ms": round(percentile(timings, 95) * 1000, 1),
+        "p99_ms": round(percentile(timings, 99) * 1000, 1),
+        "max_ms": round(max(timings, default=0) * 1000, 1),
+        "woocommerce_requests": {route: round(count / runs, 2) for route, count in sorted(woocommerce.requests.items())},
+        "woocommerce_injected_errors": dict(woocommerce.injected),
+        "telegram_requests": {method: round(count / runs, 2) for method, count in sorted(telegram.requests.items())}
+    }
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_report(results: dict):
+    print(f"\n{'scenario':<12}{'ok':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'wc req':>8}{'tg req':>8}")
+    for name, result in results["scenarios"].items():
+        print(
+            f"{name:<12}{result['succeeded']:>6}{sum(result['errors'].values()):>5}"
+            f"{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}"
+            f"{sum(result['woocommerce_requests'].values()):>8.1f}{sum(result['telegram_requests'].values()):>8.1f}"
+        )
+        for error, count in result["errors"].items():
+            print(f"    {count} x {error}")
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """
+    مقایسه با نتیجه ذخیره‌شده قبلی.
+
+    Returns:
+        bool: True اگه p95 هیچ سناریویی بیشتر از threshold درصد بدتر نشده باشد
+    """
+    print(f"\ncompared with {baseline['meta'].get('revision')} ({baseline['meta'].get('timestamp')}):")
+    ok = True
+    for name, result in results["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before:
+            continue
+        line = f"  {name:<12}"
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            change = (result[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            line += f"{key[:3]} {before[key]:>8} → {result[key]:<8} ({change:+.1f}%)  "
+            if key == "p95_ms" and change > threshold:
+                ok = False
+                line += "REGRESSION "
+        requests_before = sum(before["woocommerce_requests"].values())
+        requests_now = sum(result["woocommerce_requests"].values())
+        line += f"wc req {requests_before:.1f} → {requests_now:.1f}"
+        print(line)
+    return ok
+
+async def main(args) -> int:
+    woocommerce = FakeWooCommerce(
+        latency=args.wc_latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        route_latency={"media.upload": args.upload_latency} if args.upload_latency is not None else None
+    )
+    woocommerce.seed(products=args.products)
+    telegram = FakeTelegram(latency=args.tg_latency, photo_size=args.photo_size)
+    configure_environment(await woocommerce.start(), args.concurrency)
+    telegram_url = await telegram.start()
+    app = await build_application(telegram_url)
+    context = {
+        "skus": [product["sku"] for product in woocommerce.products.values()],
+        "photo_size": args.photo_size,
+        "gallery_photos": args.gallery_photos,
+        "link_size": args.link_size
+    }
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "args": vars(args)
+        },
+        "scenarios": {}
+    }
+    try:
+        for name in args.scenarios:
+            print(f"running {name}...", flush=True)
+            results["scenarios"][name] = await run_scenario(name, app, woocommerce, telegram, args, context)
+    finally:
+        await shutdown_application(app)
+        await telegram.stop()
+        await woocommerce.stop()
+
+    print_report(results)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nresults saved to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            if not compare(results, json.load(f), args.threshold):
+                return 1
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the bot conversations against local fakes")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=20, help="measured runs per scenario")
+    parser.add_argument("--concurrency", type=int, default=1, help="operators running the scenario at the same time")
+    parser.add_argument("--wc-latency", type=float, default=0.03, help="WooCommerce response latency (s)")
+    parser.add_argument("--upload-latency", type=float, default=None, help="media upload latency (s), defaults to --wc-latency")
+    parser.add_argument("--tg-latency", type=float, default=0.01, help="Telegram Bot API latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of WooCommerce requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of WooCommerce requests answered with 429")
+    parser.add_argument("--products", type=int, default=50, help="products seeded in the fake store")
+    parser.add_argument("--gallery-photos", type=int, default=2)
+    parser.add_argument("--photo-size", type=int, default=200 * 1024, help="bytes per photo")
+    parser.add_argument("--link-size", type=int, default=4, help="products linked per link run")
+    parser.add_argument("--output", default=os.path.join("bench", "results", "latest.json"))
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=20, help="allowed p95 slowdown in percent with --compare")
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own logs")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if not arguments.verbose:
+        logging.disable(logging.CRITICAL)
+    sys.exit(asyncio.run(main(arguments)))
@@ -0,0 +1,161 @@
+import asyncio
+import itertools
+import random
+import time
+from telegram import Update
+
+# شماره آپدیت‌ها بین همه اپراتورها یکتاست
+update_ids = itertools.count(1)
+
+class ScenarioError(Exception):
+    """گفتگو به پاسخ مورد انتظار نرسید."""
+
+class Operator:
+    """
+    یک اپراتور شبیه‌سازی‌شده که آپدیت‌های تلگرام را مستقیم به Application می‌دهد.
+
+    هر اپراتور چت خصوصی خودش را دارد، پس چند اپراتور می‌توانند همزمان گفتگو کنند.
+    """
+
+    def __init__(self, app, telegram, user_id: int):
+        """
+        Args:
+            app (telegram.ext.Application): اپلیکیشن بات با ConversationHandler اصلی
+            telegram (FakeTelegram): سرور جایگزین Bot API برای خواندن پاسخ‌های بات
+            user_id (int): آیدی کاربر (باید در ALLOWED_USERS باشد)
+        """
+        self.app = app
+        self.telegram = telegram
+        self.user_id = user_id
+
+    @property
+    def _user(self) -> dict:
+        return {"id": self.user_id, "is_bot": False, "first_name": "Bench"}
+
+    @property
+    def _chat(self) -> dict:
+        return {"id": self.user_id, "type": "private"}
+
+    def _last_bot_message_id(self) -> int:
+        messages = self.telegram.messages[self.user_id]
+        return messages[-1]["message_id"] if messages else 1
+
+    async def _process(self, payload: dict, reply: bool = True):
+        """
+        تحویل یک آپدیت به بات.
+
+        Args:
+            payload (dict): بدنه آپدیت بدون update_id
+            reply (bool): آیا بات به این آپدیت پاسخ می‌دهد (برای اندازه‌گیری تأخیر پاسخ در زیرکلاس‌ها)
+        """
+        update = Update.de_json({"update_id": next(update_ids), **payload}, self.app.bot)
+        await self.app.process_update(update)
+
+    def _message(self, **fields) -> dict:
+        return {"message_id": next(update_ids), "date": int(time.time()), "chat": self._chat, "from": self._user, **fields}
+
+    async def send(self, text: str, reply: bool = True):
+        """ارسال پیام متنی (متن‌هایی که با / شروع شوند دستور حساب می‌شوند)."""
+        fields = {"text": text}
+        if text.startswith("/"):
+            fields["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        await self._process({"message": self._message(**fields)}, reply)
+
+    async def send_photo(self, file_id: str, size: int, reply: bool = True):
+        """ارسال عکس با یک file_id که فقط در همین اجرا استفاده شده."""
+        photo = [{"file_id": file_id, "file_unique_id": f"u-{file_id}", "width": 1280, "height": 1280, "file_size": size}]
+        await self._process({"message": self._message(photo=photo)}, reply)
+
+    async def press(self, data: str, reply: bool = True):
+        """زدن دکمه اینلاین روی آخرین پیام بات."""
+        await self._process({"callback_query": {
+            "id": str(next(update_ids)),
+            "from": self._user,
+            "chat_instance": str(self.user_id),
+            "data": data,
+            "message": {
+                "message_id": self._last_bot_message_id(), "date": int(time.time()),
+                "chat": self._chat, "text": "..."
+            }
+        }}, reply)
+
+    def mark(self) -> int:
+        """اندیس پیام بعدی بات در این چت، برای صبر کردن فقط روی پاسخ‌های بعد از این لحظه."""
+        return len(self.telegram.messages[self.user_id])
+
+    async def expect(self, since: int, text: str, timeout: float = 60):
+        """
+        صبر برای پاسخ بات که شامل text باشد.
+
+        Raises:
+            ScenarioError: اگه پاسخ خطا (❌ یا ⚠️) زودتر برسد یا timeout تمام شود
+        """
+        def matches(message: str) -> bool:
+            return text in message or message.startswith(("❌", "⚠️"))
+        try:
+            message = await self.telegram.wait_for_message(self.user_id, matches, since=since, timeout=timeout)
+        except asyncio.TimeoutError as e:
+            raise ScenarioError(f"no reply containing {text!r}") from e
+        if text not in message["text"]:
+            raise ScenarioError(message["text"].splitlines()[0])
+
+# --- سناریوها: هر کدام یک گفتگوی کامل از اول تا پاسخ نهایی بات ---
+
+async def create_product(operator: Operator, iteration: int, context: dict):
+    """ساخت محصول کامل با عکس شاخص، دو عکس گالری و صبر تا نتیجه صف ساخت."""
+    tag = f"{operator.user_id}-{iteration}-{random.randrange(1 << 30)}"
+    await operator.send("/start")
+    await operator.press("create_product")
+    await operator.send(f"Bench shoe {tag}")
+    await operator.send("Benchmark product description")
+    await operator.send_photo(f"main-{tag}", context["photo_size"])
+    for index in range(context["gallery_photos"]):
+        # فقط اولین عکس گالری پاسخ می‌گیرد
+        await operator.send_photo(f"gallery-{index}-{tag}", context["photo_size"], reply=index == 0)
+    await operator.send("/done")
+    await operator.send("40,41,42,43")
+    await operator.press("color_color-0")
+    await operator.press("upper_upper-0")
+    await operator.press("sole_sole-0")
+    await operator.press("usage_none")
+    await operator.send(f"NEW-{tag}")
+    await operator.send("565000")
+    await operator.send("/skip")
+    await operator.send("Bench")
+    since = operator.mark()
+    await operator.send("/confirm")
+    await operator.expect(since, "محصول با موفقیت ساخته شد")
+
+async def edit_price(operator: Operator, iteration: int, context: dict):
+    """ویرایش قیمت یک محصول موجود و همه متغیرهایش."""
+    await operator.send("/update")
+    await operator.send(random.choice(context["skus"]))
+    await operator.press("edit_price")
+    since = operator.mark()
+    await operator.send(str(500000 + iteration * 1000))
+    await operator.expect(since, "قیمت محصول و متغیرهای آن با موفقیت")
+
+async def edit_stock(operator: Operator, iteration: int, context: dict):
+    """ویرایش یکنواخت موجودی متغیرهای یک محصول موجود."""
+    await operator.send("/update")
+    await operator.send(random.choice(context["skus"]))
+    await operator.press("edit_stock")
+    await operator.press("stock_uniform")
+    since = operator.mark()
+    await operator.send(str(iteration % 7))
+    await operator.expect(since, "موجودی همه متغیرها با موفقیت")
+
+async def link_products(operator: Operator, iteration: int, context: dict):
+    """لینک کردن چند محصول موجود با Cross-Sells."""
+    skus = random.sample(context["skus"], min(context["link_size"], len(context["skus"])))
+    await operator.send("/link")
+    since = operator.mark()
+    await operator.send(",".join(skus))
+    await operator.expect(since, "با موفقیت به هم لینک شدن")
+
+SCENARIOS = {
+    "create": create_product,
+    "edit_price": edit_price,
+    "edit_stock": edit_stock,
+    "link": link_products
+}
@@ -5,4 +5,13 @@
     EDIT_STOCK_UNIFORM, EDIT_STOCK_ARRAY, LINK_PRODUCTS
 ) = range(22)
 
-# سایر ثابت‌ها (در صورت نیاز بعداً اضافه می‌کنیم)
\ No newline at end of file
+# سایر ثابت‌ها (در صورت نیاز بعداً اضافه می‌کنیم)
+
+# حداکثر تعداد آیتم در هر درخواست batch ووکامرس
+WC_BATCH_LIMIT = 100
+
+# تعداد آیتم در هر صفحه برای endpointهای لیستی ووکامرس (حداکثر مجاز 100)
+WC_PER_PAGE = 100
+
+# همپوشانی هر همگام‌سازی آینه کاتالوگ با قبلی (ثانیه)، برای پوشاندن اختلاف ساعت با سرور فروشگاه
+CATALOG_SYNC_OVERLAP = 120
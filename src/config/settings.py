@@ -17,6 +17,99 @@ PORT = int(os.getenv("PORT", 8443))
 RENDER_EXTERNAL_HOSTNAME = os.getenv("RENDER_EXTERNAL_HOSTNAME")
 WEBHOOK_URL = f"https://{RENDER_EXTERNAL_HOSTNAME}/webhook" if RENDER_EXTERNAL_HOSTNAME else None
 ALLOWED_USERS = os.getenv("ALLOWED_USERS", "").split(",")
+# آدرس Bot API تلگرام (برای سرور Bot API محلی یا جایگزین تست بار)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+
+# تنظیمات pool اتصال HTTP به ووکامرس/وردپرس
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", 20))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", 8))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 30))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 60))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", 0.5))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", 8))
+
+# وب‌هوک: secret token (خالی یعنی ساخته شدن از توکن بات)، سقف آپدیت‌های پذیرفته‌شده و تمام‌نشده و اندازه بافر تشخیص تکراری‌ها
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", 200))
+WEBHOOK_DEDUP_SIZE = int(os.getenv("WEBHOOK_DEDUP_SIZE", 2048))
+
+# حداکثر تعداد آپدیت‌های تلگرام که همزمان پردازش می‌شوند (آپدیت‌های هر کاربر همیشه به ترتیب اجرا می‌شوند)
+MAX_CONCURRENT_UPDATES = int(os.getenv("MAX_CONCURRENT_UPDATES", 8))
+
+# محافظت از ووکامرس: نرخ ثابت مجاز درخواست در ثانیه (0 یعنی خاموش؛ سقف همزمانی با 429 خودش کم می‌شود)
+# و حجم burst، سقف همزمانی، و تعداد خطای پشت سر هم که مدار را باز می‌کند و مدت باز ماندن آن (ثانیه)
+WC_RATE_LIMIT = float(os.getenv("WC_RATE_LIMIT", 0))
+WC_RATE_BURST = int(os.getenv("WC_RATE_BURST", 20))
+WC_MAX_CONCURRENCY = int(os.getenv("WC_MAX_CONCURRENCY", 8))
+WC_BREAKER_THRESHOLD = int(os.getenv("WC_BREAKER_THRESHOLD", 5))
+WC_BREAKER_RESET = float(os.getenv("WC_BREAKER_RESET", 30))
+
+# مدت اعتبار کش مقادیر ویژگی‌ها و مدتی که بعد از انقضا هنوز موقتاً استفاده می‌شوند (ثانیه)
+ATTRIBUTE_TERMS_TTL = float(os.getenv("ATTRIBUTE_TERMS_TTL", 600))
+ATTRIBUTE_TERMS_STALE_TTL = float(os.getenv("ATTRIBUTE_TERMS_STALE_TTL", 86400))
+
+# ایندکس SKU: مدت اعتبار هر ورودی (ثانیه) و مسیر اختیاری فایل ذخیره روی دیسک
+SKU_INDEX_TTL = float(os.getenv("SKU_INDEX_TTL", 3600))
+SKU_INDEX_PATH = os.getenv("SKU_INDEX_PATH")
+
+# آینه محلی کاتالوگ: فاصله همگام‌سازی با modified_after (ثانیه، 0 یعنی خاموش) و مسیر اختیاری
+# فایل SQLite (خالی یعنی فقط در حافظه و بارگذاری کامل در هر اجرا)
+CATALOG_SYNC_INTERVAL = float(os.getenv("CATALOG_SYNC_INTERVAL", 0))
+CATALOG_PATH = os.getenv("CATALOG_PATH")
+
+# کلید مشترک وب‌هوک‌های محصول ووکامرس (امضای X-WC-Webhook-Signature)؛ خالی یعنی endpoint غیرفعال
+WC_WEBHOOK_SECRET = os.getenv("WC_WEBHOOK_SECRET")
+
+# حداکثر تعداد آپلود همزمان عکس برای هر کاربر
+MEDIA_UPLOAD_CONCURRENCY = int(os.getenv("MEDIA_UPLOAD_CONCURRENCY", 4))
+
+# آپلود stream عکس از تلگرام به وردپرس (وقتی پردازش عکس خاموش است) و اندازه هر تکه
+MEDIA_STREAM_UPLOADS = os.getenv("MEDIA_STREAM_UPLOADS", "true").lower() in ("1", "true", "yes")
+MEDIA_STREAM_CHUNK_SIZE = int(os.getenv("MEDIA_STREAM_CHUNK_SIZE", 64 * 1024))
+
+# مدت انتظار برای رسیدن بقیه عکس‌های یک آلبوم تلگرام (ثانیه)
+ALBUM_WINDOW = float(os.getenv("ALBUM_WINDOW", 1.0))
+
+# سشن کاربران: مدت انقضا بعد از آخرین استفاده (ثانیه) و حداکثر تعداد سشن در حافظه
+SESSION_TTL = float(os.getenv("SESSION_TTL", 6 * 3600))
+SESSION_MAX = int(os.getenv("SESSION_MAX", 1000))
+
+# ذخیره پایدار وضعیت گفتگوها و سشن‌ها در SQLite (خالی یعنی فقط در حافظه) و فاصله نوشتن (ثانیه)
+PERSISTENCE_PATH = os.getenv("PERSISTENCE_PATH")
+PERSISTENCE_INTERVAL = float(os.getenv("PERSISTENCE_INTERVAL", 30))
+
+# صف پایدار ساخت محصول: مسیر فایل SQLite (خالی یعنی فقط در حافظه)، تعداد worker،
+# حداکثر تلاش برای خطاهای شبکه و مهلت تمام شدن کارهای در حال اجرا هنگام خاموش شدن (ثانیه)
+OUTBOX_PATH = os.getenv("OUTBOX_PATH")
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", 2))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+OUTBOX_DRAIN_TIMEOUT = float(os.getenv("OUTBOX_DRAIN_TIMEOUT", 30))
+
+# tracing هر آپدیت: نسبت آپدیت‌های نمونه‌برداری‌شده (0 یعنی خاموش)، فایل JSONL و/یا آدرس
+# collector سازگار با OTLP/HTTP (مثلاً http://localhost:4318/v1/traces) و فاصله ارسال (ثانیه)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT")
+TRACE_FLUSH_INTERVAL = float(os.getenv("TRACE_FLUSH_INTERVAL", 5))
+
+# پروفایل به درخواست ادمین (/profile و /debug/profile): مدت پیش‌فرض و حداکثر (ثانیه) و توکن
+# لازم برای endpoint وب (خالی یعنی endpoint خاموش است)
+PROFILE_DEFAULT_DURATION = float(os.getenv("PROFILE_DEFAULT_DURATION", 30))
+PROFILE_MAX_DURATION = float(os.getenv("PROFILE_MAX_DURATION", 300))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+
+# پردازش اختیاری عکس‌ها قبل از آپلود (نیاز به Pillow)
+IMAGE_NORMALIZE = os.getenv("IMAGE_NORMALIZE", "false").lower() in ("1", "true", "yes")
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", 1600))
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", 82))
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "JPEG")
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+
+# کش آپلود عکس‌ها: مسیر اختیاری فایل، سقف تعداد کلیدها و فاصله بررسی وجود مدیا در وردپرس (ثانیه)
+MEDIA_CACHE_PATH = os.getenv("MEDIA_CACHE_PATH")
+MEDIA_CACHE_MAX_ENTRIES = int(os.getenv("MEDIA_CACHE_MAX_ENTRIES", 5000))
+MEDIA_CACHE_VERIFY_AFTER = float(os.getenv("MEDIA_CACHE_VERIFY_AFTER", 86400))
 
 # تنظیم لاگینگ
 def setup_logging():
@@ -0,0 +1,41 @@
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+from config.settings import PROFILE_DEFAULT_DURATION, logger
+from utils.auth import check_user_access
+from utils.profiler import profiler, ProfilerBusyError
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    /profile [sample|cpu|memory] [ثانیه]: پروفایل بات برای مدت محدود و ارسال گزارش به‌صورت فایل.
+
+    این هندلر در گروه جدا و قبل از گفتگو ثبت می‌شود تا وسط یک ویزارد هم کار کند و
+    دستور به گفتگو نرسد. پروفایل در پس‌زمینه اجرا می‌شود تا آپدیت‌های بعدی همین چت منتظر نمانند.
+    """
+    user_id = str(update.message.from_user.id)
+    if not check_user_access(user_id):
+        await update.message.reply_text("⛔ شما دسترسی ندارید! با مدیر تماس بگیرید.")
+        raise ApplicationHandlerStop
+    args = context.args or []
+    mode = args[0] if args else "sample"
+    try:
+        seconds = float(args[1]) if len(args) > 1 else PROFILE_DEFAULT_DURATION
+    except ValueError:
+        seconds = None
+    if mode not in profiler.MODES or seconds is None:
+        await update.message.reply_text(f"⚠️ استفاده: /profile [{'|'.join(profiler.MODES)}] [ثانیه]")
+    elif profiler.running:
+        await update.message.reply_text(str(ProfilerBusyError()))
+    else:
+        await update.message.reply_text(f"🔬 پروفایل {mode} شروع شد (حداکثر {min(seconds, profiler.max_duration):.0f} ثانیه)...")
+        context.application.create_task(_send_profile(context, update.effective_chat.id, mode, seconds))
+    raise ApplicationHandlerStop
+
+async def _send_profile(context: ContextTypes.DEFAULT_TYPE, chat_id: int, mode: str, seconds: float):
+    try:
+        filename, report, summary = await profiler.profile(mode, seconds)
+        await context.bot.send_document(chat_id=chat_id, document=report, filename=filename, caption=summary)
+    except ProfilerBusyError as e:
+        await context.bot.send_message(chat_id=chat_id, text=str(e))
+    except Exception as e:
+        logger.error(f"Profiling failed: {str(e)}")
+        await context.bot.send_message(chat_id=chat_id, text=f"❌ خطا در پروفایل: {str(e)}")
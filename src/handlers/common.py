@@ -5,6 +5,8 @@ from config.settings import logger
 from config.constants import MENU, TITLE, EDIT_SKU, LINK_PRODUCTS
 from utils.auth import check_user_access
 from utils.user_data import user_data
+from utils.media_pipeline import media_pipeline
+from utils.resilience import StoreUnavailableError
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = str(update.message.from_user.id)
@@ -28,6 +30,7 @@ async def menu_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     data = query.data
 
     if data == "create_product":
+        media_pipeline.discard(user_id, cancel=True)
         user_data.set(user_id, "gallery_image_ids", [])
         user_data.set(user_id, "gallery_file_ids", [])
         await query.message.edit_text("عنوان محصول رو بنویس: ✏️")
@@ -54,14 +57,24 @@ async def menu_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = str(update.message.from_user.id)
+    media_pipeline.discard(user_id, cancel=True)
     user_data.clear(user_id)
     await update.message.reply_text("لغو شد! ❌ برای شروع دوباره، /start رو بزن.")
     return ConversationHandler.END
 
+async def session_expired(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """پایان گفتگویی که سشنش منقضی یا حذف شده (مثلاً اپراتور بعد از SESSION_TTL برگشته)."""
+    await update.effective_message.reply_text("⌛ اطلاعات این مرحله منقضی شده! برای شروع دوباره، /start رو بزن.")
+    return ConversationHandler.END
+
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.error(f"Error occurred: {context.error}", exc_info=True)
     if update and update.message and update.message.from_user:
-        await update.message.reply_text("یه خطا پیش اومد! ⚠️ لطفاً دوباره امتحان کن یا با مدیر تماس بگیر.")
+        if isinstance(context.error, StoreUnavailableError):
+            # پیام این خطا از قبل برای اپراتور نوشته شده
+            await update.message.reply_text(str(context.error))
+        else:
+            await update.message.reply_text("یه خطا پیش اومد! ⚠️ لطفاً دوباره امتحان کن یا با مدیر تماس بگیر.")
     else:
         logger.warning("No message available to send error response.")
 
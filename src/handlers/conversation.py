@@ -0,0 +1,105 @@
+import functools
+from telegram.ext import CommandHandler, CallbackQueryHandler, MessageHandler, filters, ConversationHandler
+from config.settings import PERSISTENCE_PATH
+from config.constants import (
+    MENU, TITLE, DESCRIPTION, MAIN_IMAGE, GALLERY_IMAGES, SIZES, COLOR, UPPER, SOLE, USAGE,
+    SKU, PRICE, TAGS, BRAND, CONFIRM, EDIT_SKU, EDIT_CHOICE, EDIT_PRICE, EDIT_STOCK_MODE,
+    EDIT_STOCK_UNIFORM, EDIT_STOCK_ARRAY, LINK_PRODUCTS
+)
+from handlers.common import start, cancel, help_command, menu_handler, session_expired
+from handlers.product_create import (
+    get_title, get_description, get_main_image, get_gallery_images, get_sizes, get_color, get_color_text,
+    get_upper, get_upper_text, get_sole, get_sole_text, get_usage, get_usage_text, get_sku,
+    get_price, get_tags, get_brand, confirm
+)
+from handlers.product_edit import (
+    edit_start, edit_sku, edit_choice, edit_price, edit_stock_mode, edit_stock_uniform, edit_stock_array
+)
+from handlers.product_link import link_products_start, link_products
+from utils.metrics import timed_callback
+from utils.user_data import user_data
+
+# قدم‌هایی که از سشن چیزی نمی‌خوانند (سشن کاربر در آن‌ها ممکن است هنوز ساخته نشده باشد)
+SESSIONLESS_STATES = (MENU, EDIT_SKU, LINK_PRODUCTS)
+
+def _requires_session(callback):
+    """
+    پوشاندن callback یک قدم ویزارد تا اگه سشن کاربر منقضی یا حذف شده باشد، قبل از اجرای
+    قدم به او گفته شود و گفتگو تمام شود.
+
+    انقضا هنگام دسترسی به user_data بررسی می‌شود، پس این بررسی باید قبل از خود قدم انجام
+    شود؛ وگرنه قدم با سشن خالی ادامه می‌دهد و state برگشتی‌اش گفتگو را زنده نگه می‌دارد.
+    سشنی که با دسترسی کاربر دیگری حذف شده هم در اولین آپدیت بعدی همین کاربر اعلام می‌شود.
+    """
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        if update.effective_user and not user_data.has(str(update.effective_user.id)):
+            if update.callback_query:
+                await update.callback_query.answer()
+            return await session_expired(update, context)
+        return await callback(update, context)
+    return wrapper
+
+def get_conversation_handler() -> ConversationHandler:
+    """ساخت ConversationHandler اصلی بات با ثبت مدت اجرای هر هندلر در متریک‌ها."""
+    conversation = ConversationHandler(
+        entry_points=[
+            CommandHandler("start", start),
+            CommandHandler("create", get_title),
+            CommandHandler("update", edit_start),
+            CommandHandler("link", link_products_start),
+            CommandHandler("help", help_command)
+        ],
+        states={
+            MENU: [CallbackQueryHandler(menu_handler, pattern='^(create_product|edit_product|link_products|show_help)$')],
+            TITLE: [MessageHandler(filters.Text() & ~filters.Command(), get_title)],
+            DESCRIPTION: [MessageHandler(filters.Text() & ~filters.Command(), get_description)],
+            MAIN_IMAGE: [MessageHandler(filters.PHOTO, get_main_image)],
+            GALLERY_IMAGES: [MessageHandler(filters.PHOTO | filters.Regex('^/done$'), get_gallery_images)],
+            SIZES: [MessageHandler(filters.Text() & ~filters.Command(), get_sizes)],
+            COLOR: [
+                CallbackQueryHandler(get_color, pattern='^color_'),
+                MessageHandler(filters.Text() & ~filters.Command(), get_color_text)
+            ],
+            UPPER: [
+                CallbackQueryHandler(get_upper, pattern='^upper_'),
+                MessageHandler(filters.Text() & ~filters.Command(), get_upper_text)
+            ],
+            SOLE: [
+                CallbackQueryHandler(get_sole, pattern='^sole_'),
+                MessageHandler(filters.Text() & ~filters.Command(), get_sole_text)
+            ],
+            USAGE: [
+                CallbackQueryHandler(get_usage, pattern='^usage_'),
+                MessageHandler(filters.Text() & ~filters.Command(), get_usage_text)
+            ],
+            SKU: [MessageHandler(filters.Text() & ~filters.Command(), get_sku)],
+            PRICE: [MessageHandler(filters.Text() & ~filters.Command(), get_price)],
+            TAGS: [MessageHandler(filters.Text() | filters.Command(), get_tags)],
+            BRAND: [MessageHandler(filters.Text() & ~filters.Command(), get_brand)],
+            CONFIRM: [
+                CommandHandler("confirm", confirm),
+                CommandHandler("cancel", cancel)
+            ],
+            EDIT_SKU: [MessageHandler(filters.Text() & ~filters.Command(), edit_sku)],
+            EDIT_CHOICE: [CallbackQueryHandler(edit_choice, pattern='^edit_')],
+            EDIT_PRICE: [MessageHandler(filters.Text() & ~filters.Command(), edit_price)],
+            EDIT_STOCK_MODE: [CallbackQueryHandler(edit_stock_mode, pattern='^stock_')],
+            EDIT_STOCK_UNIFORM: [MessageHandler(filters.Text() & ~filters.Command(), edit_stock_uniform)],
+            EDIT_STOCK_ARRAY: [MessageHandler(filters.Text() & ~filters.Command(), edit_stock_array)],
+            LINK_PRODUCTS: [MessageHandler(filters.Text() & ~filters.Command(), link_products)]
+        },
+        fallbacks=[CommandHandler("cancel", cancel)],
+        per_message=False,
+        name="product_conversation",
+        persistent=bool(PERSISTENCE_PATH)
+    )
+    for state, handlers in conversation.states.items():
+        if state not in SESSIONLESS_STATES:
+            for handler in handlers:
+                handler.callback = _requires_session(handler.callback)
+    for handler in conversation.entry_points + conversation.fallbacks + [
+        handler for handlers in conversation.states.values() for handler in handlers
+    ]:
+        handler.callback = timed_callback(handler.callback)
+    return conversation
@@ -7,6 +7,10 @@ from config.constants import (
 from utils.user_data import user_data
 from utils.telegram_utils import send_message_with_keyboard, delete_previous_message
 from utils.woocommerce import wc_client
+from utils.media_pipeline import media_pipeline
+from utils.album import album_collector
+from utils.outbox import product_outbox
+from handlers.common import session_expired
 
 async def get_title(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """گرفتن عنوان محصول."""
@@ -26,29 +30,38 @@ async def get_main_image(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     """گرفتن عکس شاخص محصول."""
     user_id = str(update.message.from_user.id)
     photo = update.message.photo[-1]
-    file = await photo.get_file()
-    image_data = await file.download_as_bytearray()
-    media_id = wc_client.upload_image(image_data, f"main_{photo.file_id}.jpg")
-    user_data.set(user_id, "main_image_id", media_id)
+    # آپلود در پس‌زمینه انجام می‌شود و فقط در /confirm منتظرش می‌مانیم
+    media_pipeline.submit(user_id, "main", photo, f"main_{photo.file_id}.jpg")
     user_data.set(user_id, "gallery_message_sent", False)
+    # مسیر /create از منو نمی‌گذرد و لیست گالری را نساخته
+    user_data.set(user_id, "gallery_file_ids", [])
     await update.message.reply_text("📸 عکس‌های گالری محصول رو آپلود کن (برای اتمام، /done رو بنویس):")
     return GALLERY_IMAGES
 
 async def get_gallery_images(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """گرفتن عکس‌های گالری محصول."""
     user_id = str(update.message.from_user.id)
+    gallery_file_ids = user_data.get(user_id, "gallery_file_ids")
+    if gallery_file_ids is None:
+        return await session_expired(update, context)
     if update.message.text == "/done":
         await update.message.reply_text("📏 سایزهای محصول رو با کاما جدا کن (مثلاً 41,42,43):")
         return SIZES
     photo = update.message.photo[-1]
     file_id = photo.file_id
-    if file_id not in user_data.get(user_id, "gallery_file_ids"):
-        file = await photo.get_file()
-        image_data = await file.download_as_bytearray()
-        media_id = wc_client.upload_image(image_data, f"gallery_{file_id}.jpg")
-        user_data.get(user_id, "gallery_image_ids").append(media_id)
-        user_data.get(user_id, "gallery_file_ids").append(file_id)
-    if not user_data.get(user_id, "gallery_message_sent"):
+    if file_id not in gallery_file_ids:
+        media_pipeline.submit(user_id, file_id, photo, f"gallery_{file_id}.jpg")
+        gallery_file_ids.append(file_id)
+    if update.message.media_group_id:
+        # برای آلبوم فقط یک پیام بعد از رسیدن همه عکس‌ها فرستاده می‌شود
+        user_data.set(user_id, "gallery_message_sent", True)
+        message = update.message
+
+        async def acknowledge_album(count: int):
+            await message.reply_text(f"📸 {count} عکس از آلبوم دریافت شد. عکس بعدی رو آپلود کن یا /done رو بنویس:")
+
+        album_collector.add(update.message.media_group_id, acknowledge_album)
+    elif not user_data.get(user_id, "gallery_message_sent"):
         user_data.set(user_id, "gallery_message_sent", True)
         await update.message.reply_text("📸 عکس بعدی رو آپلود کن یا /done رو بنویس:")
     return GALLERY_IMAGES
@@ -57,7 +70,7 @@ async def get_sizes(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """گرفتن سایزهای محصول."""
     user_id = str(update.message.from_user.id)
     user_data.set(user_id, "sizes", update.message.text)
-    colors = wc_client.get_attribute_terms(1)
+    colors = await wc_client.get_attribute_terms(1)
     keyboard = [[InlineKeyboardButton(c["name"], callback_data=f"color_{c['name']}")] for c in colors]
     keyboard.append([InlineKeyboardButton("اضافه کردن رنگ جدید", callback_data="color_new")])
     message_id = await send_message_with_keyboard(update, "🎨 رنگ محصول رو انتخاب کن:", keyboard, context)
@@ -76,7 +89,7 @@ async def get_color(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         return COLOR
     color = data.replace("color_", "")
     user_data.set(user_id, "color", color)
-    uppers = wc_client.get_attribute_terms(4)
+    uppers = await wc_client.get_attribute_terms(4)
     keyboard = [[InlineKeyboardButton(u["name"], callback_data=f"upper_{u['name']}")] for u in uppers]
     keyboard.append([InlineKeyboardButton("اضافه کردن جنس رویه جدید", callback_data="upper_new")])
     await delete_previous_message(context, query.message.chat_id, user_data.get(user_id, "color_message_id"))
@@ -88,9 +101,9 @@ async def get_color_text(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     """گرفتن رنگ جدید."""
     user_id = str(update.message.from_user.id)
     color = update.message.text
-    new_color = wc_client.add_attribute_term(1, color)
+    new_color = await wc_client.add_attribute_term(1, color)
     user_data.set(user_id, "color", new_color or color)
-    uppers = wc_client.get_attribute_terms(4)
+    uppers = await wc_client.get_attribute_terms(4)
     keyboard = [[InlineKeyboardButton(u["name"], callback_data=f"upper_{u['name']}")] for u in uppers]
     keyboard.append([InlineKeyboardButton("اضافه کردن جنس رویه جدید", callback_data="upper_new")])
     await delete_previous_message(context, update.message.chat_id, user_data.get(user_id, "color_message_id"))
@@ -111,7 +124,7 @@ async def get_upper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         return UPPER
     upper = data.replace("upper_", "")
     user_data.set(user_id, "upper", upper)
-    soles = wc_client.get_attribute_terms(5)
+    soles = await wc_client.get_attribute_terms(5)
     keyboard = [[InlineKeyboardButton(s["name"], callback_data=f"sole_{s['name']}")] for s in soles]
     keyboard.append([InlineKeyboardButton("اضافه کردن جنس زیره جدید", callback_data="sole_new")])
     await delete_previous_message(context, query.message.chat_id, user_data.get(user_id, "upper_message_id"))
@@ -123,9 +136,9 @@ async def get_upper_text(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     """گرفتن جنس رویه جدید."""
     user_id = str(update.message.from_user.id)
     upper = update.message.text
-    new_upper = wc_client.add_attribute_term(4, upper)
+    new_upper = await wc_client.add_attribute_term(4, upper)
     user_data.set(user_id, "upper", new_upper or upper)
-    soles = wc_client.get_attribute_terms(5)
+    soles = await wc_client.get_attribute_terms(5)
     keyboard = [[InlineKeyboardButton(s["name"], callback_data=f"sole_{s['name']}")] for s in soles]
     keyboard.append([InlineKeyboardButton("اضافه کردن جنس زیره جدید", callback_data="sole_new")])
     await delete_previous_message(context, update.message.chat_id, user_data.get(user_id, "upper_message_id"))
@@ -146,7 +159,7 @@ async def get_sole(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         return SOLE
     sole = data.replace("sole_", "")
     user_data.set(user_id, "sole", sole)
-    usages = wc_client.get_attribute_terms(6)
+    usages = await wc_client.get_attribute_terms(6)
     keyboard = [[InlineKeyboardButton(u["name"], callback_data=f"usage_{u['name']}")] for u in usages]
     keyboard.extend([
         [InlineKeyboardButton("اضافه کردن کاربرد جدید", callback_data="usage_new")],
@@ -162,9 +175,9 @@ async def get_sole_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     """گرفتن جنس زیره جدید."""
     user_id = str(update.message.from_user.id)
     sole = update.message.text
-    new_sole = wc_client.add_attribute_term(5, sole)
+    new_sole = await wc_client.add_attribute_term(5, sole)
     user_data.set(user_id, "sole", new_sole or sole)
-    usages = wc_client.get_attribute_terms(6)
+    usages = await wc_client.get_attribute_terms(6)
     keyboard = [[InlineKeyboardButton(u["name"], callback_data=f"usage_{u['name']}")] for u in usages]
     keyboard.extend([
         [InlineKeyboardButton("اضافه کردن کاربرد جدید", callback_data="usage_new")],
@@ -182,6 +195,9 @@ async def get_usage(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     await query.answer()
     user_id = str(query.from_user.id)
     data = query.data
+    current_usage = user_data.get(user_id, "usage")
+    if current_usage is None:
+        return await session_expired(update, context)
 
     if data == "usage_new":
         await delete_previous_message(context, query.message.chat_id, user_data.get(user_id, "usage_message_id"))
@@ -192,12 +208,11 @@ async def get_usage(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         await query.message.reply_text("🆔 SKU محصول رو بنویس (مثلاً NK-J23-WB-M):")
         return SKU
     usage = data.replace("usage_", "")
-    current_usage = user_data.get(user_id, "usage")
     if usage in current_usage:
         current_usage.remove(usage)
     else:
         current_usage.append(usage)
-    usages = wc_client.get_attribute_terms(6)
+    usages = await wc_client.get_attribute_terms(6)
     keyboard = [[InlineKeyboardButton(f"{u['name']} ✅" if u["name"] in current_usage else u["name"], callback_data=f"usage_{u['name']}")] for u in usages]
     keyboard.extend([
         [InlineKeyboardButton("اضافه کردن کاربرد جدید", callback_data="usage_new")],
@@ -210,11 +225,14 @@ async def get_usage(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 async def get_usage_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """گرفتن کاربرد جدید."""
     user_id = str(update.message.from_user.id)
+    current_usage = user_data.get(user_id, "usage")
+    if current_usage is None:
+        return await session_expired(update, context)
     usage = update.message.text
-    new_usage = wc_client.add_attribute_term(6, usage)
-    user_data.get(user_id, "usage").append(new_usage or usage)
-    usages = wc_client.get_attribute_terms(6)
-    keyboard = [[InlineKeyboardButton(f"{u['name']} ✅" if u["name"] in user_data.get(user_id, "usage") else u["name"], callback_data=f"usage_{u['name']}")] for u in usages]
+    new_usage = await wc_client.add_attribute_term(6, usage)
+    current_usage.append(new_usage or usage)
+    usages = await wc_client.get_attribute_terms(6)
+    keyboard = [[InlineKeyboardButton(f"{u['name']} ✅" if u["name"] in current_usage else u["name"], callback_data=f"usage_{u['name']}")] for u in usages]
     keyboard.extend([
         [InlineKeyboardButton("اضافه کردن کاربرد جدید", callback_data="usage_new")],
         [InlineKeyboardButton("هیچ‌کدام", callback_data="usage_none")],
@@ -229,7 +247,7 @@ async def get_sku(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """گرفتن SKU محصول."""
     user_id = str(update.message.from_user.id)
     sku = update.message.text
-    if wc_client.find_product_by_sku(sku):
+    if await wc_client.find_product_by_sku(sku):
         await update.message.reply_text("⚠️ این SKU قبلاً برای یه محصول دیگه استفاده شده. لطفاً یه SKU دیگه وارد کن.")
         return SKU
     user_data.set(user_id, "sku", sku)
@@ -261,8 +279,8 @@ async def get_brand(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         "📋 خلاصه محصول:\n"
         f"عنوان: {user_data.get(user_id, 'title')}\n"
         f"توضیحات: {user_data.get(user_id, 'description')}\n"
-        f"عکس شاخص: {user_data.get(user_id, 'main_image_id')}\n"
-        f"عکس‌های گالری: {', '.join(map(str, user_data.get(user_id, 'gallery_image_ids'))) or 'ندارد'}\n"
+        "عکس شاخص: ✅\n"
+        f"عکس‌های گالری: {len(user_data.get(user_id, 'gallery_file_ids')) or 'ندارد'}\n"
         f"سایزها: {user_data.get(user_id, 'sizes')}\n"
         f"رنگ: {user_data.get(user_id, 'color')}\n"
         f"جنس رویه: {user_data.get(user_id, 'upper')}\n"
@@ -278,17 +296,25 @@ async def get_brand(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     return CONFIRM
 
 async def confirm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    """تأیید و ارسال محصول به ووکامرس."""
+    """تأیید محصول و ثبت آن در صف ساخت ووکامرس."""
     user_id = str(update.message.from_user.id)
     product_json = user_data.get(user_id, "json")
     if not product_json:
         await update.message.reply_text("⚠️ داده‌های کاربر پیدا نشد. لطفاً دوباره شروع کنید با /start")
         return ConversationHandler.END
     try:
-        product_id = wc_client.create_product(product_json)
-        await update.message.reply_text(f"✅ محصول با موفقیت ساخته شد! ID: {product_id}")
+        gallery_file_ids = user_data.get(user_id, "gallery_file_ids") or []
+        if media_pipeline.pending(user_id):
+            await update.message.reply_text("⏳ منتظر تمام شدن آپلود عکس‌ها...")
+        media_ids = await media_pipeline.wait(user_id, ["main"] + gallery_file_ids)
+        user_data.set(user_id, "main_image_id", media_ids[0])
+        user_data.set(user_id, "gallery_image_ids", media_ids[1:])
+        product_json = wc_client.create_product_json(user_data.get(user_id))
+        job_id = await product_outbox.enqueue(update.effective_chat.id, product_json)
+        await update.message.reply_text(f"📨 محصول در صف ساخت قرار گرفت (کار #{job_id}). نتیجه رو همین‌جا خبر می‌دم.")
     except Exception as e:
         await update.message.reply_text(f"❌ خطا در ساخت محصول: {str(e)}")
     finally:
+        media_pipeline.discard(user_id)
         user_data.clear(user_id)
     return ConversationHandler.END
\ No newline at end of file
@@ -7,8 +7,7 @@ from utils.auth import check_user_access
 from utils.user_data import user_data
 from utils.telegram_utils import send_message_with_keyboard, delete_previous_message
 from utils.woocommerce import wc_client
-from config.settings import WP_URL, WP_CONSUMER_KEY, WP_CONSUMER_SECRET
-import requests
+from handlers.common import session_expired
 
 async def edit_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """شروع فرآیند ویرایش محصول."""
@@ -24,7 +23,7 @@ async def edit_sku(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """گرفتن SKU برای ویرایش."""
     user_id = str(update.message.from_user.id)
     sku = update.message.text
-    product = wc_client.find_product_by_sku(sku)
+    product = await wc_client.find_product_by_sku(sku)
     if not product:
         await update.message.reply_text("⚠️ محصول با این SKU پیدا نشد. لطفاً دوباره امتحان کنید یا /cancel را بزنید.")
         return EDIT_SKU
@@ -58,18 +57,14 @@ async def edit_choice(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
 async def edit_price(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """ویرایش قیمت محصول و متغیرها."""
     user_id = str(update.message.from_user.id)
+    product = user_data.get(user_id, "edit_product")
+    if product is None:
+        return await session_expired(update, context)
     new_price = update.message.text
     try:
         new_price = int(new_price)
-        product = user_data.get(user_id, "edit_product")
         product_id = product["id"]
-        wc_client.update_product(product_id, {"regular_price": str(new_price)})
-        variations = wc_client.get_variations(product_id)
-        auth = (WP_CONSUMER_KEY, WP_CONSUMER_SECRET)
-        for variation in variations:
-            variation_id = variation['id']
-            variation_url = f"{WP_URL}/wp-json/wc/v3/products/{product_id}/variations/{variation_id}"
-            requests.put(variation_url, auth=auth, json={"regular_price": str(new_price)})
+        await wc_client.update_variations_price(product_id, new_price)
         await delete_previous_message(context, update.message.chat_id, user_data.get(user_id, "edit_message_id"))
         await update.message.reply_text(f"✅ قیمت محصول و متغیرهای آن با موفقیت به {new_price} تغییر کرد!")
     except ValueError:
@@ -92,7 +87,9 @@ async def edit_stock_mode(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     elif data == "stock_array":
         user_id = str(query.from_user.id)
         product = user_data.get(user_id, "edit_product")
-        variations = wc_client.get_variations(product["id"])
+        if product is None:
+            return await session_expired(update, context)
+        variations = await wc_client.get_variations(product["id"])
         await query.message.reply_text(
             f"📦 برای هر متغیر یک عدد وارد کنید (به ترتیب سایزها، با کاما جدا کنید، مثلاً 1,2,3,0 برای {len(variations)} متغیر):"
         )
@@ -102,12 +99,14 @@ async def edit_stock_mode(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 async def edit_stock_uniform(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """ویرایش یکنواخت موجودی متغیرها."""
     user_id = str(update.message.from_user.id)
+    product = user_data.get(user_id, "edit_product")
+    if product is None:
+        return await session_expired(update, context)
     stock = update.message.text
     try:
         stock = int(stock)
-        product = user_data.get(user_id, "edit_product")
         product_id = product["id"]
-        wc_client.update_variations_stock(product_id, stock)
+        await wc_client.update_variations_stock(product_id, stock)
         await delete_previous_message(context, update.message.chat_id, user_data.get(user_id, "edit_message_id"))
         await update.message.reply_text(f"✅ موجودی همه متغیرها با موفقیت به {stock} تغییر کرد!")
     except ValueError:
@@ -122,12 +121,14 @@ async def edit_stock_uniform(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def edit_stock_array(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """ویرایش جداگانه موجودی متغیرها."""
     user_id = str(update.message.from_user.id)
+    product = user_data.get(user_id, "edit_product")
+    if product is None:
+        return await session_expired(update, context)
     stock_input = update.message.text
     try:
         stock_data = [int(x.strip()) for x in stock_input.split(",")]
-        product = user_data.get(user_id, "edit_product")
         product_id = product["id"]
-        wc_client.update_variations_stock(product_id, stock_data)
+        await wc_client.update_variations_stock(product_id, stock_data)
         await delete_previous_message(context, update.message.chat_id, user_data.get(user_id, "edit_message_id"))
         await update.message.reply_text("✅ موجودی متغیرها با موفقیت تغییر کرد!")
     except ValueError:
@@ -18,28 +18,31 @@ async def link_products_start(update: Update, context: ContextTypes.DEFAULT_TYPE
 async def link_products(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """لینک کردن محصولات با Cross-Sells."""
     user_id = str(update.message.from_user.id)
-    skus = [sku.strip() for sku in update.message.text.split(',')]
-    product_ids = {}
-    invalid_skus = []
+    skus = list(dict.fromkeys(sku.strip() for sku in update.message.text.split(',')))
 
-    # بررسی وجود محصولات
-    for sku in skus:
-        product_id = wc_client.get_product_id_by_sku(sku)
-        if product_id:
-            product_ids[sku] = product_id
-        else:
-            invalid_skus.append(sku)
+    # بررسی وجود محصولات (همه SKUها با هم)
+    products = await wc_client.find_products_by_skus(skus)
+    invalid_skus = [sku for sku in skus if sku not in products]
 
     if invalid_skus:
         await update.message.reply_text(f"⚠️ این SKUها پیدا نشدن: {', '.join(invalid_skus)}")
         return LINK_PRODUCTS
 
-    # آپدیت Cross-Sells برای هر محصول
-    for sku, product_id in product_ids.items():
-        cross_sell_skus = [s for s in skus if s != sku]  # حذف SKU خودش
-        cross_sell_ids = [product_ids[s] for s in cross_sell_skus]
-        wc_client.update_cross_sells(product_id, cross_sell_ids)
-        await update.message.reply_text(f"✅ محصول {sku} با موفقیت به محصولات مرتبط لینک شد.")
+    # آپدیت Cross-Sells همه محصولات با یک درخواست batch
+    product_ids = {sku: products[sku]["id"] for sku in skus}
+    cross_sells = {
+        product_id: [product_ids[s] for s in skus if s != sku]  # حذف SKU خودش
+        for sku, product_id in product_ids.items()
+    }
+    result = await wc_client.update_cross_sells_bulk(cross_sells)
+    failed_ids = {error["id"] for error in result["errors"]}
+    linked_skus = [sku for sku in skus if product_ids[sku] not in failed_ids]
+    failed_skus = [sku for sku in skus if product_ids[sku] in failed_ids]
+
+    summary = f"✅ این محصولات با موفقیت به هم لینک شدن: {', '.join(linked_skus)}" if linked_skus else ""
+    if failed_skus:
+        summary += f"\n❌ لینک این محصولات انجام نشد: {', '.join(failed_skus)}"
+    await update.message.reply_text(summary.strip())
 
     user_data.clear(user_id)
     return ConversationHandler.END
\ No newline at end of file
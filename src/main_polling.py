@@ -1,85 +1,56 @@
 import asyncio
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ConversationHandler
-from config.settings import TELEGRAM_TOKEN, logger
-from handlers.common import start, cancel, error_handler, help_command, menu_handler  # menu_handler از common
-from handlers.product_create import get_title, confirm  # فقط توابع اصلی create
-from handlers.product_edit import edit_start
-from handlers.product_link import link_products_start
-from config.constants import (
-    MENU, TITLE, DESCRIPTION, MAIN_IMAGE, GALLERY_IMAGES, SIZES, COLOR, UPPER, SOLE, USAGE,
-    SKU, PRICE, TAGS, BRAND, CONFIRM, EDIT_SKU, EDIT_CHOICE, EDIT_PRICE, EDIT_STOCK_MODE,
-    EDIT_STOCK_UNIFORM, EDIT_STOCK_ARRAY, LINK_PRODUCTS
-)
-from handlers.product_create import (
-    get_description, get_main_image, get_gallery_images, get_sizes, get_color, get_color_text,
-    get_upper, get_upper_text, get_sole, get_sole_text, get_usage, get_usage_text, get_sku,
-    get_price, get_tags, get_brand
-)
-from handlers.product_edit import (
-    edit_sku, edit_choice, edit_price, edit_stock_mode, edit_stock_uniform, edit_stock_array
-)
-from handlers.product_link import link_products
+from telegram.ext import Application, CommandHandler
+from config.settings import TELEGRAM_TOKEN, TELEGRAM_API_URL, PERSISTENCE_PATH, MAX_CONCURRENT_UPDATES, logger
+from utils.http import http_pool
+from utils.woocommerce import wc_client
+from utils.image_processing import image_processor
+from utils.media_cache import media_cache
+from utils.persistence import SqlitePersistence
+from utils.outbox import product_outbox
+from utils.update_processor import PerChatUpdateProcessor
+from utils.tracing import tracer
+from utils.telegram_utils import InstrumentedRequest
+from handlers.admin import profile_command
+from handlers.common import error_handler
+from handlers.conversation import get_conversation_handler
+
+async def post_init(application):
+    """بازگرداندن سشن‌ها، شروع صف ساخت محصول و آماده‌سازی ایندکس SKU و آینه کاتالوگ هنگام شروع."""
+    if application.persistence:
+        application.persistence.restore_sessions()
+    product_outbox.start(application.bot)
+    tracer.start()
+    wc_client.start_sku_index_warmup()
+    wc_client.start_catalog_sync()
+    media_cache.load()
+
+async def post_stop(_):
+    """تمام کردن کارهای در حال اجرای صف ساخت محصول، قبل از بسته شدن بات."""
+    await product_outbox.stop()
+
+async def post_shutdown(_):
+    """ذخیره ایندکس SKU، بستن آینه کاتالوگ و اتصال‌های باز ووکامرس هنگام خاموش شدن."""
+    wc_client.sku_index.save()
+    await wc_client.stop_catalog_sync()
+    media_cache.save()
+    image_processor.shutdown()
+    await tracer.stop()
+    await http_pool.close()
 
 async def disable_webhook(bot):
     """غیرفعال کردن وب‌هوک قبلی."""
     await bot.delete_webhook(drop_pending_updates=True)
     logger.info("Webhook disabled successfully")
 
-def get_conversation_handler() -> ConversationHandler:
-    return ConversationHandler(
-        entry_points=[
-            CommandHandler("start", start),
-            CommandHandler("create", get_title),
-            CommandHandler("update", edit_start),
-            CommandHandler("link", link_products_start),
-            CommandHandler("help", help_command)
-        ],
-        states={
-            MENU: [CallbackQueryHandler(menu_handler, pattern='^(create_product|edit_product|link_products|show_help)$')],
-            TITLE: [MessageHandler(filters.Text() & ~filters.Command(), get_title)],
-            DESCRIPTION: [MessageHandler(filters.Text() & ~filters.Command(), get_description)],
-            MAIN_IMAGE: [MessageHandler(filters.PHOTO, get_main_image)],
-            GALLERY_IMAGES: [MessageHandler(filters.PHOTO | filters.Regex('^/done$'), get_gallery_images)],
-            SIZES: [MessageHandler(filters.Text() & ~filters.Command(), get_sizes)],
-            COLOR: [
-                CallbackQueryHandler(get_color, pattern='^color_'),
-                MessageHandler(filters.Text() & ~filters.Command(), get_color_text)
-            ],
-            UPPER: [
-                CallbackQueryHandler(get_upper, pattern='^upper_'),
-                MessageHandler(filters.Text() & ~filters.Command(), get_upper_text)
-            ],
-            SOLE: [
-                CallbackQueryHandler(get_sole, pattern='^sole_'),
-                MessageHandler(filters.Text() & ~filters.Command(), get_sole_text)
-            ],
-            USAGE: [
-                CallbackQueryHandler(get_usage, pattern='^usage_'),
-                MessageHandler(filters.Text() & ~filters.Command(), get_usage_text)
-            ],
-            SKU: [MessageHandler(filters.Text() & ~filters.Command(), get_sku)],
-            PRICE: [MessageHandler(filters.Text() & ~filters.Command(), get_price)],
-            TAGS: [MessageHandler(filters.Text() | filters.Command(), get_tags)],
-            BRAND: [MessageHandler(filters.Text() & ~filters.Command(), get_brand)],
-            CONFIRM: [
-                CommandHandler("confirm", confirm),
-                CommandHandler("cancel", cancel)
-            ],
-            EDIT_SKU: [MessageHandler(filters.Text() & ~filters.Command(), edit_sku)],
-            EDIT_CHOICE: [CallbackQueryHandler(edit_choice, pattern='^edit_')],
-            EDIT_PRICE: [MessageHandler(filters.Text() & ~filters.Command(), edit_price)],
-            EDIT_STOCK_MODE: [CallbackQueryHandler(edit_stock_mode, pattern='^stock_')],
-            EDIT_STOCK_UNIFORM: [MessageHandler(filters.Text() & ~filters.Command(), edit_stock_uniform)],
-            EDIT_STOCK_ARRAY: [MessageHandler(filters.Text() & ~filters.Command(), edit_stock_array)],
-            LINK_PRODUCTS: [MessageHandler(filters.Text() & ~filters.Command(), link_products)]
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
-        per_message=False
-    )
-    
 def main() -> None:
-    app = Application.builder().token(TELEGRAM_TOKEN).build()
+    builder = Application.builder().token(TELEGRAM_TOKEN).post_init(post_init).post_stop(post_stop).post_shutdown(post_shutdown)
+    builder.base_url(f"{TELEGRAM_API_URL}/bot").base_file_url(f"{TELEGRAM_API_URL}/file/bot")
+    builder.concurrent_updates(PerChatUpdateProcessor(MAX_CONCURRENT_UPDATES)).request(InstrumentedRequest(connection_pool_size=256))
+    if PERSISTENCE_PATH:
+        builder.persistence(SqlitePersistence(PERSISTENCE_PATH))
+    app = builder.build()
     app.add_handler(get_conversation_handler())
+    app.add_handler(CommandHandler("profile", profile_command), group=-1)
     app.add_error_handler(error_handler)
     logger.info("Disabling previous webhook...")
     loop = asyncio.get_event_loop()
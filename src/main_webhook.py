@@ -1,103 +1,225 @@
 # main_webhook.py
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ConversationHandler
+import asyncio
+import hmac
+import json
+from telegram.ext import Application, CommandHandler
 from telegram import Update
 from aiohttp import web
-from config.settings import TELEGRAM_TOKEN, WEBHOOK_URL, PORT, logger
-from handlers.common import start, cancel, error_handler, help_command, menu_handler  # menu_handler از common
-from handlers.product_create import get_title, confirm  # فقط توابع اصلی create
-from handlers.product_edit import edit_start
-from handlers.product_link import link_products_start
-from config.constants import (
-    MENU, TITLE, DESCRIPTION, MAIN_IMAGE, GALLERY_IMAGES, SIZES, COLOR, UPPER, SOLE, USAGE,
-    SKU, PRICE, TAGS, BRAND, CONFIRM, EDIT_SKU, EDIT_CHOICE, EDIT_PRICE, EDIT_STOCK_MODE,
-    EDIT_STOCK_UNIFORM, EDIT_STOCK_ARRAY, LINK_PRODUCTS
+from config.settings import (
+    TELEGRAM_TOKEN, TELEGRAM_API_URL, WEBHOOK_URL, PORT, PERSISTENCE_PATH, MAX_CONCURRENT_UPDATES,
+    WEBHOOK_SECRET, WEBHOOK_QUEUE_SIZE, WEBHOOK_DEDUP_SIZE, WC_WEBHOOK_SECRET, PROFILE_DEFAULT_DURATION, PROFILE_TOKEN,
+    logger
 )
-from handlers.product_create import (
-    get_description, get_main_image, get_gallery_images, get_sizes, get_color, get_color_text,
-    get_upper, get_upper_text, get_sole, get_sole_text, get_usage, get_usage_text, get_sku,
-    get_price, get_tags, get_brand
-)
-from handlers.product_edit import (
-    edit_sku, edit_choice, edit_price, edit_stock_mode, edit_stock_uniform, edit_stock_array
-)
-from handlers.product_link import link_products
+from utils.http import http_pool
+from utils.woocommerce import wc_client
+from utils.image_processing import image_processor
+from utils.media_cache import media_cache
+from utils.persistence import SqlitePersistence
+from utils.outbox import product_outbox
+from utils.update_processor import PerChatUpdateProcessor
+from utils.tracing import tracer
+from utils.webhook_intake import WebhookIntake, derive_secret_token
+from utils.store_webhook import StoreWebhook, PRODUCT_TOPICS
+from utils.telegram_utils import InstrumentedRequest
+from utils.metrics import registry, woocommerce_health
+from utils.user_data import user_data
+from utils.profiler import profiler, ProfilerBusyError
+from handlers.admin import profile_command
+from handlers.common import error_handler
+from handlers.conversation import get_conversation_handler
 
 # متغیر سراسری برای اپلیکیشن
 app = None
+intake = WebhookIntake(WEBHOOK_SECRET or derive_secret_token(TELEGRAM_TOKEN), WEBHOOK_DEDUP_SIZE)
+store_webhook = StoreWebhook(WC_WEBHOOK_SECRET)
 
 async def webhook_handler(request):
-    update = await request.json()
-    await app.update_queue.put(Update.de_json(update, app.bot))
+    """
+    گرفتن آپدیت از تلگرام و پاسخ فوری.
+
+    درخواست بدون secret token درست 403 می‌گیرد، آپدیت تکراری بدون پردازش
+    تأیید می‌شود و اگه تعداد آپدیت‌های پذیرفته‌شده و تمام‌نشده به WEBHOOK_QUEUE_SIZE برسد
+    503 برمی‌گردد تا تلگرام بعداً دوباره بفرستد. با concurrent_updates، PTB هر آپدیت را فوراً
+    از صف برمی‌دارد و برایش task می‌سازد، پس عمق صف به‌تنهایی هیچ‌وقت پر نمی‌شود.
+    """
+    if not intake.authorized(request.headers.get("X-Telegram-Bot-Api-Secret-Token")):
+        return web.Response(status=403)
+    try:
+        data = json.loads(await request.read())
+        update_id = data["update_id"]
+    except (ValueError, KeyError, TypeError):
+        return web.Response(status=400)
+    if intake.is_duplicate(update_id):
+        return web.Response(text="OK")
+    pending = app.update_queue.qsize() + app.update_processor.waiting()
+    if pending >= WEBHOOK_QUEUE_SIZE:
+        intake.overloaded += 1
+        logger.warning(f"{pending} updates pending, asking Telegram to redeliver update {update_id}")
+        return web.Response(status=503)
+    try:
+        app.update_queue.put_nowait(Update.de_json(data, app.bot))
+    except asyncio.QueueFull:
+        intake.overloaded += 1
+        logger.warning(f"Update queue full, asking Telegram to redeliver update {update_id}")
+        return web.Response(status=503)
+    intake.accept(update_id)
     return web.Response(text="OK")
 
-async def ping_handler(request):
+async def store_webhook_handler(request):
+    """
+    وب‌هوک‌های محصول ووکامرس (ساخت، ویرایش و حذف در wp-admin) برای به‌روز نگه داشتن کش‌ها.
+
+    پینگ ووکامرس هنگام ذخیره وب‌هوک (بدنه webhook_id=...) امضا ندارد و فقط 200 می‌گیرد.
+    امضای نادرست 401 می‌گیرد؛ موضوع‌های دیگر بدون کاری 200 می‌گیرند تا ووکامرس
+    وب‌هوک را بعد از چند شکست غیرفعال نکند. اگه WC_WEBHOOK_SECRET تنظیم نشده باشد endpoint وجود ندارد.
+    """
+    if not store_webhook.enabled:
+        raise web.HTTPNotFound()
+    body = await request.read()
+    if body.startswith(b"webhook_id="):
+        store_webhook.pings += 1
+        return web.Response(text="OK")
+    if not store_webhook.verify(body, request.headers.get("X-WC-Webhook-Signature")):
+        return web.Response(status=401)
+    topic = request.headers.get("X-WC-Webhook-Topic")
+    if topic not in PRODUCT_TOPICS:
+        store_webhook.ignored += 1
+        return web.Response(text="OK")
+    try:
+        applied = wc_client.apply_product_event(topic, json.loads(body))
+    except (ValueError, KeyError, TypeError):
+        return web.Response(status=400)
+    if applied:
+        store_webhook.applied += 1
+    else:
+        store_webhook.ignored += 1
     return web.Response(text="OK")
 
-def get_conversation_handler() -> ConversationHandler:
-    return ConversationHandler(
-        entry_points=[
-            CommandHandler("start", start),
-            CommandHandler("create", get_title),
-            CommandHandler("update", edit_start),
-            CommandHandler("link", link_products_start),
-            CommandHandler("help", help_command)
-        ],
-        states={
-            MENU: [CallbackQueryHandler(menu_handler, pattern='^(create_product|edit_product|link_products|show_help)$')],
-            TITLE: [MessageHandler(filters.Text() & ~filters.Command(), get_title)],
-            DESCRIPTION: [MessageHandler(filters.Text() & ~filters.Command(), get_description)],
-            MAIN_IMAGE: [MessageHandler(filters.PHOTO, get_main_image)],
-            GALLERY_IMAGES: [MessageHandler(filters.PHOTO | filters.Regex('^/done$'), get_gallery_images)],
-            SIZES: [MessageHandler(filters.Text() & ~filters.Command(), get_sizes)],
-            COLOR: [
-                CallbackQueryHandler(get_color, pattern='^color_'),
-                MessageHandler(filters.Text() & ~filters.Command(), get_color_text)
-            ],
-            UPPER: [
-                CallbackQueryHandler(get_upper, pattern='^upper_'),
-                MessageHandler(filters.Text() & ~filters.Command(), get_upper_text)
-            ],
-            SOLE: [
-                CallbackQueryHandler(get_sole, pattern='^sole_'),
-                MessageHandler(filters.Text() & ~filters.Command(), get_sole_text)
-            ],
-            USAGE: [
-                CallbackQueryHandler(get_usage, pattern='^usage_'),
-                MessageHandler(filters.Text() & ~filters.Command(), get_usage_text)
-            ],
-            SKU: [MessageHandler(filters.Text() & ~filters.Command(), get_sku)],
-            PRICE: [MessageHandler(filters.Text() & ~filters.Command(), get_price)],
-            TAGS: [MessageHandler(filters.Text() | filters.Command(), get_tags)],
-            BRAND: [MessageHandler(filters.Text() & ~filters.Command(), get_brand)],
-            CONFIRM: [
-                CommandHandler("confirm", confirm),
-                CommandHandler("cancel", cancel)
-            ],
-            EDIT_SKU: [MessageHandler(filters.Text() & ~filters.Command(), edit_sku)],
-            EDIT_CHOICE: [CallbackQueryHandler(edit_choice, pattern='^edit_')],
-            EDIT_PRICE: [MessageHandler(filters.Text() & ~filters.Command(), edit_price)],
-            EDIT_STOCK_MODE: [CallbackQueryHandler(edit_stock_mode, pattern='^stock_')],
-            EDIT_STOCK_UNIFORM: [MessageHandler(filters.Text() & ~filters.Command(), edit_stock_uniform)],
-            EDIT_STOCK_ARRAY: [MessageHandler(filters.Text() & ~filters.Command(), edit_stock_array)],
-            LINK_PRODUCTS: [MessageHandler(filters.Text() & ~filters.Command(), link_products)]
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
-        per_message=False
+async def ping_handler(request):
+    """
+    health check عمیق: وضعیت مدار ووکامرس، تأخیر اخیر آن و عمق صف‌ها.
+
+    همیشه 200 برمی‌گرداند تا قطعی فروشگاه باعث ری‌استارت بات نشود؛ وضعیت در status است.
+    """
+    circuit = wc_client.breaker.state
+    return web.json_response({
+        "status": "ok" if circuit == "closed" else "degraded",
+        "woocommerce": {"circuit": circuit, **woocommerce_health()},
+        "update_queue": app.update_queue.qsize(),
+        "outbox": product_outbox.depth(),
+        "catalog": wc_client.catalog.stats(),
+        "sessions": len(user_data.data)
+    })
+
+async def metrics_handler(request):
+    """خروجی متریک‌ها در قالب متنی Prometheus."""
+    return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+async def profile_handler(request):
+    """
+    اجرای پروفایلر برای مدت محدود و برگرداندن گزارش به‌صورت فایل.
+
+    تنها کنترل دسترسی هدر Authorization: Bearer <PROFILE_TOKEN> است؛ اگه PROFILE_TOKEN
+    تنظیم نشده باشد endpoint وجود ندارد. مثال: /debug/profile?mode=cpu&seconds=30
+    """
+    if not PROFILE_TOKEN:
+        raise web.HTTPNotFound()
+    authorization = request.headers.get("Authorization", "")
+    if not authorization.startswith("Bearer ") or not hmac.compare_digest(
+        authorization[len("Bearer "):].encode(), PROFILE_TOKEN.encode()
+    ):
+        return web.Response(status=401)
+    mode = request.query.get("mode", "sample")
+    try:
+        seconds = float(request.query.get("seconds", PROFILE_DEFAULT_DURATION))
+        filename, report, _ = await profiler.profile(mode, seconds)
+    except ValueError as e:
+        return web.Response(status=400, text=str(e))
+    except ProfilerBusyError:
+        return web.Response(status=409, text="Another profile is running")
+    return web.Response(
+        body=report, content_type="text/plain", charset="utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
 
-def main() -> None:
+def register_runtime_metrics():
+    """ثبت متریک‌هایی که هنگام هر scrape از وضعیت فعلی بات خوانده می‌شوند."""
+    registry.gauge("hoomak_update_queue_depth", "Updates waiting in the application queue", app.update_queue.qsize)
+    registry.gauge(
+        "hoomak_updates_in_progress", "Updates accepted by the update processor and not finished",
+        app.update_processor.waiting
+    )
+    registry.gauge("hoomak_outbox_depth", "Product creation jobs queued or running", product_outbox.depth)
+    registry.gauge("hoomak_sessions", "Wizard session store", lambda: {
+        (("stat", key),): value for key, value in user_data.stats().items()
+    })
+    registry.gauge("hoomak_cache_hits_total", "Cache hits", lambda: {
+        (("cache", "attribute_terms"),): wc_client.terms_cache.hits,
+        (("cache", "media"),): media_cache.hits,
+        (("cache", "catalog"),): wc_client.catalog.hits
+    }, kind="counter")
+    registry.gauge("hoomak_cache_misses_total", "Cache misses", lambda: {
+        (("cache", "attribute_terms"),): wc_client.terms_cache.misses,
+        (("cache", "media"),): media_cache.misses,
+        (("cache", "catalog"),): wc_client.catalog.misses
+    }, kind="counter")
+    registry.gauge("hoomak_sku_index_entries", "SKUs in the in-memory index", lambda: len(wc_client.sku_index))
+    registry.gauge("hoomak_catalog_products", "Products in the local catalog mirror", lambda: len(wc_client.catalog))
+    registry.gauge("hoomak_webhook_updates_total", "Webhook updates by intake result", lambda: {
+        (("result", key),): value for key, value in intake.stats().items()
+    }, kind="counter")
+    registry.gauge("hoomak_store_webhook_events_total", "WooCommerce product webhooks by result", lambda: {
+        (("result", key),): value for key, value in store_webhook.stats().items()
+    }, kind="counter")
+    registry.gauge(
+        "hoomak_woocommerce_concurrency_limit", "Adaptive concurrency limit for WooCommerce",
+        lambda: int(wc_client.limiter.limit)
+    )
+    registry.gauge(
+        "hoomak_woocommerce_circuit_open", "1 while the WooCommerce circuit breaker rejects requests",
+        lambda: int(wc_client.breaker.state == "open")
+    )
+
+def build_application() -> Application:
+    """ساخت اپلیکیشن بات با صف محدود آپدیت‌ها و هندلرهای گفتگو."""
+    builder = Application.builder().token(TELEGRAM_TOKEN).update_queue(asyncio.Queue(maxsize=WEBHOOK_QUEUE_SIZE))
+    builder.base_url(f"{TELEGRAM_API_URL}/bot").base_file_url(f"{TELEGRAM_API_URL}/file/bot")
+    builder.concurrent_updates(PerChatUpdateProcessor(MAX_CONCURRENT_UPDATES)).request(InstrumentedRequest(connection_pool_size=256))
+    if PERSISTENCE_PATH:
+        builder.persistence(SqlitePersistence(PERSISTENCE_PATH))
+    application = builder.build()
+    application.add_handler(get_conversation_handler())
+    application.add_handler(CommandHandler("profile", profile_command), group=-1)
+    application.add_error_handler(error_handler)
+    return application
+
+def create_web_app(application: Application) -> web.Application:
+    """
+    ساخت سرور aiohttp وب‌هوک (/webhook، /woocommerce/webhook، /ping، /metrics و /debug/profile) برای اپلیکیشن بات.
+
+    شروع و توقف بات، صف ساخت محصول و بقیه سرویس‌ها به چرخه عمر سرور وصل می‌شوند.
+    """
     global app
-    app = Application.builder().token(TELEGRAM_TOKEN).build()
-    app.add_handler(get_conversation_handler())
-    app.add_error_handler(error_handler)
+    app = application
+    register_runtime_metrics()
     aiohttp_app = web.Application()
     aiohttp_app.router.add_post('/webhook', webhook_handler)
+    aiohttp_app.router.add_post('/woocommerce/webhook', store_webhook_handler)
     aiohttp_app.router.add_get('/ping', ping_handler)
+    aiohttp_app.router.add_get('/metrics', metrics_handler)
+    aiohttp_app.router.add_get('/debug/profile', profile_handler)
 
     async def on_startup(_):
         await app.initialize()
+        if app.persistence:
+            app.persistence.restore_sessions()
         await app.start()
-        webhook_set = await app.bot.set_webhook(url=WEBHOOK_URL)
+        product_outbox.start(app.bot)
+        tracer.start()
+        wc_client.start_sku_index_warmup()
+        wc_client.start_catalog_sync()
+        media_cache.load()
+        webhook_set = await app.bot.set_webhook(url=WEBHOOK_URL, secret_token=intake.secret_token)
         if webhook_set:
             logger.info("Webhook set up correctly")
         else:
@@ -105,13 +227,23 @@ def main() -> None:
         logger.info("Application started")
 
     async def on_shutdown(_):
+        await product_outbox.stop()
         await app.stop()
         await app.shutdown()
+        wc_client.sku_index.save()
+        await wc_client.stop_catalog_sync()
+        media_cache.save()
+        image_processor.shutdown()
+        await tracer.stop()
+        await http_pool.close()
         logger.info("Application stopped")
 
     aiohttp_app.on_startup.append(on_startup)
     aiohttp_app.on_shutdown.append(on_shutdown)
-    web.run_app(aiohttp_app, host="0.0.0.0", port=PORT)
+    return aiohttp_app
+
+def main() -> None:
+    web.run_app(create_web_app(build_application()), host="0.0.0.0", port=PORT)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
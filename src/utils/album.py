@@ -0,0 +1,39 @@
+import asyncio
+from config.settings import ALBUM_WINDOW, logger
+
+class AlbumCollector:
+    """جمع کردن آپدیت‌های یک آلبوم تلگرام (media_group_id) در یک پنجره زمانی کوتاه."""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._albums = {}
+
+    def add(self, media_group_id: str, on_complete):
+        """
+        ثبت یک عکس از آلبوم و تمدید پنجره انتظار.
+
+        وقتی تا `window` ثانیه عکس دیگری از همان آلبوم نرسد، `on_complete`
+        یک بار با تعداد کل عکس‌ها صدا زده می‌شود.
+
+        Args:
+            media_group_id (str): آیدی آلبوم
+            on_complete: تابع async که تعداد عکس‌های آلبوم را می‌گیرد
+        """
+        album = self._albums.setdefault(media_group_id, {"count": 0, "task": None})
+        album["count"] += 1
+        if album["task"] is not None:
+            album["task"].cancel()
+        album["task"] = asyncio.create_task(self._finish(media_group_id, on_complete))
+
+    async def _finish(self, media_group_id: str, on_complete):
+        await asyncio.sleep(self.window)
+        album = self._albums.pop(media_group_id, None)
+        if album is None:
+            return
+        try:
+            await on_complete(album["count"])
+        except Exception as e:
+            logger.error(f"Error acknowledging album {media_group_id}: {str(e)}")
+
+# نمونه سراسری برای استفاده
+album_collector = AlbumCollector(ALBUM_WINDOW)
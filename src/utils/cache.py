@@ -0,0 +1,68 @@
+import time
+
+class TTLCache:
+    """کش درون‌حافظه‌ای ساده با زمان انقضا برای هر کلید."""
+
+    def __init__(self, ttl: float, stale_ttl: float = 0):
+        self.ttl = ttl
+        # مدتی که مقدار منقضی‌شده هنوز برای get_stale نگه داشته می‌شود
+        self.stale_ttl = stale_ttl
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """
+        گرفتن مقدار تازه یک کلید و ثبت hit یا miss.
+
+        Args:
+            key: کلید کش
+            default: مقدار برگشتی اگه کلید نباشه یا منقضی شده باشه
+
+        Returns:
+            مقدار ذخیره‌شده یا default
+        """
+        value = self.peek(key, default)
+        if value is default:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def peek(self, key, default=None):
+        """گرفتن مقدار تازه یک کلید بدون اثر روی آمار."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            if expires_at + self.stale_ttl < time.monotonic():
+                self._entries.pop(key, None)
+            return default
+        return value
+
+    def get_stale(self, key, default=None):
+        """گرفتن مقدار یک کلید حتی اگه منقضی شده باشه (تا stale_ttl بعد از انقضا)."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] + self.stale_ttl < time.monotonic():
+            return default
+        return entry[1]
+
+    def set(self, key, value):
+        """ذخیره مقدار با زمان انقضای تازه."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key=None):
+        """
+        حذف یک کلید یا کل کش.
+
+        Args:
+            key (optional): کلید برای حذف؛ اگه None باشه همه کلیدها حذف می‌شوند
+        """
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
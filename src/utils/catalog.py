@@ -0,0 +1,209 @@
+import json
+import sqlite3
+import time
+from config.settings import logger
+
+# فیلدهای محصول و متغیر که در آینه نگه داشته می‌شوند (برای _fields درخواست‌های همگام‌سازی هم استفاده می‌شوند)
+PRODUCT_FIELDS = (
+    "id", "sku", "name", "type", "status", "regular_price", "stock_status", "manage_stock",
+    "cross_sell_ids", "date_modified_gmt"
+)
+VARIATION_FIELDS = ("id", "sku", "regular_price", "stock_quantity", "stock_status", "manage_stock", "attributes")
+
+class CatalogMirror:
+    """
+    آینه محلی محصولات و متغیرهای ووکامرس در SQLite.
+
+    WooCommerceClient آن را با یک بارگذاری کامل و بعد همگام‌سازی‌های دوره‌ای
+    (modified_after) پر می‌کند و بعد از نوشتن‌های خود بات هم به‌روزش می‌کند؛ خواندن‌ها
+    (SKU، متغیرها، Cross-Sellها) از این آینه در حد میکروثانیه جواب داده می‌شوند.
+    همه دستورها روی همان thread حلقه رویداد اجرا می‌شوند: هر نوشتن یک تراکنش کوچک
+    (حداکثر یک صفحه 100تایی) است و در حالت WAL با synchronous=NORMAL منتظر fsync نمی‌ماند.
+    تا وقتی open صدا زده نشده، همه متدها بی‌اثرند و None برمی‌گردانند.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or ":memory:"
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._watermark = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._connection is not None
+
+    @property
+    def ready(self) -> bool:
+        """آیا بارگذاری کامل اولیه (در این اجرا یا اجرای قبلی با همین فایل) انجام شده؟"""
+        return self._watermark is not None
+
+    @property
+    def watermark(self):
+        """زمان (epoch) شروع آخرین همگام‌سازی موفق."""
+        return self._watermark
+
+    def open(self):
+        """باز کردن پایگاه داده و ساخت جدول‌ها."""
+        if self._connection is not None:
+            return
+        self._connection = sqlite3.connect(self.path)
+        if self.path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript("""
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS products (
+                id INTEGER PRIMARY KEY, sku TEXT, data TEXT, variations_synced INTEGER DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS products_sku ON products (sku);
+            CREATE TABLE IF NOT EXISTS variations (id INTEGER PRIMARY KEY, product_id INTEGER, data TEXT);
+            CREATE INDEX IF NOT EXISTS variations_product ON variations (product_id);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        row = self._connection.execute("SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+        self._watermark = float(row[0]) if row else None
+        logger.info(f"Catalog mirror opened with {len(self)} products")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _count(self, found: bool):
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    # --- خواندن ---
+
+    def get_by_sku(self, sku: str):
+        """محصول با SKU یا None اگه در آینه نباشه."""
+        if not self.enabled:
+            return None
+        row = self._connection.execute("SELECT data FROM products WHERE sku = ?", (sku,)).fetchone()
+        self._count(row is not None)
+        return json.loads(row[0]) if row else None
+
+    def get_products(self, product_ids: list) -> dict:
+        """محصولات موجود در آینه از بین product_ids (آیدی → محصول)."""
+        if not self.enabled or not product_ids:
+            return {}
+        ids = list(product_ids)
+        rows = self._connection.execute(
+            f"SELECT id, data FROM products WHERE id IN ({','.join('?' * len(ids))})", ids
+        ).fetchall()
+        self._count(len(rows) == len(set(ids)))
+        return {product_id: json.loads(data) for product_id, data in rows}
+
+    def get_variations(self, product_id: int):
+        """
+        متغیرهای محصول به ترتیب آیدی.
+
+        Returns:
+            list یا None: None اگه متغیرهای این محصول هنوز کامل در آینه نباشند
+        """
+        if not self.enabled:
+            return None
+        synced = self._connection.execute(
+            "SELECT variations_synced FROM products WHERE id = ?", (product_id,)
+        ).fetchone()
+        if not synced or not synced[0]:
+            self._count(False)
+            return None
+        self._count(True)
+        rows = self._connection.execute(
+            "SELECT data FROM variations WHERE product_id = ? ORDER BY id", (product_id,)
+        ).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    # --- نوشتن ---
+
+    @staticmethod
+    def _merge(current, item: dict, fields: tuple) -> str:
+        data = json.loads(current) if current else {}
+        data.update({key: item[key] for key in fields if key in item})
+        return json.dumps(data, ensure_ascii=False)
+
+    def put_products(self, products: list):
+        """اضافه یا به‌روزرسانی محصولات (فیلدهای داده‌شده روی داده قبلی ادغام می‌شوند)."""
+        if not self.enabled or not products:
+            return
+        with self._connection:
+            for product in products:
+                row = self._connection.execute("SELECT data FROM products WHERE id = ?", (product["id"],)).fetchone()
+                data = self._merge(row[0] if row else None, product, PRODUCT_FIELDS)
+                self._connection.execute(
+                    "INSERT INTO products (id, sku, data) VALUES (?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET sku = excluded.sku, data = excluded.data",
+                    (product["id"], json.loads(data).get("sku") or None, data)
+                )
+
+    def remove_products(self, product_ids: list):
+        """حذف محصولات و متغیرهایشان."""
+        if not self.enabled or not product_ids:
+            return
+        ids = [(product_id,) for product_id in product_ids]
+        with self._connection:
+            self._connection.executemany("DELETE FROM variations WHERE product_id = ?", ids)
+            self._connection.executemany("DELETE FROM products WHERE id = ?", ids)
+
+    def put_variations(self, product_id: int, variations: list):
+        """جایگزینی کامل متغیرهای یک محصول و علامت زدن آن به‌عنوان کامل."""
+        if not self.enabled:
+            return
+        with self._connection:
+            self._connection.execute("DELETE FROM variations WHERE product_id = ?", (product_id,))
+            self._connection.executemany(
+                "INSERT INTO variations (id, product_id, data) VALUES (?, ?, ?)",
+                [(variation["id"], product_id, self._merge(None, variation, VARIATION_FIELDS)) for variation in variations]
+            )
+            self._connection.execute("UPDATE products SET variations_synced = 1 WHERE id = ?", (product_id,))
+
+    def merge_variations(self, product_id: int, variations: list):
+        """اضافه یا به‌روزرسانی چند متغیر (مثلاً نتیجه batch) بدون دست زدن به بقیه."""
+        if not self.enabled or not variations:
+            return
+        with self._connection:
+            for variation in variations:
+                row = self._connection.execute("SELECT data FROM variations WHERE id = ?", (variation["id"],)).fetchone()
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO variations (id, product_id, data) VALUES (?, ?, ?)",
+                    (variation["id"], product_id, self._merge(row[0] if row else None, variation, VARIATION_FIELDS))
+                )
+
+    def remove_variations(self, variation_ids: list):
+        if not self.enabled or not variation_ids:
+            return
+        with self._connection:
+            self._connection.executemany("DELETE FROM variations WHERE id = ?", [(i,) for i in variation_ids])
+
+    def forget_variations(self, product_id: int):
+        """علامت زدن متغیرهای محصول به‌عنوان ناقص تا خواندن بعدی از ووکامرس انجام شود."""
+        if not self.enabled:
+            return
+        with self._connection:
+            self._connection.execute("UPDATE products SET variations_synced = 0 WHERE id = ?", (product_id,))
+
+    def set_watermark(self, value: float):
+        """ثبت زمان شروع آخرین همگام‌سازی موفق."""
+        if not self.enabled:
+            return
+        with self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('watermark', ?)", (str(value),))
+        self._watermark = value
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {}
+        variations = self._connection.execute("SELECT COUNT(*) FROM variations").fetchone()[0]
+        return {
+            "products": len(self),
+            "variations": variations,
+            "sync_age_s": round(time.time() - self._watermark) if self._watermark else None
+        }
+
+    def __len__(self):
+        if not self.enabled:
+            return 0
+        return self._connection.execute("SELECT COUNT(*) FROM products").fetchone()[0]
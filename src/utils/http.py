@@ -0,0 +1,107 @@
+import asyncio
+import random
+from collections import namedtuple
+import aiohttp
+from config.settings import (
+    HTTP_POOL_LIMIT, HTTP_POOL_LIMIT_PER_HOST, HTTP_KEEPALIVE_TIMEOUT, HTTP_TIMEOUT,
+    HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX, logger
+)
+
+HttpResponse = namedtuple("HttpResponse", ["status", "headers", "data"])
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+class HttpPool:
+    """نگهداری یک ClientSession مشترک با اتصال‌های keep-alive برای کل پروسه."""
+
+    def __init__(self):
+        self._session = None
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """
+        گرفتن سشن مشترک و ساختن آن در اولین استفاده.
+
+        Returns:
+            aiohttp.ClientSession: سشن با connector محدود و keep-alive
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+                headers={"Accept-Encoding": "gzip, deflate"}
+            )
+        return self._session
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: str = None) -> float:
+        """محاسبه زمان انتظار با backoff نمایی و jitter کامل (یا Retry-After سرور)."""
+        if retry_after:
+            try:
+                return min(float(retry_after), HTTP_BACKOFF_MAX)
+            except ValueError:
+                pass
+        return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+    async def request(self, method: str, url: str, retry: bool = None, limiter=None, **kwargs) -> HttpResponse:
+        """
+        ارسال درخواست از طریق pool با تلاش مجدد روی 5xx، 429 و timeout.
+
+        Args:
+            method (str): متد HTTP
+            url (str): آدرس درخواست
+            retry (bool, optional): تلاش مجدد روی 5xx و timeout؛ پیش‌فرض فقط برای متدهای idempotent.
+                429 همیشه تکرار می‌شود چون سرور درخواست را پردازش نکرده، مگر اینکه retry صریحاً
+                False باشد (مثلاً بدنه‌های stream که قابل ارسال دوباره نیستند).
+            limiter (AdaptiveLimiter, optional): محدودکننده‌ای که هر تلاش باید از آن جا بگیرد
+            **kwargs: پارامترهای aiohttp مثل auth، json، params، data و headers
+
+        Returns:
+            HttpResponse: کد وضعیت، هدرها و بدنه JSON پاسخ (یا None)
+        """
+        replayable = retry is not False
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            if limiter is not None:
+                await limiter.acquire()
+            status = retry_after = None
+            try:
+                async with self.get_session().request(method, url, **kwargs) as response:
+                    status, retry_after = response.status, response.headers.get("Retry-After")
+                    can_retry = retry or (replayable and response.status == 429)
+                    if response.status in RETRY_STATUSES and can_retry and attempt < HTTP_MAX_RETRIES:
+                        delay = self._backoff(attempt, retry_after)
+                        logger.warning(f"{method} {url} returned {response.status}, retrying in {delay:.2f}s")
+                    else:
+                        try:
+                            data = await response.json(content_type=None)
+                        except ValueError:
+                            data = None
+                        return HttpResponse(response.status, response.headers, data)
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                if not retry or attempt >= HTTP_MAX_RETRIES:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"{method} {url} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+            finally:
+                if limiter is not None:
+                    limiter.release(status, retry_after)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        """بستن سشن مشترک هنگام خاموش شدن بات."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+# نمونه سراسری برای استفاده
+http_pool = HttpPool()
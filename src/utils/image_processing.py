@@ -0,0 +1,93 @@
+import asyncio
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from config.settings import (
+    IMAGE_NORMALIZE, IMAGE_MAX_DIMENSION, IMAGE_QUALITY, IMAGE_FORMAT, IMAGE_WORKERS, logger
+)
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow اختیاری است؛ بدون آن عکس‌ها بدون تغییر آپلود می‌شوند
+    Image = None
+
+# فرمت خروجی → (پسوند فایل، نوع محتوا)
+IMAGE_FORMATS = {
+    "JPEG": ("jpg", "image/jpeg"),
+    "WEBP": ("webp", "image/webp"),
+}
+
+def normalize_image(image_data: bytes, max_dimension: int, quality: int, image_format: str) -> bytes:
+    """
+    کوچک کردن، حذف متادیتا و فشرده‌سازی دوباره عکس (داخل پروسه جدا اجرا می‌شود).
+
+    Args:
+        image_data (bytes): بایت‌های عکس اصلی
+        max_dimension (int): حداکثر طول یا عرض خروجی
+        quality (int): کیفیت فشرده‌سازی (1 تا 100)
+        image_format (str): فرمت خروجی (JPEG یا WEBP)
+
+    Returns:
+        bytes: عکس پردازش‌شده
+    """
+    with Image.open(io.BytesIO(image_data)) as image:
+        # چرخش EXIF قبل از حذف متادیتا اعمال می‌شود تا عکس کج نشود
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension))
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        output = io.BytesIO()
+        # چون exif به save داده نمی‌شود، متادیتا در خروجی نمی‌ماند
+        image.save(output, format=image_format, quality=quality, optimize=True)
+        return output.getvalue()
+
+class ImageProcessor:
+    """مرحله اختیاری پردازش عکس قبل از آپلود، در یک ProcessPoolExecutor خارج از event loop."""
+
+    def __init__(self, enabled: bool, max_dimension: int, quality: int, image_format: str, workers: int):
+        self.enabled = enabled and Image is not None
+        if enabled and Image is None:
+            logger.warning("IMAGE_NORMALIZE is set but Pillow is not installed; images are uploaded as-is.")
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self.image_format = image_format.upper() if image_format.upper() in IMAGE_FORMATS else "JPEG"
+        self.workers = workers
+        self._executor = None
+
+    async def prepare(self, image_data: bytes, filename: str) -> tuple:
+        """
+        آماده کردن عکس برای آپلود.
+
+        Args:
+            image_data (bytes): بایت‌های عکس دریافتی از تلگرام
+            filename (str): نام فایل پیشنهادی
+
+        Returns:
+            tuple: (بایت‌های عکس، نام فایل، نوع محتوا)
+        """
+        if not self.enabled:
+            return image_data, filename, "image/jpeg"
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        try:
+            processed = await loop.run_in_executor(
+                self._executor,
+                partial(normalize_image, bytes(image_data), self.max_dimension, self.quality, self.image_format)
+            )
+        except Exception as e:
+            logger.warning(f"Could not normalize {filename}, uploading original: {str(e)}")
+            return image_data, filename, "image/jpeg"
+        extension, content_type = IMAGE_FORMATS[self.image_format]
+        logger.info(f"Normalized {filename}: {len(image_data)} -> {len(processed)} bytes")
+        return processed, f"{os.path.splitext(filename)[0]}.{extension}", content_type
+
+    def shutdown(self):
+        """بستن پروسه‌های پردازش عکس."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+# نمونه سراسری برای استفاده
+image_processor = ImageProcessor(IMAGE_NORMALIZE, IMAGE_MAX_DIMENSION, IMAGE_QUALITY, IMAGE_FORMAT, IMAGE_WORKERS)
@@ -0,0 +1,84 @@
+import time
+from collections import OrderedDict
+from config.settings import MEDIA_CACHE_PATH, MEDIA_CACHE_MAX_ENTRIES, MEDIA_CACHE_VERIFY_AFTER, logger
+from utils.storage import load_json, save_json
+
+class MediaCache:
+    """
+    کش پایدار برای جلوگیری از آپلود دوباره عکس‌ها.
+
+    کلیدها به شکل "file:<file_unique_id>" یا "sha256:<هش محتوا>" هستند و به
+    آیدی مدیای وردپرس اشاره می‌کنند. قدیمی‌ترین کلیدها (LRU) وقتی تعداد از
+    سقف بیشتر شود حذف می‌شوند.
+    """
+
+    def __init__(self, path: str, max_entries: int, verify_after: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.verify_after = verify_after
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        """
+        گرفتن ورودی کش و جابه‌جا کردن آن به انتهای LRU.
+
+        Args:
+            key (str): کلید کش
+
+        Returns:
+            dict یا None: {"media_id": ..., "verified_at": ...}
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def needs_verification(self, entry: dict) -> bool:
+        """آیا باید دوباره بررسی شود که مدیا هنوز در وردپرس وجود دارد؟"""
+        return time.time() - entry["verified_at"] > self.verify_after
+
+    def put(self, keys: list, media_id: int):
+        """ثبت آیدی مدیا برای چند کلید (مثلاً file_unique_id و هش محتوا)."""
+        for key in keys:
+            self._entries[key] = {"media_id": media_id, "verified_at": time.time()}
+            self._entries.move_to_end(key)
+        self._trim()
+
+    def _trim(self):
+        """حذف قدیمی‌ترین کلیدها تا وقتی تعداد از سقف بیشتر است."""
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def remove_media(self, media_id: int):
+        """حذف همه کلیدهایی که به یک مدیای حذف‌شده اشاره می‌کنند."""
+        for key in [key for key, entry in self._entries.items() if entry["media_id"] == media_id]:
+            del self._entries[key]
+
+    def load(self):
+        """بارگذاری کش از دیسک (اگه مسیر تنظیم شده باشه)."""
+        if not self.path:
+            return
+        # فایل به ترتیب LRU ذخیره شده، پس اگه سقف کمتر شده باشد قدیمی‌ترین‌ها حذف می‌شوند
+        self._entries.update(load_json(self.path, {}))
+        self._trim()
+        logger.info(f"Loaded {len(self._entries)} media cache entries from {self.path}")
+
+    def save(self):
+        """ذخیره کش روی دیسک (اگه مسیر تنظیم شده باشه)."""
+        if not self.path:
+            return
+        try:
+            save_json(self.path, self._entries)
+        except OSError as e:
+            logger.error(f"Could not save media cache to {self.path}: {str(e)}")
+
+    def __len__(self):
+        return len(self._entries)
+
+# نمونه سراسری برای استفاده
+media_cache = MediaCache(MEDIA_CACHE_PATH, MEDIA_CACHE_MAX_ENTRIES, MEDIA_CACHE_VERIFY_AFTER)
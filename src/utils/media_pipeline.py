@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+from telegram import PhotoSize
+from config.settings import MEDIA_UPLOAD_CONCURRENCY, MEDIA_STREAM_UPLOADS, logger
+from utils.image_processing import image_processor
+from utils.media_cache import media_cache
+from utils.telegram_utils import iter_file_chunks
+from utils.tracing import tracer
+from utils.user_data import user_data
+from utils.woocommerce import wc_client
+
+class MediaUploadPipeline:
+    """صف آپلود پس‌زمینه عکس‌ها به وردپرس، جدا برای هر کاربر و با موازی‌سازی محدود."""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._sessions = {}
+
+    def _session(self, user_id: str) -> dict:
+        if user_id not in self._sessions:
+            self._sessions[user_id] = {"semaphore": asyncio.Semaphore(self.max_concurrency), "tasks": {}}
+        return self._sessions[user_id]
+
+    def submit(self, user_id: str, key: str, photo: PhotoSize, filename: str):
+        """
+        اضافه کردن یک عکس به صف آپلود کاربر و برگشت فوری.
+
+        Args:
+            user_id (str): آیدی کاربر
+            key (str): کلید یکتای عکس در این سشن (مثلاً "main" یا file_id)
+            photo (PhotoSize): عکس تلگرام
+            filename (str): نام فایل در وردپرس
+        """
+        session = self._session(user_id)
+        task = asyncio.create_task(self._upload(session["semaphore"], photo, filename))
+        task.add_done_callback(lambda t: self._on_done(t, user_id, key, filename))
+        session["tasks"][key] = task
+
+    @staticmethod
+    async def _upload(semaphore: asyncio.Semaphore, photo: PhotoSize, filename: str) -> int:
+        async with semaphore:
+            with tracer.span("media.upload", filename=filename) as span:
+                # اول با file_unique_id (بدون دانلود) و بعد با هش محتوا دنبال آپلود قبلی می‌گردیم
+                file_key = f"file:{photo.file_unique_id}"
+                media_id = await MediaUploadPipeline._cached_media_id(file_key)
+                if media_id:
+                    logger.info(f"Reusing media {media_id} for {filename}")
+                    if span is not None:
+                        span.set("cache", "file")
+                    return media_id
+                file = await photo.get_file()
+                if MEDIA_STREAM_UPLOADS and not image_processor.enabled and file.file_path.startswith("http"):
+                    return await MediaUploadPipeline._stream_upload(file, file_key, filename, photo.file_size)
+                image_data = await file.download_as_bytearray()
+                hash_key = f"sha256:{hashlib.sha256(image_data).hexdigest()}"
+                media_id = await MediaUploadPipeline._cached_media_id(hash_key)
+                if media_id:
+                    logger.info(f"Reusing media {media_id} for {filename} (same content)")
+                    if span is not None:
+                        span.set("cache", "content")
+                    media_cache.put([file_key], media_id)
+                    return media_id
+                with tracer.span("media.normalize", size=len(image_data)):
+                    image_data, filename, content_type = await image_processor.prepare(image_data, filename)
+                media_id = await wc_client.upload_image(image_data, filename, content_type)
+                media_cache.put([file_key, hash_key], media_id)
+                return media_id
+
+    @staticmethod
+    async def _stream_upload(file, file_key: str, filename: str, size: int) -> int:
+        """
+        دانلود stream از تلگرام و آپلود همزمان به وردپرس، بدون نگه داشتن کل عکس در حافظه.
+        هش محتوا حین عبور تکه‌ها محاسبه و بعد از آپلود در کش ثبت می‌شود.
+        """
+        digest = hashlib.sha256()
+
+        async def chunks():
+            async for chunk in iter_file_chunks(file):
+                digest.update(chunk)
+                yield chunk
+
+        media_id = await wc_client.upload_image_stream(chunks(), filename, "image/jpeg", size)
+        media_cache.put([file_key, f"sha256:{digest.hexdigest()}"], media_id)
+        return media_id
+
+    @staticmethod
+    async def _cached_media_id(key: str):
+        """گرفتن آیدی مدیای کش‌شده و بررسی دوره‌ای اینکه در وردپرس حذف نشده باشد."""
+        entry = media_cache.get(key)
+        if entry is None:
+            return None
+        media_id = entry["media_id"]
+        if media_cache.needs_verification(entry):
+            if not await wc_client.media_exists(media_id):
+                logger.info(f"Cached media {media_id} no longer exists in WordPress")
+                media_cache.remove_media(media_id)
+                return None
+            media_cache.put([key], media_id)
+        return media_id
+
+    @staticmethod
+    def _on_done(task: asyncio.Task, user_id: str, key: str, filename: str):
+        if task.cancelled():
+            return
+        if task.exception():
+            logger.error(f"Background upload of {filename} failed: {task.exception()}")
+        elif user_id in user_data.data:
+            # آیدی مدیا در سشن هم ثبت می‌شود تا بعد از ری‌استارت بات از دست نرود
+            media_ids = user_data.get(user_id, "media_ids") or {}
+            media_ids[key] = task.result()
+            user_data.set(user_id, "media_ids", media_ids)
+
+    async def wait(self, user_id: str, keys: list) -> list:
+        """
+        صبر برای تمام شدن آپلود عکس‌های لازم.
+
+        Args:
+            user_id (str): آیدی کاربر
+            keys (list): کلید عکس‌ها به ترتیب دلخواه
+
+        Returns:
+            list: آیدی مدیای وردپرس برای هر کلید، به همان ترتیب
+
+        Raises:
+            Exception: اگه آپلود یکی از عکس‌ها ناموفق بوده باشه
+        """
+        tasks = self._session(user_id)["tasks"]
+        # آپلودهایی که قبل از ری‌استارت تمام شده‌اند فقط در سشن کاربر ثبت شده‌اند
+        saved = user_data.get(user_id, "media_ids") or {}
+        missing = [key for key in keys if key not in tasks and key not in saved]
+        if missing:
+            raise Exception("بعضی از عکس‌ها پیدا نشدن. لطفاً دوباره شروع کن.")
+        results = await asyncio.gather(*(tasks[key] for key in keys if key in tasks))
+        uploaded = dict(zip([key for key in keys if key in tasks], results))
+        return [uploaded[key] if key in uploaded else saved[key] for key in keys]
+
+    def pending(self, user_id: str) -> int:
+        """تعداد آپلودهای هنوز تمام‌نشده کاربر."""
+        session = self._sessions.get(user_id)
+        return sum(not task.done() for task in session["tasks"].values()) if session else 0
+
+    def discard(self, user_id: str, cancel: bool = False):
+        """
+        فراموش کردن آپلودهای کاربر.
+
+        Args:
+            user_id (str): آیدی کاربر
+            cancel (bool): لغو آپلودهایی که هنوز تمام نشده‌اند
+        """
+        session = self._sessions.pop(user_id, None)
+        if session and cancel:
+            for task in session["tasks"].values():
+                task.cancel()
+
+# نمونه سراسری برای استفاده
+media_pipeline = MediaUploadPipeline(MEDIA_UPLOAD_CONCURRENCY)
+
+# آپلودهای سشن‌های منقضی‌شده یا حذف‌شده هم لغو می‌شوند
+user_data.on_evict.append(lambda user_id: media_pipeline.discard(user_id, cancel=True))
@@ -0,0 +1,172 @@
+import bisect
+import functools
+import time
+from collections import deque
+from contextvars import ContextVar
+from utils.tracing import tracer
+
+# بازه‌های پیش‌فرض هیستوگرام‌ها (ثانیه)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+class Histogram:
+    """هیستوگرام با برچسب، به سبک Prometheus."""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # مقادیر برچسب → [شمارش هر بازه، مجموع، تعداد]
+        self._series = {}
+
+    def observe(self, value: float, *labels: str):
+        """ثبت یک مقدار برای ترکیب برچسب‌ها (رشته، به ترتیب labelnames)."""
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels({**base, 'le': bound})} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels({**base, 'le': '+Inf'})} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(base)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(base)} {count}")
+        return lines
+
+class Gauge:
+    """مقداری که هنگام خروجی گرفتن از یک تابع خوانده می‌شود."""
+
+    def __init__(self, name: str, help_text: str, read, kind: str = "gauge"):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+        self.kind = kind
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        value = self.read()
+        if isinstance(value, dict):
+            # {تاپل (نام برچسب، مقدار) ...: عدد}
+            for labels, sample in value.items():
+                lines.append(f"{self.name}{_format_labels(dict(labels))} {sample}")
+        elif value is not None:
+            lines.append(f"{self.name} {value}")
+        return lines
+
+class Registry:
+    """مجموعه متریک‌ها و تولید خروجی متنی Prometheus."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def histogram(self, name: str, help_text: str, labelnames: tuple, buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name: str, help_text: str, read, kind: str = "gauge") -> Gauge:
+        """
+        ثبت (یا جایگزینی) متریکی که مقدارش هنگام خروجی از read() خوانده می‌شود.
+
+        Args:
+            read: تابعی که عدد یا دیکشنری {برچسب‌ها: عدد} برمی‌گرداند
+            kind (str): نوع Prometheus ("gauge" یا "counter")
+        """
+        self._metrics[name] = Gauge(name, help_text, read, kind)
+        return self._metrics[name]
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                continue
+        return "\n".join(lines) + "\n"
+
+# نمونه سراسری برای استفاده
+registry = Registry()
+
+handler_latency = registry.histogram(
+    "hoomak_handler_seconds", "Time spent in conversation handlers", ("handler",)
+)
+woocommerce_latency = registry.histogram(
+    "hoomak_woocommerce_request_seconds", "WooCommerce/WordPress HTTP request latency",
+    ("operation", "method", "status")
+)
+telegram_latency = registry.histogram(
+    "hoomak_telegram_api_seconds", "Telegram Bot API call latency", ("endpoint", "status")
+)
+
+# متد WooCommerceClient که درخواست‌های HTTP فعلی از داخل آن ارسال می‌شوند
+current_operation = ContextVar("current_operation", default="other")
+
+# آخرین تأخیرهای ووکامرس برای /ping: (زمان، ثانیه، کد وضعیت)
+recent_woocommerce = deque(maxlen=50)
+
+def observe_woocommerce(method: str, status, seconds: float):
+    """ثبت تأخیر یک درخواست HTTP به ووکامرس با نام متد فعلی کلاینت (status برای خطای شبکه "error")."""
+    woocommerce_latency.observe(seconds, current_operation.get(), method, str(status))
+    recent_woocommerce.append((time.time(), seconds, str(status)))
+
+def woocommerce_operation(func):
+    """
+    دکوریتور متدهای WooCommerceClient: درخواست‌های داخل آن با نام متد برچسب می‌خورند
+    و برای هر فراخوانی یک span ساخته می‌شود. اگه متد از داخل متد دیگری صدا زده شود،
+    برچسب متریک نام بیرونی‌ترین متد را نگه می‌دارد.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with tracer.span(f"woocommerce.{func.__name__}"):
+            if current_operation.get() != "other":
+                return await func(*args, **kwargs)
+            token = current_operation.set(func.__name__)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                current_operation.reset(token)
+    return wrapper
+
+def timed_callback(callback):
+    """پوشاندن callback یک هندلر تلگرام برای ثبت مدت اجرای آن (متریک و span)."""
+    @functools.wraps(callback)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            with tracer.span(f"handler.{callback.__name__}"):
+                return await callback(*args, **kwargs)
+        finally:
+            handler_latency.observe(time.perf_counter() - start, callback.__name__)
+    return wrapper
+
+def woocommerce_health() -> dict:
+    """خلاصه تأخیر اخیر ووکامرس برای health check."""
+    samples = list(recent_woocommerce)
+    if not samples:
+        return {"recent_requests": 0}
+    latencies = sorted(seconds for _, seconds, _ in samples)
+    errors = sum(1 for _, _, status in samples if status == "error" or int(status) >= 500)
+    return {
+        "recent_requests": len(samples),
+        "last_request_age_s": round(time.time() - samples[-1][0], 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000),
+        "max_ms": round(latencies[-1] * 1000),
+        "errors": errors
+    }
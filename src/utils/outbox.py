@@ -0,0 +1,189 @@
+import asyncio
+import json
+import sqlite3
+import time
+import aiohttp
+from config.settings import OUTBOX_PATH, OUTBOX_WORKERS, OUTBOX_MAX_ATTEMPTS, OUTBOX_DRAIN_TIMEOUT, logger
+from utils.resilience import StoreServerError, StoreUnavailableError
+from utils.tracing import tracer
+from utils.woocommerce import wc_client
+
+class ProductOutbox:
+    """
+    صف پایدار ساخت محصول در ووکامرس.
+
+    هر کار قبل از اجرا در SQLite ثبت می‌شود و workerهای پس‌زمینه آن را اجرا می‌کنند.
+    کارهایی که هنگام خاموش شدن یا کرش تمام نشده‌اند در شروع بعدی دوباره اجرا می‌شوند
+    و create_product با resume=True محصول نیمه‌کاره را کامل می‌کند، نه تکراری.
+    نتیجه هر کار با پیام تلگرام به همان چت اطلاع داده می‌شود.
+    """
+
+    def __init__(self, path: str, workers: int, max_attempts: int, retry_delay: float = 10):
+        self.path = path or ":memory:"
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._connection = None
+        self._queue = None
+        self._lock = None
+        self._bot = None
+        self._worker_tasks = []
+        self._running = set()
+        self._retry_handles = set()
+
+    def _connect(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id INTEGER, payload TEXT,
+                    status TEXT, attempts INTEGER DEFAULT 0, error TEXT, updated_at REAL
+                )
+            """)
+        return self._connection
+
+    def start(self, bot):
+        """
+        شروع workerها و برگرداندن کارهای تمام‌نشده قبلی به صف.
+
+        Args:
+            bot (telegram.Bot): بات برای ارسال نتیجه کارها
+        """
+        self._bot = bot
+        self._queue = asyncio.Queue()
+        self._lock = asyncio.Lock()
+        rows = self._connect().execute(
+            "SELECT id, chat_id, payload, attempts FROM jobs WHERE status IN ('pending', 'running') ORDER BY id"
+        ).fetchall()
+        for job_id, chat_id, payload, attempts in rows:
+            self._queue.put_nowait({"id": job_id, "chat_id": chat_id, "payload": payload, "attempts": attempts})
+        if rows:
+            logger.info(f"Resuming {len(rows)} unfinished product jobs")
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def enqueue(self, chat_id: int, product_json: dict) -> int:
+        """
+        ثبت یک کار ساخت محصول و برگشت فوری.
+
+        Args:
+            chat_id (int): چتی که نتیجه باید به آن ارسال شود
+            product_json (dict): JSON محصول از create_product_json
+
+        Returns:
+            int: شماره کار
+        """
+        payload = json.dumps(product_json, ensure_ascii=False)
+        job_id = await self._execute(
+            "INSERT INTO jobs (chat_id, payload, status, updated_at) VALUES (?, ?, 'pending', ?)",
+            (chat_id, payload, time.time())
+        )
+        self._queue.put_nowait({
+            "id": job_id, "chat_id": chat_id, "payload": payload, "attempts": 0,
+            # trace آپدیت /confirm در کار پس‌زمینه ادامه پیدا می‌کند (فقط در حافظه)
+            "trace": tracer.current_context()
+        })
+        return job_id
+
+    def depth(self) -> int:
+        """تعداد کارهای در صف یا در حال اجرا."""
+        return (self._queue.qsize() if self._queue else 0) + len(self._running)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            task = asyncio.create_task(self._run(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            # shield: لغو worker هنگام خاموش شدن، کار در حال اجرا را قطع نمی‌کند
+            try:
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Product job {job['id']} crashed: {str(e)}")
+
+    async def _run(self, job: dict):
+        with tracer.root("product_job", parent=job.get("trace"), job_id=job["id"], attempt=job["attempts"] + 1):
+            await self._run_job(job)
+
+    async def _run_job(self, job: dict):
+        job["attempts"] += 1
+        await self._set_status(job, "running")
+        try:
+            product_id = await wc_client.create_product(json.loads(job["payload"]), resume=True)
+        # خطاهای شبکه، مدار باز و پاسخ 5xx گذرا هستند و با resume=True تکرارشان محصول تکراری نمی‌سازد
+        except (asyncio.TimeoutError, aiohttp.ClientError, StoreServerError, StoreUnavailableError) as e:
+            if job["attempts"] < self.max_attempts:
+                delay = self.retry_delay * 2 ** (job["attempts"] - 1)
+                logger.warning(f"Product job {job['id']} failed ({type(e).__name__}), retrying in {delay:.0f}s")
+                await self._set_status(job, "pending", str(e))
+                self._schedule_retry(job, delay)
+                return
+            await self._fail(job, "ارتباط با فروشگاه برقرار نشد. لطفاً بعداً دوباره امتحان کن.")
+        except Exception as e:
+            await self._fail(job, str(e))
+        else:
+            await self._set_status(job, "done")
+            logger.info(f"Product job {job['id']} created product {product_id}")
+            await self._notify(job["chat_id"], f"✅ محصول با موفقیت ساخته شد! ID: {product_id}")
+
+    def _schedule_retry(self, job: dict, delay: float):
+        def requeue():
+            self._retry_handles.discard(handle)
+            self._queue.put_nowait(job)
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retry_handles.add(handle)
+
+    async def _fail(self, job: dict, message: str):
+        logger.error(f"Product job {job['id']} failed: {message}")
+        await self._set_status(job, "failed", message)
+        await self._notify(job["chat_id"], f"❌ خطا در ساخت محصول: {message}")
+
+    async def _notify(self, chat_id: int, text: str):
+        try:
+            await self._bot.send_message(chat_id=chat_id, text=text)
+        except Exception as e:
+            logger.error(f"Could not notify chat {chat_id}: {str(e)}")
+
+    async def _set_status(self, job: dict, status: str, error: str = None):
+        await self._execute(
+            "UPDATE jobs SET status = ?, attempts = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, job["attempts"], error, time.time(), job["id"])
+        )
+
+    async def _execute(self, sql: str, params: tuple) -> int:
+        """اجرای یک دستور در یک تراکنش، خارج از event loop."""
+        async with self._lock:
+            return await asyncio.get_running_loop().run_in_executor(None, self._execute_sync, sql, params)
+
+    def _execute_sync(self, sql: str, params: tuple) -> int:
+        connection = self._connect()
+        with connection:
+            return connection.execute(sql, params).lastrowid
+
+    async def stop(self, timeout: float = OUTBOX_DRAIN_TIMEOUT):
+        """
+        توقف workerها و صبر برای تمام شدن کارهای در حال اجرا.
+
+        کارهایی که تا timeout تمام نشوند لغو می‌شوند و در شروع بعدی ادامه پیدا می‌کنند.
+        """
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        if self._running:
+            logger.info(f"Waiting for {len(self._running)} product jobs to finish")
+            _, unfinished = await asyncio.wait(set(self._running), timeout=timeout)
+            for task in unfinished:
+                task.cancel()
+            # کار لغوشده ممکن است هنوز وضعیتش را بنویسد؛ اتصال بعد از تمام شدنش بسته می‌شود
+            await asyncio.gather(*unfinished, return_exceptions=True)
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+# نمونه سراسری برای استفاده
+product_outbox = ProductOutbox(OUTBOX_PATH, OUTBOX_WORKERS, OUTBOX_MAX_ATTEMPTS)
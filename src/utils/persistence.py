@@ -0,0 +1,145 @@
+import asyncio
+import json
+import sqlite3
+from telegram.ext import BasePersistence, PersistenceInput
+from config.settings import PERSISTENCE_INTERVAL, logger
+from utils.user_data import Session, user_data
+
+class SqlitePersistence(BasePersistence):
+    """
+    ذخیره وضعیت ConversationHandler و سشن‌های UserData در SQLite.
+
+    تغییرات در حافظه جمع می‌شوند و در هر دور update_persistence اپلیکیشن (هر
+    PERSISTENCE_INTERVAL ثانیه) یا هنگام خاموش شدن، با یک تراکنش و در یک thread
+    جدا نوشته می‌شوند؛ پس هیچ آپدیتی منتظر نوشتن روی دیسک نمی‌ماند. bot_data
+    هم ذخیره می‌شود و فراخوانی دوره‌ای update_bot_data نقطه شروع نوشتن است.
+    """
+
+    def __init__(self, path: str, update_interval: float = PERSISTENCE_INTERVAL):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=True, chat_data=False, user_data=False, callback_data=False),
+            update_interval=update_interval
+        )
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS conversations (name TEXT, key TEXT, state TEXT, PRIMARY KEY (name, key));
+            CREATE TABLE IF NOT EXISTS sessions (user_id TEXT PRIMARY KEY, data TEXT);
+            CREATE TABLE IF NOT EXISTS bot_data (id INTEGER PRIMARY KEY CHECK (id = 0), data TEXT);
+        """)
+        self._pending_conversations = {}
+        self._pending_bot_data = None
+        self._last_bot_data = None
+        self._write_lock = None
+
+    async def get_conversations(self, name: str) -> dict:
+        rows = self._connection.execute("SELECT key, state FROM conversations WHERE name = ?", (name,)).fetchall()
+        return {tuple(json.loads(key)): json.loads(state) for key, state in rows}
+
+    async def update_conversation(self, name: str, key, new_state) -> None:
+        self._pending_conversations[(name, json.dumps(list(key)))] = new_state
+
+    async def get_bot_data(self) -> dict:
+        row = self._connection.execute("SELECT data FROM bot_data WHERE id = 0").fetchone()
+        return json.loads(row[0]) if row else {}
+
+    async def update_bot_data(self, data) -> None:
+        self._pending_bot_data = data
+        # اجازه می‌دهیم update_conversationهای همین دور هم ثبت شوند تا همه با یک تراکنش نوشته شوند
+        await asyncio.sleep(0)
+        await self._write()
+
+    async def refresh_bot_data(self, bot_data) -> None:
+        pass
+
+    async def get_user_data(self) -> dict:
+        return {}
+
+    async def update_user_data(self, user_id: int, data) -> None:
+        pass
+
+    async def refresh_user_data(self, user_id: int, user_data) -> None:
+        pass
+
+    async def drop_user_data(self, user_id: int) -> None:
+        pass
+
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def update_chat_data(self, chat_id: int, data) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def get_callback_data(self):
+        return None
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def flush(self) -> None:
+        await self._write()
+        self._connection.close()
+
+    def restore_sessions(self) -> int:
+        """
+        بازگرداندن سشن‌های ذخیره‌شده به UserData هنگام شروع.
+
+        Returns:
+            int: تعداد سشن‌های بازگردانده‌شده
+        """
+        rows = self._connection.execute("SELECT user_id, data FROM sessions").fetchall()
+        for user_id, data in rows:
+            session = Session()
+            for field, value in json.loads(data).items():
+                setattr(session, field, value)
+            user_data.data[user_id] = session
+        user_data.dirty.clear()
+        logger.info(f"Restored {len(rows)} sessions from {self.path}")
+        return len(rows)
+
+    async def _write(self):
+        """نوشتن همه تغییرات جمع‌شده در یک تراکنش، خارج از event loop."""
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        async with self._write_lock:
+            conversations, self._pending_conversations = self._pending_conversations, {}
+            bot_data, self._pending_bot_data = self._pending_bot_data, None
+            # سریال‌سازی سشن‌ها روی همین thread انجام می‌شود تا با هندلرها تداخل نداشته باشد
+            sessions = {}
+            for user_id in user_data.dirty:
+                session = user_data.data.get(user_id)
+                sessions[user_id] = json.dumps(session.to_dict(), ensure_ascii=False) if session else None
+            user_data.dirty.clear()
+            bot_data = json.dumps(bot_data) if bot_data is not None else None
+            if bot_data == self._last_bot_data:
+                bot_data = None
+            if not conversations and not sessions and bot_data is None:
+                return
+            self._last_bot_data = bot_data or self._last_bot_data
+            await asyncio.get_running_loop().run_in_executor(None, self._commit, conversations, sessions, bot_data)
+
+    def _commit(self, conversations: dict, sessions: dict, bot_data: str):
+        with self._connection:
+            for (name, key), state in conversations.items():
+                if state is None:
+                    self._connection.execute("DELETE FROM conversations WHERE name = ? AND key = ?", (name, key))
+                else:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO conversations (name, key, state) VALUES (?, ?, ?)",
+                        (name, key, json.dumps(state))
+                    )
+            for user_id, data in sessions.items():
+                if data is None:
+                    self._connection.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+                else:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO sessions (user_id, data) VALUES (?, ?)", (user_id, data)
+                    )
+            if bot_data is not None:
+                self._connection.execute("INSERT OR REPLACE INTO bot_data (id, data) VALUES (0, ?)", (bot_data,))
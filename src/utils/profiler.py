@@ -0,0 +1,209 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from config.settings import PROFILE_MAX_DURATION, logger
+
+# فاصله نمونه‌برداری از stack حلقه رویداد (ثانیه)
+SAMPLE_INTERVAL = 0.005
+# عمق traceback ذخیره‌شده برای هر تخصیص حافظه
+MEMORY_FRAMES = 25
+
+_SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class ProfilerBusyError(Exception):
+    """یک پروفایل دیگر در حال اجراست."""
+
+    def __init__(self, message: str = "⏳ یه پروفایل دیگه در حال اجراست. چند لحظه دیگه دوباره امتحان کن."):
+        super().__init__(message)
+
+def _source_path(filename: str) -> str:
+    """مسیر فایل نسبت به src (برای فایل‌های بات) یا فقط نام فایل (برای کتابخانه‌ها)."""
+    if filename.startswith(_SOURCE_ROOT):
+        return os.path.relpath(filename, _SOURCE_ROOT).replace(os.sep, "/")
+    return os.path.basename(filename)
+
+def _label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{_source_path(code.co_filename)}:{name}".replace(" ", "_").replace(";", ",")
+
+def _collapse(frame) -> tuple:
+    """stack یک frame از ریشه تا عمیق‌ترین تابع."""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+def _is_handler(label: str) -> bool:
+    return label.startswith("handlers/") and not label.startswith("handlers/conversation.py")
+
+def _is_woocommerce(label: str) -> bool:
+    return label.startswith("utils/woocommerce.py:WooCommerceClient.")
+
+def _top(counter: Counter, total: int, limit: int = 5) -> str:
+    if not counter or not total:
+        return "-"
+    return ", ".join(f"{label.split(':', 1)[1]} {count * 100 / total:.0f}%" for label, count in counter.most_common(limit))
+
+class Profiler:
+    """
+    پروفایل بات در حال اجرا برای یک بازه محدود، به درخواست ادمین.
+
+    سه حالت دارد: sample (نمونه‌برداری از stack حلقه رویداد از یک thread جدا و خروجی
+    collapsed stacks برای flamegraph)، cpu (cProfile) و memory (tracemalloc و مقایسه
+    تخصیص‌های اول و آخر بازه). هر حالت فقط در طول بازه فعال است، پس وقتی پروفایلی
+    در حال اجرا نیست هیچ هزینه‌ای ندارد. در گزارش‌ها زمان/حافظه به هندلرهای گفتگو و
+    متدهای WooCommerceClient نسبت داده می‌شود.
+    """
+
+    MODES = ("sample", "cpu", "memory")
+
+    def __init__(self, max_duration: float):
+        self.max_duration = max_duration
+        self.running = None
+
+    async def profile(self, mode: str, duration: float) -> tuple:
+        """
+        اجرای پروفایلر روی حلقه رویداد فعلی.
+
+        Args:
+            mode (str): یکی از MODES
+            duration (float): طول بازه (ثانیه)، حداکثر max_duration
+
+        Returns:
+            tuple: (نام فایل، محتوای گزارش به بایت، خلاصه متنی)
+
+        Raises:
+            ValueError: اگه mode نامعتبر باشد
+            ProfilerBusyError: اگه پروفایل دیگری در حال اجرا باشد
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        if self.running:
+            raise ProfilerBusyError()
+        duration = min(max(duration, 1), self.max_duration)
+        self.running = mode
+        logger.info(f"Profiling ({mode}) for {duration:.0f}s")
+        try:
+            return await getattr(self, f"_profile_{mode}")(duration)
+        finally:
+            self.running = None
+
+    async def _profile_sample(self, duration: float) -> tuple:
+        target = threading.get_ident()
+        stacks = Counter()
+        stop = threading.Event()
+
+        def sampler():
+            while not stop.wait(SAMPLE_INTERVAL):
+                frame = sys._current_frames().get(target)
+                if frame is not None:
+                    stacks[_collapse(frame)] += 1
+
+        thread = threading.Thread(target=sampler, name="profiler-sampler", daemon=True)
+        thread.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            stop.set()
+            thread.join()
+
+        total = sum(stacks.values())
+        # وقتی حلقه بیکار است، عمیق‌ترین frame انتظار روی selector است
+        busy = {stack: count for stack, count in stacks.items() if not stack[-1].startswith("selectors.py:")}
+        busy_total = sum(busy.values())
+        handlers, woocommerce = Counter(), Counter()
+        for stack, count in busy.items():
+            for label in {label for label in stack if _is_handler(label)}:
+                handlers[label] += count
+            for label in {label for label in stack if _is_woocommerce(label)}:
+                woocommerce[label] += count
+        folded = "".join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(busy.items(), key=lambda item: -item[1]))
+        summary = (
+            f"🔬 {total} نمونه در {duration:.0f} ثانیه، {busy_total * 100 / max(total, 1):.0f}% مشغول\n"
+            f"هندلرها: {_top(handlers, busy_total)}\n"
+            f"ووکامرس: {_top(woocommerce, busy_total)}"
+        )
+        return f"profile-sample-{int(time.time())}.folded", folded.encode(), summary
+
+    async def _profile_cpu(self, duration: float) -> tuple:
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profile.disable()
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profile, stream=stream).sort_stats("cumulative")
+        stream.write("=== Conversation handlers ===\n")
+        stats.print_stats(r"handlers[/\\](?!conversation)")
+        stream.write("=== WooCommerceClient ===\n")
+        stats.print_stats(r"utils[/\\]woocommerce\.py")
+        stream.write("=== Top functions by cumulative time ===\n")
+        stats.print_stats(40)
+
+        handlers, woocommerce = Counter(), Counter()
+        for (filename, _, name), (_, _, _, cumulative, _) in stats.stats.items():
+            label = f"{_source_path(filename)}:{name}"
+            if _is_handler(label):
+                handlers[name] += cumulative
+            elif label.startswith("utils/woocommerce.py:"):
+                woocommerce[name] += cumulative
+        summary = (
+            f"🔬 cProfile {duration:.0f} ثانیه، {stats.total_calls} فراخوانی\n"
+            f"هندلرها (ثانیه): {', '.join(f'{name} {seconds:.2f}' for name, seconds in handlers.most_common(5)) or '-'}\n"
+            f"ووکامرس (ثانیه): {', '.join(f'{name} {seconds:.2f}' for name, seconds in woocommerce.most_common(5)) or '-'}"
+        )
+        return f"profile-cpu-{int(time.time())}.txt", stream.getvalue().encode(), summary
+
+    async def _profile_memory(self, duration: float) -> tuple:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(MEMORY_FRAMES)
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        try:
+            before = tracemalloc.take_snapshot().filter_traces(ignore)
+            await asyncio.sleep(duration)
+            after = tracemalloc.take_snapshot().filter_traces(ignore)
+        finally:
+            if started:
+                tracemalloc.stop()
+
+        lines = ["=== Top allocations (current size, growth during the window) ==="]
+        for stat in after.compare_to(before, "lineno")[:40]:
+            lines.append(str(stat))
+        # رشد حافظه به عمیق‌ترین خط هندلر و متد ووکامرس در traceback هر تخصیص نسبت داده می‌شود
+        handlers, woocommerce = Counter(), Counter()
+        for stat in after.compare_to(before, "traceback"):
+            if stat.size_diff <= 0:
+                continue
+            frames = [f"{_source_path(frame.filename)}:{frame.lineno}" for frame in stat.traceback]
+            handler = next((frame for frame in reversed(frames) if _is_handler(frame)), None)
+            client = next((frame for frame in reversed(frames) if frame.startswith("utils/woocommerce.py:")), None)
+            if handler:
+                handlers[handler] += stat.size_diff
+            if client:
+                woocommerce[client] += stat.size_diff
+        for title, counter in (("Conversation handlers", handlers), ("WooCommerceClient", woocommerce)):
+            lines.append(f"\n=== Growth attributed to {title} ===")
+            lines.extend(f"{location}: {size / 1024:+.1f} KiB" for location, size in counter.most_common(20))
+
+        growth = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+        summary = (
+            f"🔬 tracemalloc {duration:.0f} ثانیه، رشد {growth / 1024:+.0f} KiB\n"
+            f"هندلرها: {', '.join(f'{location} {size / 1024:+.0f}KiB' for location, size in handlers.most_common(3)) or '-'}\n"
+            f"ووکامرس: {', '.join(f'{location} {size / 1024:+.0f}KiB' for location, size in woocommerce.most_common(3)) or '-'}"
+        )
+        return f"profile-memory-{int(time.time())}.txt", "\n".join(lines).encode(), summary
+
+# نمونه سراسری برای استفاده
+profiler = Profiler(PROFILE_MAX_DURATION)
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from config.settings import logger
+
+class StoreUnavailableError(Exception):
+    """فروشگاه فعلاً در دسترس نیست و درخواست بدون ارسال رد شده."""
+
+    def __init__(self, message: str = "⏳ فروشگاه فعلاً پاسخ نمی‌ده. چند دقیقه دیگه دوباره امتحان کن."):
+        super().__init__(message)
+
+class StoreServerError(StoreUnavailableError):
+    """
+    فروشگاه با خطای سرور (5xx) جواب داده؛ خطایی گذرا که بعداً می‌شود دوباره امتحانش کرد.
+
+    درخواست‌های POST در HttpPool دوباره ارسال نمی‌شوند، پس تکرار به عهده صدا‌زننده است.
+    """
+
+    def __init__(self, status: int, message: str = "⏳ فروشگاه با خطای سرور جواب داد. چند دقیقه دیگه دوباره امتحان کن."):
+        super().__init__(message)
+        self.status = status
+
+class AdaptiveLimiter:
+    """
+    محدودکننده مشترک درخواست‌ها به یک سرور: token bucket برای نرخ و سقف همزمانی تطبیقی.
+
+    سقف همزمانی با هر پاسخ موفق کم‌کم بالا می‌رود و با هر 429 (یا 503 همراه
+    Retry-After) نصف می‌شود؛ اگه سرور Retry-After بفرستد، همه درخواست‌ها تا آن
+    زمان صبر می‌کنند.
+    """
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int, min_concurrency: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.throttled = 0
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._wake = None
+
+    def _try_acquire(self) -> float:
+        """گرفتن یک جا اگه ممکن باشه؛ در غیر این صورت حداکثر زمان انتظار تا بررسی بعدی."""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.in_flight >= int(self.limit):
+            return 1.0
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            self._tokens -= 1
+        self.in_flight += 1
+        return 0
+
+    async def acquire(self):
+        """صبر تا وقتی که نرخ و سقف همزمانی اجازه ارسال درخواست بدهند."""
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        while True:
+            delay = self._try_acquire()
+            if not delay:
+                return
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, status: int = None, retry_after: str = None):
+        """
+        آزاد کردن جا و تنظیم سقف همزمانی بر اساس پاسخ.
+
+        Args:
+            status (int, optional): کد وضعیت پاسخ (None یعنی خطای شبکه)
+            retry_after (str, optional): مقدار هدر Retry-After
+        """
+        self.in_flight -= 1
+        if status == 429 or (status == 503 and retry_after):
+            self.throttled += 1
+            try:
+                pause = float(retry_after) if retry_after else 1.0
+            except ValueError:
+                pause = 1.0
+            now = time.monotonic()
+            # چند 429 همزمان از یک موج درخواست فقط یک بار سقف را نصف می‌کنند
+            if now >= self._paused_until:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                logger.warning(f"Store is throttling us, concurrency limit now {int(self.limit)}, pausing {pause:.1f}s")
+            self._paused_until = max(self._paused_until, now + pause)
+        elif status is not None and status < 500:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        if self._wake is not None:
+            self._wake.set()
+
+class CircuitBreaker:
+    """
+    قطع‌کننده مدار: بعد از threshold خطای پشت سر هم، درخواست‌ها تا reset_timeout
+    ثانیه بدون ارسال رد می‌شوند و بعد یک درخواست آزمایشی اجازه عبور می‌گیرد.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        """آیا درخواست می‌تواند ارسال شود؟ در حالت half-open فقط یک درخواست آزمایشی."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open":
+            return False
+        now = time.monotonic()
+        if self._trial_at is not None and now - self._trial_at < self.reset_timeout:
+            return False
+        self._trial_at = now
+        return True
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info("Store is healthy again, closing circuit breaker")
+        self.failures = 0
+        self.opened_at = None
+        self._trial_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_at is not None or (self.opened_at is None and self.failures >= self.threshold):
+            logger.error(f"Store unhealthy after {self.failures} failures, opening circuit breaker")
+            self.opened_at = time.monotonic()
+            self._trial_at = None
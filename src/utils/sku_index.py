@@ -0,0 +1,83 @@
+import time
+from config.settings import logger
+from utils.storage import load_json, save_json
+
+class SkuIndex:
+    """ایندکس درون‌حافظه‌ای SKU → محصول با ذخیره اختیاری روی دیسک."""
+
+    def __init__(self, ttl: float, path: str = None):
+        self.ttl = ttl
+        self.path = path
+        self._entries = {}
+        # آیدی محصول → SKU، برای حذف یا تغییر SKU بدون پیمایش کل ایندکس
+        self._skus = {}
+
+    @staticmethod
+    def compact(product: dict) -> dict:
+        """نگه داشتن فقط فیلدهای لازم محصول برای ایندکس."""
+        return {"id": product["id"], "sku": product["sku"], "name": product.get("name")}
+
+    def get(self, sku: str):
+        """
+        گرفتن محصول ایندکس‌شده اگه هنوز تازه باشه.
+
+        Args:
+            sku (str): SKU محصول
+
+        Returns:
+            dict یا None: محصول فشرده (id، sku، name) یا None اگه نباشه یا کهنه شده باشه
+        """
+        entry = self._entries.get(sku)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+    def get_stale(self, sku: str):
+        """گرفتن محصول ایندکس‌شده بدون توجه به تازگی (برای پاسخ موقت تا به‌روزرسانی)."""
+        entry = self._entries.get(sku)
+        return entry[1] if entry else None
+
+    def put(self, product: dict):
+        """اضافه یا به‌روزرسانی یک محصول در ایندکس."""
+        if not product.get("sku"):
+            return
+        if self._skus.get(product["id"]) != product["sku"]:
+            # SKU محصول عوض شده (یا محصول تازه است)
+            self.remove_product(product["id"])
+        self._entries[product["sku"]] = (time.time(), self.compact(product))
+        self._skus[product["id"]] = product["sku"]
+
+    def remove(self, sku: str):
+        """حذف یک SKU از ایندکس."""
+        entry = self._entries.pop(sku, None)
+        if entry is not None and self._skus.get(entry[1]["id"]) == sku:
+            del self._skus[entry[1]["id"]]
+
+    def remove_product(self, product_id: int):
+        """حذف SKU یک محصول از ایندکس (مثلاً بعد از حذف آن در فروشگاه)."""
+        sku = self._skus.pop(product_id, None)
+        entry = self._entries.get(sku)
+        # SKU ممکن است بعداً به محصول دیگری داده شده باشد
+        if entry is not None and entry[1]["id"] == product_id:
+            del self._entries[sku]
+
+    def load(self):
+        """بارگذاری ایندکس از دیسک (اگه مسیر تنظیم شده باشه)."""
+        if not self.path:
+            return
+        entries = load_json(self.path, {})
+        self._entries.update({sku: tuple(entry) for sku, entry in entries.items()})
+        self._skus.update({entry[1]["id"]: sku for sku, entry in entries.items()})
+        logger.info(f"Loaded {len(entries)} SKUs from {self.path}")
+
+    def save(self):
+        """ذخیره ایندکس روی دیسک (اگه مسیر تنظیم شده باشه)."""
+        if not self.path:
+            return
+        try:
+            save_json(self.path, self._entries)
+        except OSError as e:
+            logger.error(f"Could not save SKU index to {self.path}: {str(e)}")
+
+    def __len__(self):
+        return len(self._entries)
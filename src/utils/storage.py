@@ -0,0 +1,39 @@
+import json
+import os
+from config.settings import logger
+
+def load_json(path: str, default=None):
+    """
+    خواندن یک فایل JSON از دیسک.
+
+    Args:
+        path (str): مسیر فایل
+        default: مقدار برگشتی اگه فایل نباشه یا خراب باشه
+
+    Returns:
+        داده خوانده‌شده یا default
+    """
+    if not path or not os.path.exists(path):
+        return default
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read {path}: {str(e)}")
+        return default
+
+def save_json(path: str, data):
+    """
+    نوشتن اتمیک داده در فایل JSON (اول فایل موقت، بعد جایگزینی).
+
+    Args:
+        path (str): مسیر فایل
+        data: داده قابل تبدیل به JSON
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
@@ -0,0 +1,42 @@
+import base64
+import hashlib
+import hmac
+
+# موضوع‌های وب‌هوک ووکامرس که روی کش‌ها اعمال می‌شوند
+PRODUCT_TOPICS = ("product.created", "product.updated", "product.restored", "product.deleted")
+
+class StoreWebhook:
+    """
+    ورودی وب‌هوک‌های محصول ووکامرس: بررسی امضا و آمار رویدادها.
+
+    ووکامرس بدنه خام هر تحویل را با کلید مشترک HMAC-SHA256 می‌کند و نتیجه base64 را
+    در هدر X-WC-Webhook-Signature می‌فرستد.
+    """
+
+    def __init__(self, secret: str):
+        self.secret = secret
+        self.applied = 0
+        self.ignored = 0
+        self.rejected = 0
+        self.pings = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.secret)
+
+    def verify(self, body: bytes, signature: str) -> bool:
+        """مقایسه امضای HMAC بدنه با هدر X-WC-Webhook-Signature در زمان ثابت."""
+        expected = base64.b64encode(hmac.new(self.secret.encode(), body, hashlib.sha256).digest())
+        if signature is None or not hmac.compare_digest(signature.encode(), expected):
+            self.rejected += 1
+            return False
+        return True
+
+    def stats(self) -> dict:
+        """آمار وب‌هوک‌های فروشگاه برای مانیتورینگ."""
+        return {
+            "applied": self.applied,
+            "ignored": self.ignored,
+            "rejected": self.rejected,
+            "pings": self.pings
+        }
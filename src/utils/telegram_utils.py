@@ -1,6 +1,11 @@
-from telegram import InlineKeyboardMarkup, Update
+import time
+from telegram import File, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
-from config.settings import logger
+from telegram.request import HTTPXRequest
+from config.settings import MEDIA_STREAM_CHUNK_SIZE, logger
+from utils.http import http_pool
+from utils.metrics import telegram_latency
+from utils.tracing import tracer
 
 async def send_message_with_keyboard(update: Update, text: str, keyboard: list, context: ContextTypes.DEFAULT_TYPE) -> int:
     """
@@ -32,4 +37,36 @@ async def delete_previous_message(context: ContextTypes.DEFAULT_TYPE, chat_id: i
     try:
         await context.bot.delete_message(chat_id=chat_id, message_id=message_id)
     except Exception as e:
-        logger.debug(f"Could not delete message {message_id}: {str(e)}")
\ No newline at end of file
+        logger.debug(f"Could not delete message {message_id}: {str(e)}")
+
+async def iter_file_chunks(file: File, chunk_size: int = MEDIA_STREAM_CHUNK_SIZE):
+    """
+    دانلود stream فایل تلگرام به‌صورت تکه‌تکه بدون بافر کردن کل فایل.
+
+    Args:
+        file (File): فایل تلگرام (خروجی get_file)
+        chunk_size (int): اندازه هر تکه به بایت
+
+    Yields:
+        bytes: تکه‌های فایل
+    """
+    async with http_pool.get_session().get(file.file_path) as response:
+        if response.status != 200:
+            raise Exception(f"Telegram file download failed: {response.status}")
+        async for chunk in response.content.iter_chunked(chunk_size):
+            yield chunk
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest که مدت هر فراخوانی Bot API را در متریک‌ها و span جاری ثبت می‌کند."""
+
+    async def do_request(self, url: str, method: str, *args, **kwargs):
+        # دانلود فایل‌ها مسیر فایل را در آدرس دارند؛ برای جلوگیری از برچسب‌های زیاد یک نام ثابت می‌گیرند
+        endpoint = "file_download" if "/file/bot" in url else url.rsplit("/", 1)[-1]
+        status = "error"
+        start = time.perf_counter()
+        try:
+            with tracer.span(f"telegram.{endpoint}"):
+                status, payload = await super().do_request(url, method, *args, **kwargs)
+            return status, payload
+        finally:
+            telegram_latency.observe(time.perf_counter() - start, endpoint, str(status))
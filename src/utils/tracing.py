@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from config.settings import TRACE_SAMPLE_RATE, TRACE_EXPORT_PATH, TRACE_OTLP_ENDPOINT, TRACE_FLUSH_INTERVAL, logger
+from utils.http import http_pool
+
+# بیشترین تعداد span که منتظر نوشتن می‌مانند؛ بیشتر از این دور ریخته می‌شوند
+MAX_BUFFERED_SPANS = 10000
+
+class Span:
+    """یک بازه زمانی در trace، مثل پردازش یک آپدیت یا یک درخواست به ووکامرس."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, attributes: dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.error = None
+
+    def set(self, key: str, value):
+        """اضافه کردن یک ویژگی به span."""
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+    def to_otlp(self) -> dict:
+        attributes = [
+            {"key": key, "value": {"intValue": str(value)} if isinstance(value, int) else {"stringValue": str(value)}}
+            for key, value in self.attributes.items()
+        ]
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": attributes,
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+# span فعلی؛ None یعنی این آپدیت نمونه‌برداری نشده و spanهای داخلی هیچ کاری نمی‌کنند
+_current_span = ContextVar("current_span", default=None)
+
+class Tracer:
+    """
+    tracing سبک با contextvars.
+
+    هر آپدیت (یا کار صف ساخت محصول) با احتمال sample_rate یک span ریشه می‌گیرد؛
+    spanهای داخلی فقط وقتی ساخته می‌شوند که span والد وجود داشته باشد، پس
+    آپدیت‌های نمونه‌برداری‌نشده تقریباً هزینه‌ای ندارند. spanهای تمام‌شده در
+    حافظه جمع و هر flush_interval ثانیه به فایل JSONL و/یا collector سازگار با
+    OTLP/HTTP (JSON) فرستاده می‌شوند.
+    """
+
+    def __init__(self, sample_rate: float, path: str = None, otlp_endpoint: str = None, flush_interval: float = 5):
+        self.sample_rate = sample_rate
+        self.path = path
+        self.otlp_endpoint = otlp_endpoint
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._buffer = []
+        self._flush_task = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and bool(self.path or self.otlp_endpoint)
+
+    @contextmanager
+    def root(self, name: str, parent: tuple = None, **attributes):
+        """
+        شروع span ریشه با تصمیم نمونه‌برداری.
+
+        Args:
+            name (str): نام span
+            parent (tuple, optional): (trace_id، span_id) از current_context(); اگه داده شود همیشه ثبت می‌شود
+            **attributes: ویژگی‌های span
+        """
+        sampled = self.enabled and (parent is not None or random.random() < self.sample_rate)
+        span = None
+        if sampled:
+            trace_id, parent_id = parent or (os.urandom(16).hex(), None)
+            span = Span(name, trace_id, parent_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if span is not None:
+                span.error = repr(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            if span is not None:
+                self._finish(span)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """شروع span فرزند زیر span فعلی (اگه trace فعلی نمونه‌برداری نشده باشد کاری نمی‌کند)."""
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+        span = Span(name, parent.trace_id, parent.span_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span)
+
+    @staticmethod
+    def current_context():
+        """(trace_id، span_id) span فعلی برای ادامه trace در یک کار پس‌زمینه، یا None."""
+        span = _current_span.get()
+        return (span.trace_id, span.span_id) if span else None
+
+    def _finish(self, span: Span):
+        span.end_ns = time.time_ns()
+        if len(self._buffer) >= MAX_BUFFERED_SPANS:
+            self.dropped += 1
+            return
+        self._buffer.append(span)
+
+    def start(self):
+        """شروع flush دوره‌ای spanها."""
+        if self.enabled and self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """نوشتن spanهای جمع‌شده در فایل JSONL و/یا ارسال به collector."""
+        spans, self._buffer = self._buffer, []
+        if not spans:
+            return
+        if self.path:
+            lines = "".join(json.dumps(span.to_dict(), ensure_ascii=False) + "\n" for span in spans)
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._append, lines)
+            except OSError as e:
+                logger.error(f"Could not write spans to {self.path}: {str(e)}")
+        if self.otlp_endpoint:
+            await self._send_otlp(spans)
+
+    def _append(self, lines: str):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    async def _send_otlp(self, spans: list):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "hoomak"}}]},
+                "scopeSpans": [{"scope": {"name": "hoomak"}, "spans": [span.to_otlp() for span in spans]}]
+            }]
+        }
+        try:
+            async with http_pool.get_session().post(self.otlp_endpoint, json=payload) as response:
+                if response.status >= 300:
+                    logger.warning(f"OTLP collector returned {response.status}")
+        except Exception as e:
+            logger.warning(f"Could not send spans to {self.otlp_endpoint}: {str(e)}")
+
+    async def stop(self):
+        """توقف flush دوره‌ای و نوشتن spanهای باقی‌مانده."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+# نمونه سراسری برای استفاده
+tracer = Tracer(TRACE_SAMPLE_RATE, TRACE_EXPORT_PATH, TRACE_OTLP_ENDPOINT, TRACE_FLUSH_INTERVAL)
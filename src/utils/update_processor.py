@@ -0,0 +1,65 @@
+import asyncio
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+from utils.tracing import tracer
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    پردازش همزمان آپدیت‌های کاربران مختلف، با حفظ ترتیب آپدیت‌های هر گفتگو.
+
+    آپدیت‌های یک (چت، کاربر) با یک قفل FIFO پشت سر هم اجرا می‌شوند و بقیه
+    کاربران موازی جلو می‌روند. سقف max_running فقط بعد از گرفتن قفل گفتگو اعمال
+    می‌شود تا آپدیت‌های منتظر یک کاربر جای بقیه را نگیرند؛ سمافور کلاس پایه
+    (max_concurrent_updates) فقط تعداد کل آپدیت‌های پذیرفته‌شده را محدود می‌کند.
+    """
+
+    __slots__ = ("max_running", "_workers", "_locks")
+
+    def __init__(self, max_running: int, max_waiting: int = 256):
+        super().__init__(max(max_waiting, max_running))
+        self.max_running = max_running
+        self._workers = asyncio.Semaphore(max_running)
+        # کلید گفتگو → [قفل، تعداد آپدیت‌های در حال اجرا یا منتظر]
+        self._locks = {}
+
+    @staticmethod
+    def _key(update: object):
+        if not isinstance(update, Update):
+            return None
+        chat_id = update.effective_chat.id if update.effective_chat else None
+        user_id = update.effective_user.id if update.effective_user else None
+        if chat_id is None and user_id is None:
+            return None
+        return chat_id, user_id
+
+    async def do_process_update(self, update: object, coroutine) -> None:
+        key = self._key(update)
+        update_id = update.update_id if isinstance(update, Update) else 0
+        with tracer.root("update", update_id=update_id) as span:
+            if key is None:
+                async with self._workers:
+                    await coroutine
+                return
+            if span is not None:
+                span.set("chat_id", key[0] or 0)
+                span.set("user_id", key[1] or 0)
+            entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+            entry[1] += 1
+            try:
+                async with entry[0]:
+                    async with self._workers:
+                        await coroutine
+            finally:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+    def waiting(self) -> int:
+        """تعداد آپدیت‌هایی که پذیرفته شده‌اند ولی هنوز تمام نشده‌اند."""
+        return sum(count for _, count in self._locks.values())
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -1,45 +1,151 @@
-class UserData:
-    """مدیریت داده‌های کاربر به‌صورت مرکزی."""
-    
+import sys
+import time
+from collections import OrderedDict
+from config.settings import SESSION_TTL, SESSION_MAX, logger
+
+# همه فیلدهایی که ویزاردهای ایجاد، ویرایش و لینک محصول در سشن نگه می‌دارند
+SESSION_FIELDS = (
+    "title", "description", "main_image_id", "gallery_image_ids", "gallery_file_ids",
+    "gallery_message_sent", "sizes", "color", "upper", "sole", "usage", "sku", "price",
+    "tags", "brand", "json", "color_message_id", "upper_message_id", "sole_message_id",
+    "usage_message_id", "edit_product", "edit_message_id", "media_ids"
+)
+
+class Session:
+    """داده‌های یک کاربر در طول ویزارد، با __slots__ به‌جای دیکشنری آزاد."""
+
+    __slots__ = SESSION_FIELDS + ("touched_at",)
+
     def __init__(self):
-        self.data = {}
+        for field in SESSION_FIELDS:
+            setattr(self, field, None)
+        self.touched_at = time.monotonic()
+
+    def get(self, key: str, default=None):
+        """گرفتن مقدار یک فیلد (مثل dict.get؛ فیلد خالی یعنی default)."""
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def to_dict(self) -> dict:
+        """تبدیل فیلدهای پرشده به دیکشنری."""
+        return {field: getattr(self, field) for field in SESSION_FIELDS if getattr(self, field) is not None}
+
+def _deep_sizeof(value) -> int:
+    """تخمین حافظه یک مقدار به همراه محتوای لیست‌ها و دیکشنری‌های داخلش."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(_deep_sizeof(item) for item in value)
+    return size
+
+class UserData:
+    """
+    مدیریت داده‌های کاربر به‌صورت مرکزی.
+
+    هر سشن بعد از SESSION_TTL ثانیه بی‌استفاده بودن منقضی می‌شود و اگه تعداد
+    سشن‌ها از SESSION_MAX بیشتر شود، قدیمی‌ترین سشن (LRU) حذف می‌شود.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = SESSION_MAX):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.data = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+        # کاربرانی که سشنشان از آخرین ذخیره روی دیسک استفاده، تغییر یا حذف شده
+        self.dirty = set()
+        # توابعی که هنگام حذف خودکار یک سشن با user_id صدا زده می‌شوند
+        self.on_evict = []
+
+    def _drop(self, user_id: str):
+        self.data.pop(user_id, None)
+        self.dirty.add(user_id)
+        for callback in self.on_evict:
+            try:
+                callback(user_id)
+            except Exception as e:
+                logger.error(f"Error in session eviction callback for {user_id}: {str(e)}")
+
+    def _purge_expired(self):
+        """حذف سشن‌های منقضی‌شده از ابتدای صف LRU."""
+        deadline = time.monotonic() - self.ttl
+        while self.data:
+            user_id, session = next(iter(self.data.items()))
+            if session.touched_at > deadline:
+                break
+            self.expirations += 1
+            self._drop(user_id)
+
+    def _session(self, user_id: str) -> Session:
+        self._purge_expired()
+        session = self.data.get(user_id)
+        # هر دسترسی ممکن است مقدار داخل لیست یا دیکشنری را تغییر دهد، پس سشن کثیف حساب می‌شود
+        self.dirty.add(user_id)
+        if session is None:
+            session = self.data[user_id] = Session()
+            while len(self.data) > self.max_sessions:
+                self.evictions += 1
+                self._drop(next(iter(self.data)))
+        else:
+            session.touched_at = time.monotonic()
+            self.data.move_to_end(user_id)
+        return session
 
     def get(self, user_id: str, key: str = None):
         """
         گرفتن داده‌های کاربر یا یک مقدار خاص.
-        
+
         Args:
             user_id (str): آیدی کاربر
             key (str, optional): کلید خاص برای گرفتن مقدار
-        
+
         Returns:
-            dict یا مقدار: کل دیکشنری کاربر یا مقدار کلید
+            Session یا مقدار: کل سشن کاربر یا مقدار کلید
         """
-        if user_id not in self.data:
-            self.data[user_id] = {}
-        return self.data[user_id] if key is None else self.data[user_id].get(key)
+        session = self._session(user_id)
+        return session if key is None else session.get(key)
+
+    def has(self, user_id: str) -> bool:
+        """آیا کاربر سشن زنده دارد؟ (بدون ساختن یا تازه کردن سشن)"""
+        self._purge_expired()
+        return user_id in self.data
 
     def set(self, user_id: str, key: str, value):
         """
         تنظیم مقدار برای یک کلید خاص برای کاربر.
-        
+
         Args:
             user_id (str): آیدی کاربر
-            key (str): کلید داده
+            key (str): کلید داده (باید در SESSION_FIELDS باشد)
             value: مقدار برای ذخیره
         """
-        if user_id not in self.data:
-            self.data[user_id] = {}
-        self.data[user_id][key] = value
+        setattr(self._session(user_id), key, value)
 
     def clear(self, user_id: str):
         """
         پاک کردن تمام داده‌های کاربر.
-        
+
         Args:
             user_id (str): آیدی کاربر
         """
         self.data.pop(user_id, None)
+        self.dirty.add(user_id)
+
+    def stats(self) -> dict:
+        """
+        آمار سشن‌ها برای مانیتورینگ.
+
+        Returns:
+            dict: تعداد سشن‌های زنده، تخمین حافظه (بایت)، تعداد حذف‌های LRU و انقضاها
+        """
+        self._purge_expired()
+        return {
+            "live_sessions": len(self.data),
+            "bytes": sum(_deep_sizeof(session.to_dict()) + sys.getsizeof(session) for session in self.data.values()),
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
 
 # نمونه سراسری برای استفاده در پروژه
-user_data = UserData()
\ No newline at end of file
+user_data = UserData()
@@ -0,0 +1,69 @@
+import hashlib
+import hmac
+from collections import deque
+
+def derive_secret_token(bot_token: str) -> str:
+    """ساخت secret token ثابت وب‌هوک از توکن بات (فقط حروف مجاز تلگرام: هگز)."""
+    return hashlib.sha256(f"webhook:{bot_token}".encode()).hexdigest()
+
+class RecentIds:
+    """بافر حلقه‌ای از آخرین update_idها برای تشخیص آپدیت‌های تکراری."""
+
+    def __init__(self, size: int):
+        self._order = deque(maxlen=size)
+        self._ids = set()
+
+    def __contains__(self, update_id: int) -> bool:
+        return update_id in self._ids
+
+    def add(self, update_id: int):
+        if len(self._order) == self._order.maxlen:
+            self._ids.discard(self._order[0])
+        self._order.append(update_id)
+        self._ids.add(update_id)
+
+class WebhookIntake:
+    """
+    مرحله ورودی وب‌هوک: بررسی secret token، حذف آپدیت‌های تکراری و آمار ردشده‌ها.
+
+    بررسی‌ها قبل از پارس کامل آپدیت انجام می‌شوند تا درخواست‌های جعلی، تکراری
+    یا رسیده در زمان شلوغی هزینه‌ای نداشته باشند.
+    """
+
+    def __init__(self, secret_token: str, dedup_size: int):
+        self.secret_token = secret_token
+        self.recent = RecentIds(dedup_size)
+        self.accepted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.overloaded = 0
+
+    def authorized(self, header: str) -> bool:
+        """مقایسه هدر X-Telegram-Bot-Api-Secret-Token در زمان ثابت."""
+        if not self.secret_token:
+            return True
+        if header is None or not hmac.compare_digest(header.encode(), self.secret_token.encode()):
+            self.rejected += 1
+            return False
+        return True
+
+    def is_duplicate(self, update_id: int) -> bool:
+        """آیا این update_id اخیراً پذیرفته شده؟"""
+        if update_id in self.recent:
+            self.duplicates += 1
+            return True
+        return False
+
+    def accept(self, update_id: int):
+        """ثبت update_id بعد از اینکه با موفقیت در صف قرار گرفت."""
+        self.recent.add(update_id)
+        self.accepted += 1
+
+    def stats(self) -> dict:
+        """آمار ورودی وب‌هوک برای مانیتورینگ."""
+        return {
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "overloaded": self.overloaded
+        }
@@ -1,41 +1,309 @@
-import requests
-from config.settings import WP_URL, WP_CONSUMER_KEY, WP_CONSUMER_SECRET, WP_USERNAME, WP_PASSWORD, logger
+import asyncio
+import time
+import aiohttp
+from config.settings import (
+    WP_URL, WP_CONSUMER_KEY, WP_CONSUMER_SECRET, WP_USERNAME, WP_PASSWORD, ATTRIBUTE_TERMS_TTL,
+    ATTRIBUTE_TERMS_STALE_TTL, SKU_INDEX_TTL, SKU_INDEX_PATH, WC_RATE_LIMIT, WC_RATE_BURST,
+    WC_MAX_CONCURRENCY, WC_BREAKER_THRESHOLD, WC_BREAKER_RESET, CATALOG_SYNC_INTERVAL, CATALOG_PATH, logger
+)
+from config.constants import WC_BATCH_LIMIT, WC_PER_PAGE, CATALOG_SYNC_OVERLAP
+from utils.cache import TTLCache
+from utils.catalog import CatalogMirror, PRODUCT_FIELDS, VARIATION_FIELDS
+from utils.http import HttpResponse, http_pool
+from utils.metrics import observe_woocommerce, woocommerce_operation
+from utils.tracing import tracer
+from utils.resilience import AdaptiveLimiter, CircuitBreaker, StoreServerError, StoreUnavailableError
+from utils.sku_index import SkuIndex
 
 class WooCommerceClient:
     """مدیریت تعاملات با API ووکامرس."""
 
     def __init__(self):
         self.base_url = WP_URL
-        self.auth = (WP_CONSUMER_KEY, WP_CONSUMER_SECRET)
-        self.media_auth = (WP_USERNAME, WP_PASSWORD)
+        self.auth = aiohttp.BasicAuth(WP_CONSUMER_KEY or "", WP_CONSUMER_SECRET or "")
+        self.media_auth = aiohttp.BasicAuth(WP_USERNAME or "", WP_PASSWORD or "")
+        self.terms_cache = TTLCache(ATTRIBUTE_TERMS_TTL, ATTRIBUTE_TERMS_STALE_TTL)
+        self.sku_index = SkuIndex(SKU_INDEX_TTL, SKU_INDEX_PATH)
+        self.catalog = CatalogMirror(CATALOG_PATH)
+        self.limiter = AdaptiveLimiter(WC_RATE_LIMIT, WC_RATE_BURST, WC_MAX_CONCURRENCY)
+        self.breaker = CircuitBreaker(WC_BREAKER_THRESHOLD, WC_BREAKER_RESET)
+        self._warmup_task = None
+        self._catalog_task = None
+        self._revalidating = {}
 
-    def get_attribute_terms(self, attribute_id):
-        """گرفتن مقادیر ویژگی‌ها از ووکامرس."""
+    async def _request(self, method, url, auth=None, **kwargs):
+        """
+        ارسال درخواست از طریق pool مشترک HTTP و برگرداندن HttpResponse.
+
+        همه درخواست‌ها از limiter مشترک جا می‌گیرند و وقتی مدار باز است (فروشگاه
+        پشت سر هم خطا داده) بدون ارسال با StoreUnavailableError رد می‌شوند.
+        """
+        if not self.breaker.allow():
+            raise StoreUnavailableError()
+        start = time.perf_counter()
+        with tracer.span(f"HTTP {method}", url=url.replace(self.base_url or "", "")) as span:
+            try:
+                response = await http_pool.request(method, url, auth=auth or self.auth, limiter=self.limiter, **kwargs)
+            except (asyncio.TimeoutError, aiohttp.ClientError):
+                observe_woocommerce(method, "error", time.perf_counter() - start)
+                self.breaker.record_failure()
+                raise
+            if span is not None:
+                span.set("status", response.status)
+        observe_woocommerce(method, response.status, time.perf_counter() - start)
+        if response.status >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def _revalidate(self, key, refresh):
+        """
+        اجرای refresh در پس‌زمینه برای به‌روزرسانی یک مقدار کهنه (فقط یک بار برای هر کلید).
+
+        Args:
+            key: کلید یکتای مقدار در حال به‌روزرسانی
+            refresh: تابعی که coroutine به‌روزرسانی را برمی‌گرداند
+        """
+        if key in self._revalidating:
+            return
+
+        async def run():
+            try:
+                await refresh()
+            except Exception as e:
+                logger.warning(f"Background refresh of {key} failed: {str(e)}")
+            finally:
+                self._revalidating.pop(key, None)
+
+        self._revalidating[key] = asyncio.ensure_future(run())
+
+    async def iter_pages(self, url, params=None):
+        """
+        پیمایش همه صفحه‌های یک endpoint لیستی ووکامرس.
+
+        صفحه اول برای خواندن هدر X-WP-TotalPages گرفته می‌شود و بقیه صفحه‌ها
+        همزمان درخواست داده می‌شوند، ولی به ترتیب شماره صفحه برگردانده می‌شوند.
+
+        Args:
+            url (str): آدرس endpoint لیستی
+            params (dict, optional): پارامترهای اضافه کوئری
+
+        Yields:
+            HttpResponse: پاسخ هر صفحه
+        """
+        params = {"per_page": WC_PER_PAGE, **(params or {})}
+        first = await self._request("GET", url, params={**params, "page": 1})
+        yield first
+        if first.status != 200:
+            return
+        total_pages = int(first.headers.get("X-WP-TotalPages", 1))
+        tasks = [
+            asyncio.ensure_future(self._request("GET", url, params={**params, "page": page}))
+            for page in range(2, total_pages + 1)
+        ]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @woocommerce_operation
+    async def fetch_all(self, url, params=None):
+        """
+        گرفتن همه آیتم‌های یک endpoint لیستی در یک لیست ادغام‌شده.
+
+        Args:
+            url (str): آدرس endpoint لیستی
+            params (dict, optional): پارامترهای اضافه کوئری
+
+        Returns:
+            HttpResponse: پاسخ با همه آیتم‌ها در data، یا اولین صفحه ناموفق
+        """
+        items = []
+        headers = None
+        pages = self.iter_pages(url, params)
+        try:
+            async for page in pages:
+                if page.status != 200:
+                    return page
+                headers = headers or page.headers
+                items.extend(page.data)
+        finally:
+            await pages.aclose()
+        return HttpResponse(200, headers, items)
+
+    async def _batch(self, url, create=None, update=None, delete=None):
+        """
+        ارسال عملیات گروهی به یک endpoint از نوع batch در تکه‌های حداکثر WC_BATCH_LIMIT تایی.
+
+        Args:
+            url (str): آدرس endpoint مربوط به batch
+            create (list, optional): آیتم‌هایی که باید ساخته شوند
+            update (list, optional): آیتم‌هایی (با id) که باید به‌روزرسانی شوند
+            delete (list, optional): آیدی آیتم‌هایی که باید حذف شوند
+
+        Returns:
+            dict: نتایج هر عملیات به ترتیب ورودی در کلیدهای create/update/delete
+                و لیست خطاهای هر آیتم در کلید errors
+
+        Raises:
+            StoreServerError: اگه فروشگاه به یک تکه با خطای سرور (5xx) جواب بدهد
+        """
+        operations = (
+            [("create", item) for item in create or []]
+            + [("update", item) for item in update or []]
+            + [("delete", item) for item in delete or []]
+        )
+        result = {"create": [], "update": [], "delete": [], "errors": []}
+        for start in range(0, len(operations), WC_BATCH_LIMIT):
+            chunk = operations[start:start + WC_BATCH_LIMIT]
+            payload = {}
+            for action, item in chunk:
+                payload.setdefault(action, []).append(item)
+            # ساختن آیتم idempotent نیست، پس فقط تکه‌های بدون create دوباره ارسال می‌شوند
+            response = await self._request("POST", url, json=payload, retry=None if "create" in payload else True)
+            if response.status >= 500:
+                logger.error(f"Batch request to {url} failed: {response.status}")
+                raise StoreServerError(response.status)
+            for action, items in payload.items():
+                if response.status == 200:
+                    outcomes = response.data.get(action, [])
+                else:
+                    message = (response.data or {}).get("message", f"HTTP {response.status}")
+                    outcomes = [{"error": {"message": message}} for _ in items]
+                if len(outcomes) < len(items):
+                    # آیتم‌هایی که پاسخی برایشان نیامده موفق حساب نمی‌شوند
+                    outcomes = outcomes + [
+                        {"error": {"message": "No result returned for this item"}}
+                        for _ in range(len(items) - len(outcomes))
+                    ]
+                for item, outcome in zip(items, outcomes):
+                    result[action].append(outcome)
+                    if "error" in outcome:
+                        result["errors"].append({
+                            "action": action,
+                            "index": len(result[action]) - 1,
+                            "id": item if action == "delete" else item.get("id"),
+                            "message": outcome["error"].get("message")
+                        })
+        if result["errors"]:
+            logger.error(f"Batch request to {url} had {len(result['errors'])} failed items: {result['errors']}")
+        return result
+
+    @woocommerce_operation
+    async def batch_products(self, create=None, update=None, delete=None):
+        """عملیات گروهی روی محصولات با /products/batch."""
+        url = f"{self.base_url}/wp-json/wc/v3/products/batch"
+        result = await self._batch(url, create, update, delete)
+        self.catalog.put_products([item for item in result["create"] + result["update"] if "error" not in item])
+        self.catalog.remove_products([item["id"] for item in result["delete"] if "error" not in item])
+        return result
+
+    @woocommerce_operation
+    async def batch_variations(self, product_id, create=None, update=None, delete=None):
+        """عملیات گروهی روی متغیرهای یک محصول با /products/{id}/variations/batch."""
+        url = f"{self.base_url}/wp-json/wc/v3/products/{product_id}/variations/batch"
+        result = await self._batch(url, create, update, delete)
+        self.catalog.merge_variations(product_id, [item for item in result["create"] + result["update"] if "error" not in item])
+        self.catalog.remove_variations([item["id"] for item in result["delete"] if "error" not in item])
+        return result
+
+    @woocommerce_operation
+    async def get_attribute_terms(self, attribute_id):
+        """
+        گرفتن مقادیر ویژگی‌ها از ووکامرس (با کش TTL).
+
+        اگه مقدار کش منقضی شده ولی هنوز موجود باشه، همان برگردانده می‌شود و
+        به‌روزرسانی در پس‌زمینه انجام می‌شود (stale-while-revalidate).
+        """
+        terms = self.terms_cache.get(attribute_id)
+        if terms is not None:
+            return terms
+        stale = self.terms_cache.get_stale(attribute_id)
+        if stale is not None:
+            self._revalidate(("terms", attribute_id), lambda: self._fetch_attribute_terms(attribute_id))
+            return stale
+        return await self._fetch_attribute_terms(attribute_id)
+
+    async def _fetch_attribute_terms(self, attribute_id):
         url = f"{self.base_url}/wp-json/wc/v3/products/attributes/{attribute_id}/terms"
-        response = requests.get(url, auth=self.auth)
-        return response.json() if response.status_code == 200 else []
+        response = await self.fetch_all(url)
+        if response.status != 200:
+            return []
+        self.terms_cache.set(attribute_id, response.data)
+        return response.data
+
+    def invalidate_attribute_terms(self, attribute_id=None):
+        """پاک کردن کش مقادیر یک ویژگی یا همه ویژگی‌ها."""
+        self.terms_cache.invalidate(attribute_id)
 
-    def add_attribute_term(self, attribute_id, term_name):
+    @woocommerce_operation
+    async def add_attribute_term(self, attribute_id, term_name):
         """اضافه کردن مقدار جدید به ویژگی."""
         url = f"{self.base_url}/wp-json/wc/v3/products/attributes/{attribute_id}/terms"
         data = {"name": term_name}
-        response = requests.post(url, auth=self.auth, json=data)
-        return response.json().get("name") if response.status_code == 201 else None
+        response = await self._request("POST", url, json=data)
+        if response.status != 201:
+            return None
+        # مقدار جدید مستقیماً به لیست کش‌شده اضافه می‌شود تا نیاز به دریافت دوباره نباشد؛
+        # لیست منقضی‌شده هم به‌روز می‌شود چون تا پایان revalidate همان برگردانده می‌شود
+        terms = self.terms_cache.get_stale(attribute_id)
+        if terms is not None:
+            terms.append(response.data)
+        return response.data.get("name")
 
-    def upload_image(self, image_data, filename):
+    @woocommerce_operation
+    async def upload_image(self, image_data, filename, content_type='image/jpeg'):
         """آپلود عکس به وردپرس."""
         url = f"{self.base_url}/wp-json/wp/v2/media"
-        headers = {'Content-Disposition': f'attachment; filename={filename}'}
-        files = {'file': (filename, image_data, 'image/jpeg')}
+        headers = {'Content-Disposition': f'attachment; filename={filename}', 'Content-Type': content_type}
         logger.info(f"Uploading image to WordPress: {filename}")
-        response = requests.post(url, auth=self.media_auth, files=files, headers=headers)
-        if response.status_code == 201:
-            media_id = response.json().get('id')
+        # بدنه خام (به‌جای multipart) قابل ارسال مجدد است، پس آپلود هم از retry روی 429 بهره می‌برد
+        response = await self._request("POST", url, auth=self.media_auth, data=bytes(image_data), headers=headers)
+        if response.status == 201:
+            media_id = response.data.get('id')
             logger.info(f"Image uploaded successfully, ID: {media_id}")
             return media_id
-        logger.error(f"Error uploading photo: {response.status_code}")
+        logger.error(f"Error uploading photo: {response.status}")
         raise Exception("مشکلی در آپلود عکس پیش اومد.")
 
+    @woocommerce_operation
+    async def upload_image_stream(self, chunks, filename, content_type='image/jpeg', size=None):
+        """
+        آپلود stream عکس به وردپرس بدون نگه داشتن کل فایل در حافظه.
+
+        Args:
+            chunks: async iterable از تکه‌های بایت عکس
+            filename (str): نام فایل در وردپرس
+            content_type (str): نوع محتوا
+            size (int, optional): اندازه فایل؛ اگه معلوم نباشه بدنه chunked ارسال می‌شود
+
+        Returns:
+            int: آیدی مدیای ساخته‌شده
+        """
+        url = f"{self.base_url}/wp-json/wp/v2/media"
+        headers = {'Content-Disposition': f'attachment; filename={filename}', 'Content-Type': content_type}
+        if size:
+            headers['Content-Length'] = str(size)
+        logger.info(f"Streaming image to WordPress: {filename}")
+        # بدنه stream قابل ارسال دوباره نیست، پس retry خاموش است
+        response = await self._request("POST", url, auth=self.media_auth, data=chunks, headers=headers, retry=False)
+        if response.status == 201:
+            media_id = response.data.get('id')
+            logger.info(f"Image uploaded successfully, ID: {media_id}")
+            return media_id
+        logger.error(f"Error uploading photo: {response.status}")
+        raise Exception("مشکلی در آپلود عکس پیش اومد.")
+
+    @woocommerce_operation
+    async def media_exists(self, media_id):
+        """بررسی اینکه مدیا هنوز در وردپرس وجود دارد (در خطاهای موقت True برمی‌گرداند)."""
+        url = f"{self.base_url}/wp-json/wp/v2/media/{media_id}"
+        response = await self._request("GET", url, auth=self.media_auth, params={"_fields": "id"})
+        return response.status not in (404, 410)
+
     def create_product_json(self, user_data):
         """ساخت JSON محصول برای ووکامرس."""
         sizes_list = user_data.get("sizes", "").split(",")
@@ -78,59 +346,355 @@ class WooCommerceClient:
             "manage_stock": False
         }
 
-    def create_product(self, product_json):
-        """ارسال محصول به ووکامرس."""
+    @woocommerce_operation
+    async def create_product(self, product_json, resume=False):
+        """
+        ارسال محصول به ووکامرس.
+
+        Args:
+            product_json (dict): JSON محصول به همراه کلید variations
+            resume (bool): اگه محصولی با همین SKU و نام از قبل ساخته شده باشه (مثلاً
+                در اجرای نیمه‌کاره قبلی)، به‌جای ساخت دوباره فقط متغیرهای جاافتاده ساخته می‌شوند
+
+        Returns:
+            int: آیدی محصول
+        """
         url = f"{self.base_url}/wp-json/wc/v3/products"
+        # کپی تا دیکشنری صدا‌زننده برای تلاش بعدی دست‌نخورده بماند
+        product_json = dict(product_json)
         variations = product_json.pop("variations", [])
-        response = requests.post(url, auth=self.auth, json=product_json)
-        if response.status_code == 201:
-            product_id = response.json().get("id")
-            for variation in variations:
-                variation_url = f"{url}/{product_id}/variations"
-                requests.post(variation_url, auth=self.auth, json=variation)
-            self.update_product(product_id, {"manage_stock": False, "stock_status": "instock"})
-            return product_id
-        error_message = response.json().get("message", "خطایی رخ داد")
-        logger.error(f"Error sending product to WooCommerce: {response.status_code}")
-        if "SKU" in error_message and "already" in error_message:
+        product = await self._find_partial_product(product_json) if resume else None
+        if product is None:
+            response = await self._request("POST", url, json=product_json)
+            if response.status >= 500:
+                logger.error(f"Error sending product to WooCommerce: {response.status}")
+                raise StoreServerError(response.status)
+            if response.status != 201:
+                error_message = (response.data or {}).get("message", "خطایی رخ داد")
+                logger.error(f"Error sending product to WooCommerce: {response.status}")
+                if "SKU" in error_message and "already" in error_message:
+                    raise Exception("این SKU قبلاً برای یه محصول دیگه استفاده شده. لطفاً یه SKU دیگه انتخاب کن.")
+                raise Exception("مشکلی در ثبت محصول پیش اومد. لطفاً دوباره امتحان کن یا با مدیر تماس بگیر.")
+            product = response.data
+            # محصول تازه هنوز متغیری ندارد؛ متغیرهای batch زیر به همین لیست خالی اضافه می‌شوند
+            self.catalog.put_products([product])
+            self.catalog.put_variations(product["id"], [])
+        else:
+            logger.info(f"Resuming creation of product {product['id']} ({product_json['sku']})")
+            variations = await self._missing_variations(product["id"], variations)
+            self.catalog.forget_variations(product["id"])
+        product_id = product["id"]
+        if variations:
+            result = await self.batch_variations(product_id, create=variations)
+            if result["errors"]:
+                raise Exception("مشکلی در ساخت بعضی از سایزهای محصول پیش اومد.")
+        await self.update_product(product_id, {"manage_stock": False, "stock_status": "instock"})
+        self.sku_index.put(product)
+        return product_id
+
+    async def _find_partial_product(self, product_json):
+        """پیدا کردن محصولی که قبلاً با همین SKU و نام شروع به ساختش شده (بدون ایندکس SKU)."""
+        url = f"{self.base_url}/wp-json/wc/v3/products"
+        response = await self._request("GET", url, params={"sku": product_json["sku"], "_fields": "id,sku,name"})
+        if response.status >= 500:
+            raise StoreServerError(response.status)
+        if response.status != 200:
+            raise Exception("مشکلی در بررسی SKU محصول پیش اومد.")
+        if not response.data:
+            return None
+        product = response.data[0]
+        if product.get("name") != product_json.get("name"):
             raise Exception("این SKU قبلاً برای یه محصول دیگه استفاده شده. لطفاً یه SKU دیگه انتخاب کن.")
-        raise Exception("مشکلی در ثبت محصول پیش اومد. لطفاً دوباره امتحان کن یا با مدیر تماس بگیر.")
+        return product
 
-    def update_product(self, product_id, data):
+    async def _missing_variations(self, product_id, variations):
+        """متغیرهایی از لیست که سایزشان هنوز برای محصول ساخته نشده."""
+        url = f"{self.base_url}/wp-json/wc/v3/products/{product_id}/variations"
+        response = await self.fetch_all(url)
+        if response.status >= 500:
+            raise StoreServerError(response.status)
+        if response.status != 200:
+            raise Exception("مشکلی در گرفتن متغیرهای محصول پیش اومد.")
+        existing = {
+            attribute["option"]
+            for variation in response.data
+            for attribute in variation["attributes"] if attribute.get("id") == 3
+        }
+        return [
+            variation for variation in variations
+            if variation["attributes"][0]["option"] not in existing
+        ]
+
+    @woocommerce_operation
+    async def update_product(self, product_id, data):
         """به‌روزرسانی محصول در ووکامرس."""
         url = f"{self.base_url}/wp-json/wc/v3/products/{product_id}"
-        response = requests.put(url, auth=self.auth, json=data)
-        if response.status_code == 200:
-            return response.json()
-        logger.error(f"Error updating product: {response.status_code}")
+        response = await self._request("PUT", url, json=data)
+        if response.status == 200:
+            self.catalog.put_products([response.data])
+            return response.data
+        logger.error(f"Error updating product: {response.status}")
+        if response.status >= 500:
+            raise StoreServerError(response.status)
         raise Exception("مشکلی در به‌روزرسانی محصول پیش اومد. لطفاً دوباره امتحان کنید.")
 
-    def find_product_by_sku(self, sku):
-        """پیدا کردن محصول با SKU."""
-        url = f"{self.base_url}/wp-json/wc/v3/products?sku={sku}"
-        response = requests.get(url, auth=self.auth)
-        if response.status_code == 200 and response.json():
-            return response.json()[0]
-        logger.error(f"Product with SKU {sku} not found: {response.status_code}")
+    @woocommerce_operation
+    async def find_product_by_sku(self, sku):
+        """
+        پیدا کردن محصول با SKU.
+
+        اول آینه کاتالوگ و بعد ایندکس SKU بررسی می‌شوند و فقط اگه SKU در هیچ‌کدام
+        نباشه از ووکامرس پرسیده می‌شود؛ ورودی کهنه ایندکس همان لحظه برگردانده و در
+        پس‌زمینه به‌روز می‌شود. نتیجه ایندکس فقط شامل id، sku و name است.
+        """
+        product = self.catalog.get_by_sku(sku) or self.sku_index.get(sku)
+        if product:
+            return product
+        stale = self.sku_index.get_stale(sku)
+        if stale:
+            self._revalidate(("sku", sku), lambda: self._lookup_sku(sku))
+            return stale
+        return await self._lookup_sku(sku)
+
+    async def _lookup_sku(self, sku):
+        url = f"{self.base_url}/wp-json/wc/v3/products"
+        response = await self._request("GET", url, params={"sku": sku})
+        if response.status == 200 and response.data:
+            self._mirror_products(response.data[:1])
+            return response.data[0]
+        if response.status == 200:
+            self.sku_index.remove(sku)
+        logger.error(f"Product with SKU {sku} not found: {response.status}")
         return None
 
-    def get_variations(self, product_id):
-        """گرفتن متغیرهای محصول."""
+    @woocommerce_operation
+    async def find_products_by_skus(self, skus):
+        """
+        پیدا کردن چند محصول با SKU؛ SKUهایی که در ایندکس نیستند با یک درخواست پرسیده می‌شوند.
+
+        Args:
+            skus (list): لیست SKUها
+
+        Returns:
+            dict: SKU → محصول، فقط برای SKUهایی که پیدا شدند
+        """
+        products = {}
+        missing = []
+        for sku in skus:
+            product = self.catalog.get_by_sku(sku) or self.sku_index.get(sku)
+            stale = None if product else self.sku_index.get_stale(sku)
+            if product:
+                products[sku] = product
+            elif stale:
+                products[sku] = stale
+                self._revalidate(("sku", sku), lambda sku=sku: self._lookup_sku(sku))
+            else:
+                missing.append(sku)
+        if not missing:
+            return products
+        url = f"{self.base_url}/wp-json/wc/v3/products"
+        response = await self.fetch_all(url, {"sku": ",".join(missing)})
+        if response.status != 200:
+            logger.error(f"Error looking up SKUs {missing}: {response.status}")
+            return products
+        for product in response.data:
+            if product.get("sku") in missing:
+                self._mirror_products([product])
+                products[product["sku"]] = product
+        for sku in missing:
+            if sku not in products:
+                self.sku_index.remove(sku)
+        return products
+
+    @woocommerce_operation
+    async def warm_sku_index(self):
+        """پر کردن ایندکس SKU با پیمایش کل کاتالوگ."""
+        url = f"{self.base_url}/wp-json/wc/v3/products"
+        count = 0
+        pages = self.iter_pages(url, {"_fields": "id,sku,name"})
+        try:
+            async for page in pages:
+                if page.status != 200:
+                    logger.error(f"Error warming SKU index: {page.status}")
+                    return
+                for product in page.data:
+                    self.sku_index.put(product)
+                count += len(page.data)
+        finally:
+            await pages.aclose()
+        self.sku_index.save()
+        logger.info(f"SKU index warmed with {count} products")
+
+    def start_sku_index_warmup(self):
+        """بارگذاری ایندکس SKU از دیسک و شروع پر کردن آن در پس‌زمینه."""
+        self.sku_index.load()
+        self._warmup_task = asyncio.create_task(self.warm_sku_index())
+
+    @woocommerce_operation
+    async def load_catalog(self):
+        """بارگذاری کامل آینه کاتالوگ: همه محصولات صفحه به صفحه و بعد متغیرهای محصولات متغیر."""
+        started = time.time()
+        url = f"{self.base_url}/wp-json/wc/v3/products"
+        variable = []
+        pages = self.iter_pages(url, {"_fields": ",".join(PRODUCT_FIELDS)})
+        try:
+            async for page in pages:
+                if page.status != 200:
+                    raise Exception(f"Catalog load failed: {page.status}")
+                self._mirror_products(page.data)
+                variable.extend(product["id"] for product in page.data if product.get("type") == "variable")
+        finally:
+            await pages.aclose()
+        await self._load_catalog_variations(variable)
+        self.catalog.set_watermark(started)
+        logger.info(f"Catalog mirror loaded {len(self.catalog)} products in {time.time() - started:.1f}s")
+
+    @woocommerce_operation
+    async def sync_catalog(self):
+        """همگام‌سازی افزایشی آینه کاتالوگ با محصولاتی که از آخرین همگام‌سازی تغییر کرده‌اند."""
+        started = time.time()
+        since = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(self.catalog.watermark - CATALOG_SYNC_OVERLAP))
+        url = f"{self.base_url}/wp-json/wc/v3/products"
+        response = await self.fetch_all(url, {
+            "modified_after": since, "dates_are_gmt": "true", "_fields": ",".join(PRODUCT_FIELDS)
+        })
+        if response.status != 200:
+            raise Exception(f"Catalog sync failed: {response.status}")
+        # محصولاتی که در بازه همپوشانی دوباره آمده‌اند یا بات خودش نوشته، تاریخ تغییر یکسان دارند
+        known = self.catalog.get_products([product["id"] for product in response.data])
+        changed = [
+            product for product in response.data
+            if known.get(product["id"], {}).get("date_modified_gmt") != product.get("date_modified_gmt")
+        ]
+        self._mirror_products(changed)
+        await self._load_catalog_variations(
+            [product["id"] for product in changed if product.get("type") == "variable"]
+        )
+        self.catalog.set_watermark(started)
+        if changed:
+            logger.info(f"Catalog mirror synced {len(changed)} changed products")
+
+    def _mirror_products(self, products):
+        self.catalog.put_products(products)
+        for product in products:
+            self.sku_index.put(product)
+
+    async def _load_catalog_variations(self, product_ids):
+        async def load(product_id):
+            url = f"{self.base_url}/wp-json/wc/v3/products/{product_id}/variations"
+            response = await self.fetch_all(url, {"_fields": ",".join(VARIATION_FIELDS)})
+            if response.status == 200:
+                self.catalog.put_variations(product_id, response.data)
+            else:
+                logger.warning(f"Could not mirror variations of product {product_id}: {response.status}")
+
+        # چند محصول همزمان؛ limiter مشترک از فروشگاه محافظت می‌کند
+        for start in range(0, len(product_ids), WC_MAX_CONCURRENCY):
+            await asyncio.gather(*(load(product_id) for product_id in product_ids[start:start + WC_MAX_CONCURRENCY]))
+
+    async def _catalog_loop(self):
+        while True:
+            try:
+                if self.catalog.ready:
+                    await self.sync_catalog()
+                else:
+                    await self.load_catalog()
+            except Exception as e:
+                logger.error(f"Catalog mirror sync failed: {str(e)}")
+            await asyncio.sleep(CATALOG_SYNC_INTERVAL)
+
+    def start_catalog_sync(self):
+        """باز کردن آینه کاتالوگ و شروع همگام‌سازی دوره‌ای آن (اگه CATALOG_SYNC_INTERVAL تنظیم شده باشه)."""
+        if CATALOG_SYNC_INTERVAL <= 0 or self._catalog_task is not None:
+            return
+        self.catalog.open()
+        self._catalog_task = asyncio.create_task(self._catalog_loop())
+
+    async def stop_catalog_sync(self):
+        """توقف همگام‌سازی و بستن آینه کاتالوگ."""
+        if self._catalog_task is not None:
+            self._catalog_task.cancel()
+            try:
+                await self._catalog_task
+            except asyncio.CancelledError:
+                pass
+            self._catalog_task = None
+        self.catalog.close()
+
+    def apply_product_event(self, topic, product):
+        """
+        اعمال یک وب‌هوک محصول ووکامرس روی ایندکس SKU، آینه کاتالوگ و کش مقادیر ویژگی‌ها.
+
+        همه چیز محلی است و درخواستی به فروشگاه نمی‌رود. متغیرها هم با همین موضوع‌ها و
+        type=variation می‌رسند. تحویلی که از نسخه آینه قدیمی‌تر یا با آن یکسان است
+        (تحویل دیرهنگام یا نوشتن خود بات) نادیده گرفته می‌شود.
+
+        Args:
+            topic (str): مقدار هدر X-WC-Webhook-Topic
+            product (dict): بدنه وب‌هوک (برای product.deleted فقط id)
+
+        Returns:
+            bool: آیا رویداد چیزی را تغییر داد
+        """
+        product_id = product["id"]
+        if topic == "product.deleted" or product.get("status") == "trash":
+            self.sku_index.remove_product(product_id)
+            self.catalog.remove_products([product_id])
+            # بدنه حذف فقط آیدی دارد و ممکن است آیدی یک متغیر باشد
+            self.catalog.remove_variations([product_id])
+            return True
+        if product.get("type") == "variation":
+            self.catalog.merge_variations(product["parent_id"], [product])
+            return True
+        known = self.catalog.get_products([product_id]).get(product_id)
+        modified = product.get("date_modified_gmt")
+        if known and modified and (known.get("date_modified_gmt") or "") >= modified:
+            return False
+        # اگه SKU در wp-admin عوض شده باشد، SkuIndex.put کلید قبلی را حذف می‌کند
+        self._mirror_products([product])
+        if product.get("type") == "variable":
+            # ویرایش متغیرها در صفحه محصول تاریخ تغییر والد را هم عوض می‌کند؛ خواندن بعدی فقط همین محصول را می‌گیرد
+            self.catalog.forget_variations(product_id)
+        for attribute in product.get("attributes", []):
+            terms = self.terms_cache.get_stale(attribute.get("id"))
+            if terms is not None and not set(attribute.get("options", [])) <= {term["name"] for term in terms}:
+                self.invalidate_attribute_terms(attribute["id"])
+        return True
+
+    @woocommerce_operation
+    async def get_variations(self, product_id):
+        """گرفتن متغیرهای محصول (از آینه کاتالوگ اگه کامل باشند)."""
+        variations = self.catalog.get_variations(product_id)
+        if variations is not None:
+            return variations
         url = f"{self.base_url}/wp-json/wc/v3/products/{product_id}/variations"
-        response = requests.get(url, auth=self.auth)
-        if response.status_code == 200:
-            return response.json()
-        logger.error(f"Error getting variations: {response.status_code}")
+        response = await self.fetch_all(url)
+        if response.status == 200:
+            self.catalog.put_variations(product_id, response.data)
+            return response.data
+        logger.error(f"Error getting variations: {response.status}")
         return []
 
-    def update_variations_stock(self, product_id, stock_data):
-        """به‌روزرسانی موجودی متغیرها."""
+    async def _live_variations(self, product_id):
+        """
+        خواندن متغیرهای محصول مستقیم از ووکامرس برای ساختن یک batch نوشتن.
+
+        آینه کاتالوگ ممکن است متغیرهایی را که بعد از آخرین همگام‌سازی اضافه یا حذف شده‌اند
+        نداشته باشد؛ نتیجه جایگزین متغیرهای آینه هم می‌شود.
+        """
         url = f"{self.base_url}/wp-json/wc/v3/products/{product_id}/variations"
-        variations_response = requests.get(url, auth=self.auth)
-        if variations_response.status_code != 200:
+        response = await self.fetch_all(url)
+        if response.status >= 500:
+            raise StoreServerError(response.status)
+        if response.status != 200:
             raise Exception("مشکلی در گرفتن متغیرهای محصول پیش اومد.")
+        self.catalog.put_variations(product_id, response.data)
+        return response.data
 
-        variations = variations_response.json()
+    @woocommerce_operation
+    async def update_variations_stock(self, product_id, stock_data):
+        """به‌روزرسانی موجودی متغیرها."""
+        variations = await self._live_variations(product_id)
         for variation in variations:
             for attribute in variation['attributes']:
                 if attribute.get('id') == 3:
@@ -138,54 +702,91 @@ class WooCommerceClient:
                     break
 
         variations.sort(key=lambda x: int(x['size']))
-        has_stock = False
-
         if isinstance(stock_data, int):
-            for variation in variations:
-                variation_id = variation['id']
-                variation_url = f"{url}/{variation_id}"
-                requests.put(variation_url, auth=self.auth, json={
-                    "manage_stock": True,
-                    "stock_quantity": stock_data,
-                    "stock_status": "instock" if stock_data > 0 else "outofstock"
-                })
-            has_stock = stock_data > 0
-        else:
-            for i, variation in enumerate(variations):
-                variation_id = variation['id']
-                stock = stock_data[i] if i < len(stock_data) else 0
-                variation_url = f"{url}/{variation_id}"
-                requests.put(variation_url, auth=self.auth, json={
-                    "manage_stock": True,
-                    "stock_quantity": stock,
-                    "stock_status": "instock" if stock > 0 else "outofstock"
-                })
-                if stock > 0:
-                    has_stock = True
+            stock_data = [stock_data] * len(variations)
+
+        updates = []
+        for i, variation in enumerate(variations):
+            stock = stock_data[i] if i < len(stock_data) else 0
+            updates.append({
+                "id": variation['id'],
+                "manage_stock": True,
+                "stock_quantity": stock,
+                "stock_status": "instock" if stock > 0 else "outofstock"
+            })
+        result = await self.batch_variations(product_id, update=updates)
+        has_stock = any(item["stock_quantity"] > 0 for item in updates)
+
+        await self.update_product(product_id, {"stock_status": "instock" if has_stock else "outofstock"})
+        if result["errors"]:
+            raise Exception(f"موجودی {len(result['errors'])} متغیر به‌روزرسانی نشد.")
 
-        self.update_product(product_id, {"stock_status": "instock" if has_stock else "outofstock"})
+    @woocommerce_operation
+    async def update_variations_price(self, product_id, price):
+        """به‌روزرسانی قیمت محصول و همه متغیرهای آن."""
+        await self.update_product(product_id, {"regular_price": str(price)})
+        variations = await self._live_variations(product_id)
+        updates = [{"id": variation['id'], "regular_price": str(price)} for variation in variations]
+        result = await self.batch_variations(product_id, update=updates)
+        if result["errors"]:
+            raise Exception(f"قیمت {len(result['errors'])} متغیر به‌روزرسانی نشد.")
 
-    def get_product_id_by_sku(self, sku):
+    @woocommerce_operation
+    async def get_product_id_by_sku(self, sku):
         """پیدا کردن ID محصول با SKU."""
-        url = f"{self.base_url}/wp-json/wc/v3/products?sku={sku}"
-        response = requests.get(url, auth=self.auth)
-        if response.status_code == 200 and response.json():
-            return response.json()[0]["id"]
-        logger.error(f"Product with SKU {sku} not found: {response.status_code}")
-        return None
+        product = await self.find_product_by_sku(sku)
+        return product["id"] if product else None
 
-    def update_cross_sells(self, product_id, new_cross_sell_ids):
+    @woocommerce_operation
+    async def update_cross_sells(self, product_id, new_cross_sell_ids):
         """به‌روزرسانی Cross-Sells محصول."""
-        url = f"{self.base_url}/wp-json/wc/v3/products/{product_id}"
-        response = requests.get(url, auth=self.auth)
-        if response.status_code != 200:
-            logger.error(f"Error getting product info {product_id}: {response.status_code}")
+        result = await self.update_cross_sells_bulk({product_id: new_cross_sell_ids})
+        if result["errors"]:
+            raise Exception("مشکلی در به‌روزرسانی محصول پیش اومد. لطفاً دوباره امتحان کنید.")
+
+    @woocommerce_operation
+    async def update_cross_sells_bulk(self, cross_sells):
+        """
+        اضافه کردن Cross-Sells به چند محصول با یک خواندن و یک درخواست batch.
+
+        Cross-Sellهای فعلی همیشه از خود ووکامرس خوانده می‌شوند، نه از آینه کاتالوگ، تا
+        تغییرهای wp-admin بعد از آخرین همگام‌سازی بازنویسی نشوند.
+
+        Args:
+            cross_sells (dict): آیدی محصول → لیست آیدی‌های Cross-Sell جدید
+
+        Returns:
+            dict: نتیجه batch_products (شامل خطاهای هر محصول در errors)؛ محصولاتی که در
+                خواندن نیامده‌اند (حذف‌شده یا پاسخ ناقص) نوشته نمی‌شوند و خطا حساب می‌شوند
+        """
+        url = f"{self.base_url}/wp-json/wc/v3/products"
+        include = ",".join(str(product_id) for product_id in cross_sells)
+        response = await self.fetch_all(url, {"include": include, "_fields": "id,cross_sell_ids"})
+        if response.status != 200:
+            logger.error(f"Error getting products info {include}: {response.status}")
             raise Exception("مشکلی در گرفتن اطلاعات محصول پیش اومد.")
 
-        product = response.json()
-        current_cross_sell_ids = product.get("cross_sell_ids", [])
-        updated_cross_sell_ids = list(set(current_cross_sell_ids + new_cross_sell_ids))
-        self.update_product(product_id, {"cross_sell_ids": updated_cross_sell_ids})
+        current = {product["id"]: product.get("cross_sell_ids", []) for product in response.data}
+        updates = [
+            {
+                "id": product_id,
+                "cross_sell_ids": list(set(current[product_id] + [i for i in new_ids if i in current]))
+            }
+            for product_id, new_ids in cross_sells.items() if product_id in current
+        ]
+        result = await self.batch_products(update=updates)
+        for product_id in cross_sells:
+            if product_id not in current:
+                result["update"].append({"error": {"message": "Product not returned by the store"}})
+                result["errors"].append({
+                    "action": "update",
+                    "index": len(result["update"]) - 1,
+                    "id": product_id,
+                    "message": "Product not returned by the store"
+                })
+        if len(current) < len(cross_sells):
+            logger.error(f"Cross-sells not written for products missing from the store: {set(cross_sells) - set(current)}")
+        return result
 
 # نمونه سراسری برای استفاده
 wc_client = WooCommerceClient()
\ No newline at end of file